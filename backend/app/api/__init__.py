@@ -11,6 +11,7 @@ from .dynamic_challenges import router as dynamic_challenges_router
 from .notifications import router as notifications_router
 from .analytics import router as analytics_router
 from .audit import router as audit_router
+from .competitions import router as competitions_router
 
 __all__ = [
     'auth_router',
@@ -24,5 +25,6 @@ __all__ = [
     'dynamic_challenges_router',
     'notifications_router',
     'analytics_router',
-    'audit_router'
+    'audit_router',
+    'competitions_router'
 ]
\ No newline at end of file
@@ -1,7 +1,7 @@
 # backend/app/api/admin.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from app.core.database import get_db
 from app.core.auth import get_current_admin
@@ -11,7 +11,13 @@ from app.models.user import User
 from app.models.team import Team
 from app.models.challenge import Challenge
 from app.models.submission import Submission
+from app.services.challenge_catalog import challenge_catalog
+from app.services.score_counters import TEAM_SCORES_KEY, score_counters
+from app.services.leaderboard_service import LeaderboardService
+from app.services.competition_service import CompetitionService
+from app.services.score_timeline import ScoreTimelineService
 from app.services.audit_service import AuditService
+from app.services.outbox_service import OutboxService, outbox_dispatcher
 
 router = APIRouter()
 
@@ -118,13 +124,14 @@ async def admin_get_teams(
 ):
     """Получение списка всех команд (админ)"""
     teams = db.query(Team).offset(skip).limit(limit).all()
+    pending_scores = score_counters.get_values(TEAM_SCORES_KEY, [team.id for team in teams])
     
     result = []
     for team in teams:
         result.append({
             "id": team.id,
             "name": team.name,
-            "score": team.score,
+            "score": pending_scores.get(team.id, team.score),
             "member_count": len(team.members),
             "country": team.country,
             "created_at": team.created_at
@@ -164,9 +171,95 @@ async def admin_delete_team(
     
     db.delete(team)
     db.commit()
+    LeaderboardService(db).remove_team(team_id)
     
     return {"message": "Команда удалена"}
 
+@router.post("/leaderboard/rebuild")
+async def admin_rebuild_leaderboard(
+    current_user: UserResponse = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Перестроение таблицы лидеров из БД (админ)"""
+    try:
+        team_count = LeaderboardService(db).rebuild()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Не удалось перестроить таблицу лидеров: {e}"
+        )
+    
+    return {"message": "Таблица лидеров перестроена", "teams": team_count}
+
+@router.post("/scoreboard/timeline/rebuild")
+async def admin_rebuild_score_timeline(
+    current_user: UserResponse = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Перестроение рядов счета команд из БД (админ)"""
+    try:
+        team_count = ScoreTimelineService(db).rebuild()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Не удалось перестроить ряды счета: {e}"
+        )
+    if team_count is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Ряды счета уже перестраиваются"
+        )
+    
+    return {"message": "Ряды счета перестроены", "teams": team_count}
+
+@router.post("/competitions/{competition_id}/standings/rebuild")
+async def admin_rebuild_competition_standings(
+    competition_id: int,
+    current_user: UserResponse = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Перестроение таблицы лидеров соревнования (админ)"""
+    team_count = CompetitionService(db).rebuild_standings(competition_id)
+    
+    return {"message": "Таблица лидеров соревнования перестроена", "teams": team_count}
+
+@router.get("/outbox/failed")
+async def admin_get_failed_outbox_events(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: UserResponse = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """События outbox, доставка которых исчерпала попытки (админ)"""
+    outbox_service = OutboxService(db)
+    
+    return {
+        "events": [
+            {
+                "id": event.id,
+                "event_type": event.event_type,
+                "payload": event.payload,
+                "attempts": event.attempts,
+                "last_error": event.last_error,
+                "created_at": event.created_at
+            }
+            for event in outbox_service.get_failed(limit=limit, offset=skip)
+        ],
+        "total": outbox_service.count_failed()
+    }
+
+@router.post("/outbox/failed/replay")
+async def admin_replay_failed_outbox_events(
+    event_ids: Optional[List[int]] = None,
+    current_user: UserResponse = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Повторная отправка неудачных событий outbox (все или по списку id) (админ)"""
+    replayed = OutboxService(db).replay_failed(event_ids)
+    outbox_dispatcher.notify()
+    
+    return {"message": "События возвращены в очередь доставки", "events": replayed}
+
 @router.post("/challenges", response_model=ChallengeResponse)
 async def admin_create_challenge(
     challenge_data: ChallengeCreate,
@@ -178,6 +271,7 @@ async def admin_create_challenge(
     db.add(challenge)
     db.commit()
     db.refresh(challenge)
+    challenge_catalog.invalidate()
     
     # Логирование
     audit_service = AuditService(db)
@@ -219,6 +313,7 @@ async def admin_update_challenge(
     
     db.commit()
     db.refresh(challenge)
+    challenge_catalog.invalidate()
     
     # Логирование
     audit_service = AuditService(db)
@@ -251,6 +346,7 @@ async def admin_toggle_challenge(
     
     challenge.is_active = not challenge.is_active
     db.commit()
+    challenge_catalog.invalidate()
     
     # Логирование
     audit_service = AuditService(db)
@@ -1,11 +1,16 @@
 # backend/app/api/analytics.py
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.response_cache import response_cache
 from app.core.auth import get_current_user
 from app.models.user import User
 from app.services.analytics_service import AnalyticsService
+from app.services.score_timeline import ScoreTimelineService
 
 router = APIRouter()
 
@@ -28,13 +33,37 @@ async def get_team_insights(
 
 @router.get("/global")
 async def get_global_analytics(
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """Получение глобальной статистики платформы"""
     analytics_service = AnalyticsService(db)
-    stats = await analytics_service.get_global_statistics()
     
-    return stats
+    return await response_cache.respond(
+        request,
+        "global_analytics",
+        analytics_service.get_global_statistics,
+        ttl=settings.PUBLIC_STATS_CACHE_TTL
+    )
+
+@router.get("/scoreboard/timeline")
+async def get_scoreboard_timeline(
+    top: int = Query(10, ge=1, le=50),
+    resolution: int = Query(100, ge=2, le=1000),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """Графики счета команд из топа во времени"""
+    timeline_service = ScoreTimelineService(db)
+    
+    try:
+        return timeline_service.get_top_timelines(top=top, resolution=resolution, start=start, end=end)
+    except Exception as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Ряды счета недоступны: {e}"
+        )
 
 @router.get("/team/activity")
 async def get_team_activity(
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import List
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.response_cache import response_cache
 from app.core.auth import get_current_user
 from app.schemas.challenge import ChallengeResponse, ChallengeDetail, ChallengeCreate, ChallengeUpdate
 from app.schemas.user import UserResponse  # ДОБАВЬТЕ ЭТОТ ИМПОРТ
 from app.models.challenge import Challenge
 from app.models.submission import Submission
+from app.services.challenge_catalog import challenge_catalog
+from app.services.cache_service import CATALOG_TAG
+from app.services.team_solves import TeamSolvesService
 
 router = APIRouter()
 
@@ -19,43 +25,32 @@ async def get_challenges(
     db: Session = Depends(get_db)
 ):
     """Получение списка заданий"""
-    query = db.query(Challenge).filter(Challenge.is_visible == True)
-    
-    if category:
-        query = query.filter(Challenge.category == category)
-    
-    if difficulty:
-        query = query.filter(Challenge.difficulty == difficulty)
-    
-    challenges = query.order_by(Challenge.points.asc()).all()
-    
-    # Добавляем информацию о решении для текущего пользователя
-    response_challenges = []
-    for challenge in challenges:
-        challenge_data = ChallengeResponse.from_orm(challenge)
-        
-        # Проверяем, решил ли пользователь это задание
-        if current_user.team_id:  # ИСПРАВЛЕНО: current_user.team -> current_user.team_id
-            solved = db.query(Submission).filter(
-                Submission.team_id == current_user.team_id,
-                Submission.challenge_id == challenge.id,
-                Submission.status == 'accepted'
-            ).first()
-            challenge_data.is_solved = solved is not None
-        else:
-            challenge_data.is_solved = False
-        
-        response_challenges.append(challenge_data)
-    
-    return response_challenges
+    # Каталог сериализуется один раз на версию, решения команды берутся из кэша:
+    # на запрос не больше одного запроса к БД вместо одного на каждое задание
+    solved = TeamSolvesService(db).get_solved(current_user.team_id)
+    
+    return JSONResponse(content=challenge_catalog.list_challenges(
+        db,
+        solved,
+        category=category,
+        difficulty=difficulty
+    ))
 
 @router.get("/categories")
 async def get_categories(
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """Получение списка категорий заданий"""
-    categories = db.query(Challenge.category).distinct().all()
-    return [category[0] for category in categories]
+    # Версия каталога в ключе: правка заданий видна сразу, а не по истечении TTL
+    return await response_cache.respond(
+        request,
+        "challenge_categories",
+        lambda: challenge_catalog.get_categories(db),
+        ttl=settings.PUBLIC_CACHE_TTL,
+        version=challenge_catalog.cache_service.get_catalog_version(),
+        tags=(CATALOG_TAG,)
+    )
 
 @router.get("/{challenge_id}", response_model=ChallengeDetail)
 async def get_challenge(
@@ -64,7 +59,7 @@ async def get_challenge(
     db: Session = Depends(get_db)
 ):
     """Получение детальной информации о задании"""
-    challenge = db.query(Challenge).filter(Challenge.id == challenge_id).first()
+    challenge = challenge_catalog.get_challenge(db, challenge_id)
     
     if not challenge:
         raise HTTPException(
@@ -72,55 +67,49 @@ async def get_challenge(
             detail="Задание не найдено"
         )
     
-    if not challenge.is_visible:
+    if not challenge["is_visible"]:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Задание не доступно"
         )
     
-    # Проверяем, решил ли пользователь это задание
-    is_solved = False
-    if current_user.team_id:  # ИСПРАВЛЕНО: current_user.team -> current_user.team_id
-        solved = db.query(Submission).filter(
-            Submission.team_id == current_user.team_id,
-            Submission.challenge_id == challenge.id,
-            Submission.status == 'accepted'
-        ).first()
-        is_solved = solved is not None
-    
-    challenge_data = ChallengeDetail.from_orm(challenge)
-    challenge_data.is_solved = is_solved
+    # Проверяем, решила ли команда это задание
+    challenge["is_solved"] = challenge_id in TeamSolvesService(db).get_solved(current_user.team_id)
     
-    return challenge_data
+    return JSONResponse(content=challenge)
 
 @router.get("/{challenge_id}/solves")
 async def get_challenge_solves(
+    request: Request,
     challenge_id: int,
-    limit: int = 10,
+    limit: int = Query(10, ge=1, le=100),
     db: Session = Depends(get_db)
 ):
     """Получение информации о решениях задания"""
     from app.models.submission import Submission
     from app.models.team import Team
     
-    solves = db.query(Submission).filter(
-        Submission.challenge_id == challenge_id,
-        Submission.status == 'accepted'
-    ).order_by(Submission.submitted_at.asc()).limit(limit).all()
-    
-    result = []
-    for solve in solves:
-        result.append({
-            "team_name": solve.team.name,
-            "solved_at": solve.submitted_at,
-            "is_first_blood": solve.is_first_blood
-        })
+    def build():
+        solves = db.query(Submission).filter(
+            Submission.challenge_id == challenge_id,
+            Submission.status == 'accepted'
+        ).order_by(Submission.submitted_at.asc()).limit(limit).all()
+        
+        result = []
+        for solve in solves:
+            result.append({
+                "team_name": solve.team.name,
+                "solved_at": solve.submitted_at,
+                "is_first_blood": solve.is_first_blood
+            })
+        
+        return {
+            "challenge_id": challenge_id,
+            "solves": result,
+            "total_solves": len(result)
+        }
     
-    return {
-        "challenge_id": challenge_id,
-        "solves": result,
-        "total_solves": len(result)
-    }
+    return await response_cache.respond(request, f"challenge_solves:{challenge_id}", build, ttl=settings.PUBLIC_CACHE_TTL, params={"limit": limit})
 
 @router.post("/", response_model=ChallengeResponse)
 async def create_challenge(
@@ -139,6 +128,7 @@ async def create_challenge(
     db.add(challenge)
     db.commit()
     db.refresh(challenge)
+    challenge_catalog.invalidate()
     
     # Логирование события
     from app.services.audit_service import AuditService
@@ -180,6 +170,7 @@ async def update_challenge(
     
     db.commit()
     db.refresh(challenge)
+    challenge_catalog.invalidate()
     
     # Логирование события
     from app.services.audit_service import AuditService
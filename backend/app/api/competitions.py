@@ -0,0 +1,35 @@
+# backend/app/api/competitions.py
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.models.competition import Competition
+from app.services.competition_service import CompetitionService
+
+router = APIRouter()
+
+@router.get("/{competition_id}/leaderboard")
+async def get_competition_leaderboard(
+    competition_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """Таблица лидеров соревнования"""
+    competition = db.query(Competition).filter(Competition.id == competition_id).first()
+    if not competition:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Соревнование не найдено"
+        )
+    
+    competition_service = CompetitionService(db)
+    
+    return {
+        "competition_id": competition.id,
+        "name": competition.name,
+        "start_time": competition.start_time,
+        "end_time": competition.end_time,
+        "scoring_type": competition.scoring_type,
+        "leaderboard": competition_service.get_standings(competition_id, limit=limit, offset=skip)
+    }
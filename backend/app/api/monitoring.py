@@ -4,7 +4,9 @@ from sqlalchemy.orm import Session
 import psutil
 import docker
 from datetime import datetime
+import os
 
+from app.core.cache import cache_manager
 from app.core.database import get_db
 from app.core.auth import get_current_admin
 from app.schemas.user import UserResponse 
@@ -161,6 +163,32 @@ async def get_system_metrics(
         "top_processes": processes[:10]  # Топ 10 процессов по CPU
     }
 
+@router.get("/cache")
+async def get_cache_stats(
+    current_user: UserResponse = Depends(get_current_admin)
+):
+    """Попадания, промахи и вытеснения кэша по пространствам ключей (для текущего воркера)"""
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "pid": os.getpid(),
+        **cache_manager.get_stats()
+    }
+
+@router.get("/websocket")
+async def get_websocket_stats(
+    top: int = 20,
+    current_user: UserResponse = Depends(get_current_admin)
+):
+    """Очереди отправки WebSocket: самые отстающие соединения (для текущего процесса)"""
+    from app.api.websocket import manager as websocket_manager
+    
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "pid": os.getpid(),
+        "connections": len(websocket_manager.active_connections),
+        **websocket_manager.get_send_queue_stats(top=top)
+    }
+
 @router.get("/database")
 async def get_database_stats(
     current_user: UserResponse = Depends(get_current_admin),
@@ -1,20 +1,27 @@
 # backend/app/api/submissions.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+import math
 from typing import List
 from datetime import datetime, timedelta
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.response_cache import response_cache
 from app.core.auth import get_current_user
 from app.schemas.submission import FlagSubmit, SubmissionResponse, SubmissionStats
 from app.schemas.user import UserResponse
 from app.models.submission import Submission
-from app.models.challenge import Challenge
 from app.services.flag_service import FlagService
+from app.services.challenge_index import challenge_index
 from app.services.scoring_service import ScoringService
-from app.services.audit_service import AuditService
-from app.services.telegram_service import TelegramService
-from app.api.websocket import manager as websocket_manager
+from app.services.team_solves import TeamSolvesService
+from app.services.flag_throttle import flag_throttle
+from app.services.submission_ingest import submission_ingest
+from app.services.outbox_service import OutboxService, build_flag_submission_events, outbox_dispatcher
+from app.services.dynamic_scoring import dynamic_scoring
 
 router = APIRouter()
 
@@ -31,131 +38,159 @@ async def submit_flag(
             detail="Для отправки флагов необходимо состоять в команде"
         )
     
-    # Проверка rate limiting
-    from app.core.rate_limiting import rate_limiter
-    if await rate_limiter.is_rate_limited(
-        identifier=str(current_user.id),
-        limit=30,  # 30 попыток в минуту
-        window=60,
-        action="flag_submission"
-    ):
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Слишком много попыток. Попробуйте позже."
-        )
+    # Лимит попыток (30 в минуту) проверяет RateLimitMiddleware до открытия сессии БД
     
-    # Проверка существования задания
-    challenge = db.query(Challenge).filter(
-        Challenge.id == flag_data.challenge_id,
-        Challenge.is_active == True
-    ).first()
+    # Проверка существования задания по индексу (без запроса к БД)
+    indexed_challenge = challenge_index.get(db, flag_data.challenge_id)
     
-    if not challenge:
+    if not indexed_challenge or not indexed_challenge.is_active:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Задание не найдено или неактивно"
         )
     
-    # Проверка, не решено ли уже задание командой
-    existing_solve = db.query(Submission).filter(
-        Submission.team_id == current_user.team_id,
-        Submission.challenge_id == flag_data.challenge_id,
-        Submission.status == 'accepted'
-    ).first()
-    
-    if existing_solve:
+    # Пауза после серии неверных флагов - до проверки флага, чтобы перебор не шел дальше
+    retry_after = flag_throttle.retry_after(current_user.team_id, flag_data.challenge_id)
+    if retry_after > 0:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Ваша команда уже решила это задание"
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Слишком много неверных флагов. Попробуйте позже.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
         )
     
     flag_service = FlagService(db)
     scoring_service = ScoringService(db)
-    audit_service = AuditService(db)
-    telegram_service = TelegramService()
     
     # Проверка флага
-    is_correct = flag_service.verify_flag(flag_data.challenge_id, flag_data.flag)
-    
-    # Создание записи об отправке
-    submission = Submission(
-        team_id=current_user.team_id,
-        user_id=current_user.id,
-        challenge_id=flag_data.challenge_id,
-        flag=flag_data.flag,
-        status='accepted' if is_correct else 'rejected',
-        points_awarded=challenge.points if is_correct else 0
+    is_correct = flag_service.verify_flag(
+        flag_data.challenge_id,
+        flag_data.flag,
+        challenge=indexed_challenge
     )
     
-    db.add(submission)
-    db.flush()  # Получаем ID до коммита
+    # Повторное решение отсекается по битовой карте команды без обращения к отправкам;
+    # гонку двух одновременных решений по-прежнему закрывает уникальный индекс
+    if is_correct and flag_data.challenge_id in TeamSolvesService(db).get_solved(current_user.team_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Ваша команда уже решила это задание"
+        )
     
     if is_correct:
-        # Начисление очков и проверка first blood
-        is_first_blood = scoring_service.award_points(
-            current_user.team_id,
-            flag_data.challenge_id,
-            current_user.id
+        flag_throttle.reset(current_user.team_id, flag_data.challenge_id)
+    else:
+        # Неверный флаг, который команда уже отправляла, не записывается заново:
+        # ответ строится по прежней отправке, повтор учитывается в ее attempts
+        repeated_submission_id, _ = flag_throttle.record_wrong(
+            current_user.team_id, flag_data.challenge_id, flag_data.flag
         )
-        
-        submission.is_first_blood = is_first_blood
-        
-        # Обновление статистики задания
-        challenge.solved_count += 1
-        if is_first_blood:
-            challenge.first_blood_user_id = current_user.id
-        
-        # Отправка уведомлений через WebSocket
-        await websocket_manager.broadcast_to_team(current_user.team_id, {
-            "type": "team_flag_submitted",
-            "user_id": current_user.id,
-            "username": current_user.username,
-            "challenge_id": flag_data.challenge_id,
-            "challenge_title": challenge.title,
-            "points": challenge.points,
-            "is_first_blood": is_first_blood,
-            "timestamp": datetime.utcnow().isoformat()
-        })
-        
-        # Отправка уведомления в Telegram о first blood
-        if is_first_blood:
-            await telegram_service.send_first_blood_notification(
-                current_user.username,
-                challenge.title,
-                current_user.team.name
+        if repeated_submission_id is not None:
+            return SubmissionResponse(
+                id=repeated_submission_id,
+                challenge_title=indexed_challenge.title,
+                flag=flag_data.flag[:10] + '...' if len(flag_data.flag) > 10 else flag_data.flag,
+                status='rejected',
+                points_awarded=0,
+                submitted_at=datetime.utcnow(),
+                is_first_blood=False
             )
     
-    db.commit()
-    db.refresh(submission)
+    # Асинхронный режим: отправка записывается фоновым потребителем пачками,
+    # окончательный результат приходит пользователю через WebSocket
+    if submission_ingest.enabled:
+        entry = await submission_ingest.enqueue(
+            team_id=current_user.team_id,
+            user_id=current_user.id,
+            username=current_user.username,
+            challenge_id=flag_data.challenge_id,
+            challenge_title=indexed_challenge.title,
+            team_name=current_user.team.name,
+            flag=flag_data.flag,
+            points=indexed_challenge.points,
+            is_correct=is_correct
+        )
+        if entry is not None:
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={
+                    "ingest_id": entry["ingest_id"],
+                    "challenge_id": flag_data.challenge_id,
+                    "challenge_title": indexed_challenge.title,
+                    "status": "pending" if is_correct else "rejected",
+                    "submitted_at": entry["submitted_at"]
+                }
+            )
     
-    # Логирование события
-    await audit_service.log_flag_submission(
-        user_id=current_user.id,
-        challenge_id=flag_data.challenge_id,
-        status='accepted' if is_correct else 'rejected',
-        details={
-            "submission_id": submission.id,
-            "is_first_blood": submission.is_first_blood if is_correct else False
-        }
-    )
+    submitted_at = datetime.utcnow()
     
-    # Отправка уведомления в Telegram
-    await telegram_service.send_flag_submission_notification(
-        current_user.username,
-        challenge.title,
-        'accepted' if is_correct else 'rejected'
-    )
+    if is_correct:
+        # Атомарная запись решения: очки, счетчик решений и First Blood
+        solve = scoring_service.record_solve(
+            team_id=current_user.team_id,
+            user_id=current_user.id,
+            challenge_id=flag_data.challenge_id,
+            flag=flag_data.flag,
+            points=indexed_challenge.points,
+            submitted_at=submitted_at
+        )
+        
+        if solve is None:
+            # Транзакция не держится открытой до закрытия сессии
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Ваша команда уже решила это задание"
+            )
+        
+        submission = solve["submission"]
+    else:
+        submission = Submission(
+            team_id=current_user.team_id,
+            user_id=current_user.id,
+            challenge_id=flag_data.challenge_id,
+            flag=flag_data.flag,
+            status='rejected',
+            points_awarded=0,
+            submitted_at=submitted_at
+        )
+        db.add(submission)
+        db.flush()  # Получаем ID до коммита
+        flag_throttle.remember_wrong(
+            db, current_user.team_id, flag_data.challenge_id, flag_data.flag, submission.id
+        )
     
-    # Формирование ответа
-    return SubmissionResponse(
+    response = SubmissionResponse(
         id=submission.id,
-        challenge_title=challenge.title,
+        challenge_title=indexed_challenge.title,
         flag=submission.flag[:10] + '...' if len(submission.flag) > 10 else submission.flag,
         status=submission.status,
         points_awarded=submission.points_awarded,
-        submitted_at=submission.submitted_at,
+        submitted_at=submitted_at,
         is_first_blood=submission.is_first_blood
     )
+    
+    # Аудит, Telegram, WebSocket и хуки плагинов пишутся в outbox той же транзакцией
+    # и доставляются фоновым диспетчером - ответ ждет только запись в БД
+    OutboxService(db).add_events(build_flag_submission_events(
+        user_id=current_user.id,
+        username=current_user.username,
+        team_id=current_user.team_id,
+        team_name=current_user.team.name,
+        challenge_id=flag_data.challenge_id,
+        challenge_title=indexed_challenge.title,
+        submission_id=submission.id,
+        status=submission.status,
+        points=submission.points_awarded,
+        is_first_blood=submission.is_first_blood,
+        submitted_at=submitted_at
+    ))
+    
+    db.commit()
+    outbox_dispatcher.notify()
+    if is_correct:
+        dynamic_scoring.notify()
+    
+    return response
 
 @router.get("/team", response_model=List[SubmissionResponse])
 async def get_team_submissions(
@@ -199,9 +234,10 @@ async def get_submission_stats(
             detail="Пользователь не состоит в команде"
         )
     
-    total = db.query(Submission).filter(
+    # Повторы неверного флага хранятся в attempts одной строки
+    total = db.query(func.coalesce(func.sum(Submission.attempts), 0)).filter(
         Submission.team_id == current_user.team_id
-    ).count()
+    ).scalar()
     
     accepted = db.query(Submission).filter(
         Submission.team_id == current_user.team_id,
@@ -221,30 +257,34 @@ async def get_submission_stats(
 
 @router.get("/recent")
 async def get_recent_submissions(
-    limit: int = 10,
+    request: Request,
+    limit: int = Query(10, ge=1, le=100),
     db: Session = Depends(get_db)
 ):
     """Получение последних отправок (публичный endpoint)"""
     from app.models.team import Team
     from app.models.user import User
     
-    submissions = db.query(Submission).join(Team).join(User).filter(
-        Submission.status == 'accepted'
-    ).order_by(Submission.submitted_at.desc()).limit(limit).all()
+    def build():
+        submissions = db.query(Submission).join(Team).join(User).filter(
+            Submission.status == 'accepted'
+        ).order_by(Submission.submitted_at.desc()).limit(limit).all()
+        
+        result = []
+        for submission in submissions:
+            result.append({
+                "id": submission.id,
+                "team_name": submission.team.name,
+                "username": submission.user.username,
+                "challenge_title": submission.challenge.title,
+                "points": submission.points_awarded,
+                "is_first_blood": submission.is_first_blood,
+                "submitted_at": submission.submitted_at
+            })
+        
+        return {
+            "submissions": result,
+            "total": len(result)
+        }
     
-    result = []
-    for submission in submissions:
-        result.append({
-            "id": submission.id,
-            "team_name": submission.team.name,
-            "username": submission.user.username,
-            "challenge_title": submission.challenge.title,
-            "points": submission.points_awarded,
-            "is_first_blood": submission.is_first_blood,
-            "submitted_at": submission.submitted_at
-        })
-    
-    return {
-        "submissions": result,
-        "total": len(result)
-    }
+    return await response_cache.respond(request, "recent_submissions", build, ttl=settings.PUBLIC_CACHE_TTL, params={"limit": limit})
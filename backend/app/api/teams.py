@@ -1,9 +1,11 @@
 # backend/app/api/teams.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 from typing import List
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.response_cache import response_cache
 from app.core.auth import get_current_user
 from app.schemas.team import TeamResponse, TeamUpdate, TeamInvite
 from app.schemas.user import UserResponse  # ДОБАВЬТЕ ЭТУ СТРОКУ
@@ -12,6 +14,8 @@ from app.models.team import Team
 from app.models.user import User
 from app.services.invitation_service import InvitationService
 from app.services.audit_service import AuditService
+from app.services.leaderboard_service import LeaderboardService
+from app.services.score_counters import score_counters
 from app.tasks.email_tasks import send_invitation_email_task
 
 router = APIRouter()
@@ -46,7 +50,7 @@ async def get_my_team(
         "id": team.id,
         "name": team.name,
         "description": team.description,
-        "score": team.score,
+        "score": score_counters.team_score(team.id, team.score),
         "country": team.country,
         "website": team.website,
         "created_at": team.created_at,
@@ -225,25 +229,37 @@ async def accept_invitation(
 
 @router.get("/leaderboard")
 async def get_leaderboard(
-    skip: int = 0,
-    limit: int = 50,
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
     db: Session = Depends(get_db)
 ):
     """Получение таблицы лидеров"""
-    teams = db.query(Team).order_by(Team.score.desc()).offset(skip).limit(limit).all()
-    
-    leaderboard = []
-    for index, team in enumerate(teams, start=1):
-        leaderboard.append({
-            "position": index + skip,
-            "id": team.id,
-            "name": team.name,
-            "score": team.score,
-            "country": team.country,
-            "member_count": len(team.members)
-        })
+    leaderboard_service = LeaderboardService(db)
+    
+    return await response_cache.respond(request, "leaderboard", lambda: {
+        "leaderboard": leaderboard_service.get_top(limit=limit, offset=skip),
+        "total": leaderboard_service.get_total()
+    }, ttl=settings.PUBLIC_CACHE_TTL, params={"skip": skip, "limit": limit})
+
+@router.get("/leaderboard/me")
+async def get_my_leaderboard_position(
+    radius: int = 5,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Позиция команды текущего пользователя и соседние команды"""
+    if not current_user.team_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не состоит в команде"
+        )
+    
+    leaderboard_service = LeaderboardService(db)
+    around = leaderboard_service.get_around(current_user.team_id, radius=min(max(radius, 0), 50))
     
     return {
-        "leaderboard": leaderboard,
-        "total": db.query(Team).count()
+        "position": around["position"],
+        "leaderboard": around["leaderboard"],
+        "total": leaderboard_service.get_total()
     }
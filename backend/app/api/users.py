@@ -9,6 +9,7 @@ from app.schemas.user import UserResponse, UserUpdate
 from app.models.user import User
 from app.services.audit_service import AuditService
 from app.services.auth_service import AuthService  # ДОБАВЬТЕ ЭТОТ ИМПОРТ
+from app.services.score_counters import score_counters
 
 router = APIRouter()
 
@@ -34,7 +35,7 @@ async def get_current_user_team(
     return {
         "id": current_user.team.id,
         "name": current_user.team.name,
-        "score": current_user.team.score,
+        "score": score_counters.team_score(current_user.team.id, current_user.team.score),
         "description": current_user.team.description,
         "country": current_user.team.country,
         "created_at": current_user.team.created_at
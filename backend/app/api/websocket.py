@@ -1,22 +1,144 @@
 # backend/app/api/websocket.py
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, Set, List, Any  # Добавьте Any здесь
+from typing import Dict, Set, List, Any, Callable, Awaitable, Optional  # Добавьте Any здесь
+import asyncio
 import json
+import time
 import uuid
 from collections import defaultdict
 
+from app.core.config import settings
+from app.core.message_bus import MessageBus, message_bus
+from app.core.metrics import ACTIVE_CONNECTIONS, WEBSOCKET_DROPPED_CONNECTIONS, WEBSOCKET_SEND_LAG
+
+# Код закрытия для клиента, который не успевает читать сообщения (Try Again Later):
+# клиент переподключается и получает актуальное состояние заново
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class ConnectionSender:
+    """
+    Очередь исходящих сообщений соединения и задача записи в сокет
+
+    Рассылка только кладет сообщение в очередь и не ждет сеть, поэтому
+    медленный клиент задерживает лишь себя. Переполнение очереди или
+    запись дольше send_timeout (ее отслеживает ConnectionManager, а не
+    таймер на каждую запись) означают, что клиент не успевает читать,
+    - соединение закрывается.
+    """
+
+    def __init__(self,
+                 websocket: WebSocket,
+                 on_failure: Callable[[str], Awaitable[None]],
+                 max_size: int = 256,
+                 send_timeout: float = 10.0):
+        self.websocket = websocket
+        self.on_failure = on_failure
+        self.send_timeout = send_timeout
+        self.queue: asyncio.Queue = asyncio.Queue(max_size)
+        self.sent = 0
+        # Начало текущей записи в сокет (None - запись не идет)
+        self.sending_since: Optional[float] = None
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._task = asyncio.create_task(self._run())
+
+    def send(self, text: str) -> bool:
+        """Постановка сообщения в очередь; False - очередь переполнена"""
+        try:
+            self.queue.put_nowait((time.monotonic(), text))
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def lag(self) -> float:
+        """Сколько ждет самое старое неотправленное сообщение, секунд"""
+        if self.queue.empty():
+            return 0.0
+        return time.monotonic() - self.queue._queue[0][0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queue.qsize(),
+            "lag": round(self.lag(), 3),
+            "last_lag": round(self.last_lag, 3),
+            "max_lag": round(self.max_lag, 3),
+            "sent": self.sent
+        }
+
+    async def _run(self):
+        while True:
+            enqueued_at, text = await self.queue.get()
+            self.sending_since = time.monotonic()
+            try:
+                await self.websocket.send_text(text)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await self.on_failure("send_error")
+                return
+
+            now = time.monotonic()
+            self.sending_since = None
+            self.sent += 1
+            self.last_lag = now - enqueued_at
+            if self.last_lag > self.max_lag:
+                self.max_lag = self.last_lag
+            WEBSOCKET_SEND_LAG.observe(self.last_lag)
+
+    def is_stuck(self, now: float) -> bool:
+        """Запись в сокет идет дольше send_timeout"""
+        return self.sending_since is not None and now - self.sending_since > self.send_timeout
+
+    def stop(self, close_code: Optional[int] = None):
+        """Остановка записи; с close_code сокет закрывается в фоне, не задерживая вызывающего"""
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+        if close_code is not None:
+            asyncio.create_task(self._close(close_code))
+
+    async def _close(self, close_code: int):
+        try:
+            await asyncio.wait_for(self.websocket.close(code=close_code), self.send_timeout)
+        except Exception:
+            pass
+
 class ConnectionManager:
-    def __init__(self):
+    """
+    WebSocket-соединения процесса
+
+    Сообщения пользователю, команде и всем публикуются в шину сообщений:
+    каждый процесс (API, воркеры uvicorn, отдельный сервер WebSocket)
+    доставляет их только своим соединениям, поэтому получатель может быть
+    подключен к любому из них.
+    """
+
+    def __init__(self, bus: MessageBus = message_bus):
         self.active_connections: Dict[str, WebSocket] = {}
         self.user_connections: Dict[int, Set[str]] = defaultdict(set)
         self.team_connections: Dict[int, Set[str]] = defaultdict(set)
+        self.channel_connections: Dict[str, Set[str]] = defaultdict(set)
         self.connection_info: Dict[str, Dict] = {}
+        self.senders: Dict[str, ConnectionSender] = {}
+        self.send_queue_size = settings.WEBSOCKET_SEND_QUEUE_SIZE
+        self.send_timeout = settings.WEBSOCKET_SEND_TIMEOUT
+        self._watchdog: Optional[asyncio.Task] = None
+        self.bus = bus
+        bus.subscribe(self._on_bus_message)
 
     async def connect(self, websocket: WebSocket, user_id: int, team_id: int, username: str):
         await websocket.accept()
         connection_id = str(uuid.uuid4())
         
         self.active_connections[connection_id] = websocket
+        self.senders[connection_id] = ConnectionSender(
+            websocket,
+            on_failure=lambda reason: self._drop(connection_id, reason),
+            max_size=self.send_queue_size,
+            send_timeout=self.send_timeout
+        )
+        if self._watchdog is None or self._watchdog.done():
+            self._watchdog = asyncio.create_task(self._watch_senders())
         self.user_connections[user_id].add(connection_id)
         self.team_connections[team_id].add(connection_id)
         self.connection_info[connection_id] = {
@@ -24,6 +146,7 @@ class ConnectionManager:
             "team_id": team_id,
             "username": username
         }
+        ACTIVE_CONNECTIONS.set(len(self.active_connections))
         
         # Уведомляем команду о новом подключении
         await self.broadcast_to_team(
@@ -38,8 +161,9 @@ class ConnectionManager:
         )
         
         print(f"🔗 WebSocket connected: {username} (team {team_id})")
+        return connection_id
 
-    async def disconnect(self, connection_id: str):
+    async def disconnect(self, connection_id: str, close_code: Optional[int] = None):
         if connection_id in self.connection_info:
             info = self.connection_info[connection_id]
             user_id = info["user_id"]
@@ -49,8 +173,12 @@ class ConnectionManager:
             # Удаляем соединение из всех коллекций
             self.user_connections[user_id].discard(connection_id)
             self.team_connections[team_id].discard(connection_id)
+            for channel in info.get("channels", ()):
+                self.channel_connections[channel].discard(connection_id)
             del self.connection_info[connection_id]
             del self.active_connections[connection_id]
+            self.senders.pop(connection_id).stop(close_code)
+            ACTIVE_CONNECTIONS.set(len(self.active_connections))
             
             # Уведомляем команду об отключении
             await self.broadcast_to_team(
@@ -66,48 +194,112 @@ class ConnectionManager:
             
             print(f"🔌 WebSocket disconnected: {username}")
 
+    async def disconnect_all(self):
+        """Закрытие всех соединений при остановке приложения"""
+        for sender in self.senders.values():
+            sender.stop()
+        self.senders.clear()
+        for connection_id, websocket in list(self.active_connections.items()):
+            try:
+                await websocket.close(code=1001)
+            except Exception:
+                pass
+        self.active_connections.clear()
+        self.user_connections.clear()
+        self.team_connections.clear()
+        self.channel_connections.clear()
+        self.connection_info.clear()
+        ACTIVE_CONNECTIONS.set(0)
+
     async def send_personal_message(self, user_id: int, message: dict):
         """Отправка сообщения конкретному пользователю"""
-        if user_id in self.user_connections:
-            disconnected = set()
-            for connection_id in self.user_connections[user_id]:
-                if connection_id in self.active_connections:
-                    try:
-                        await self.active_connections[connection_id].send_json(message)
-                    except:
-                        disconnected.add(connection_id)
-            
-            # Очищаем отключенные соединения
-            for connection_id in disconnected:
-                await self.disconnect(connection_id)
+        await self.bus.publish("user", {"user_id": user_id, "message": message})
 
     async def broadcast_to_team(self, team_id: int, message: dict):
         """Трансляция сообщения всей команде"""
-        if team_id in self.team_connections:
-            disconnected = set()
-            for connection_id in self.team_connections[team_id]:
-                if connection_id in self.active_connections:
-                    try:
-                        await self.active_connections[connection_id].send_json(message)
-                    except:
-                        disconnected.add(connection_id)
-            
-            # Очищаем отключенные соединения
-            for connection_id in disconnected:
-                await self.disconnect(connection_id)
+        await self.bus.publish("team", {"team_id": team_id, "message": message})
 
     async def broadcast_to_all(self, message: dict):
         """Трансляция сообщения всем подключенным клиентам"""
-        disconnected = set()
-        for connection_id, websocket in self.active_connections.items():
-            try:
-                await websocket.send_json(message)
-            except:
-                disconnected.add(connection_id)
+        await self.bus.publish("all", {"message": message})
+
+    async def _on_bus_message(self, topic: str, data: Dict[str, Any]):
+        """Доставка сообщения шины соединениям этого процесса"""
+        if topic == "user":
+            connection_ids = self.user_connections.get(data["user_id"], ())
+        elif topic == "team":
+            connection_ids = self.team_connections.get(data["team_id"], ())
+        elif topic == "all":
+            connection_ids = self.active_connections.keys()
+        else:
+            return
+        await self._send_local(connection_ids, data["message"])
+
+    async def _send_local(self, connection_ids, message: dict):
+        if not connection_ids:
+            return
+        # Сериализуем один раз для всех получателей, в сеть пишут задачи соединений
+        text = json.dumps(message)
+        overflowed = [
+            connection_id
+            for connection_id in list(connection_ids)
+            if connection_id in self.senders and not self.senders[connection_id].send(text)
+        ]
         
-        # Очищаем отключенные соединения
-        for connection_id in disconnected:
-            await self.disconnect(connection_id)
+        # Клиенты с переполненной очередью не успевают читать - отключаем
+        for connection_id in overflowed:
+            await self._drop(connection_id, "queue_full")
+
+    def send_to_connection(self, connection_id: str, message: dict):
+        """Ответ одному соединению через его очередь (порядок с рассылками сохраняется)"""
+        sender = self.senders.get(connection_id)
+        if sender is not None and not sender.send(json.dumps(message)):
+            asyncio.create_task(self._drop(connection_id, "queue_full"))
+
+    async def _watch_senders(self):
+        """Отключение соединений, запись в которые зависла дольше send_timeout"""
+        while self.senders:
+            await asyncio.sleep(min(1.0, self.send_timeout / 2))
+            now = time.monotonic()
+            stuck = [
+                connection_id
+                for connection_id, sender in list(self.senders.items())
+                if sender.is_stuck(now)
+            ]
+            for connection_id in stuck:
+                await self._drop(connection_id, "send_timeout")
+
+    async def _drop(self, connection_id: str, reason: str):
+        """Отключение соединения, которое не успевает получать сообщения"""
+        if connection_id in self.connection_info:
+            WEBSOCKET_DROPPED_CONNECTIONS.labels(reason=reason).inc()
+            print(f"⚠️ WebSocket {connection_id} отключен: {reason}")
+            await self.disconnect(connection_id, close_code=SLOW_CONSUMER_CLOSE_CODE)
+
+    def subscribe(self, connection_id: str, channel: str):
+        """Подписка соединения на канал"""
+        if connection_id in self.connection_info:
+            self.channel_connections[channel].add(connection_id)
+            self.connection_info[connection_id].setdefault("channels", set()).add(channel)
+
+    def unsubscribe(self, connection_id: str, channel: str):
+        """Отписка соединения от канала"""
+        self.channel_connections[channel].discard(connection_id)
+        if connection_id in self.connection_info:
+            self.connection_info[connection_id].get("channels", set()).discard(channel)
+
+    def channel_size(self, channel: str) -> int:
+        """Количество подписчиков канала"""
+        return len(self.channel_connections.get(channel, ()))
+
+    async def broadcast_to_channel(self, channel: str, message: dict):
+        """
+        Трансляция сообщения подписчикам канала этого процесса
+
+        Не идет через шину: изменения таблицы лидеров каждый процесс считает
+        сам (ScoreboardPublisher), со своей нумерацией для догоняющей синхронизации.
+        """
+        await self._send_local(self.channel_connections.get(channel, ()), message)
 
     def get_connection_stats(self) -> Dict[str, Any]:
         """Статистика подключений"""
@@ -115,10 +307,31 @@ class ConnectionManager:
             "total_connections": len(self.active_connections),
             "users_connected": len(self.user_connections),
             "teams_connected": len(self.team_connections),
+            "channel_subscribers": {
+                channel: len(connections)
+                for channel, connections in self.channel_connections.items()
+            },
             "connections_per_team": {
                 team_id: len(connections) 
                 for team_id, connections in self.team_connections.items()
-            }
+            },
+            "send_queues": self.get_send_queue_stats()
+        }
+
+    def get_send_queue_stats(self, top: int = 10) -> Dict[str, Any]:
+        """Очереди отправки: суммарно и самые отстающие соединения"""
+        lagging = sorted(
+            ((connection_id, sender.stats()) for connection_id, sender in self.senders.items()),
+            key=lambda item: item[1]["lag"],
+            reverse=True
+        )
+        return {
+            "queued": sum(stats["queued"] for _, stats in lagging),
+            "max_lag": lagging[0][1]["lag"] if lagging else 0.0,
+            "slowest": [
+                {"connection_id": connection_id, "username": self.connection_info[connection_id]["username"], **stats}
+                for connection_id, stats in lagging[:top]
+            ]
         }
 
     def _get_timestamp(self) -> str:
@@ -141,15 +354,15 @@ async def websocket_arena(websocket: WebSocket, user_data: dict = Depends(get_cu
     team_id = user_data["team_id"]
     username = user_data["username"]
     
-    await manager.connect(websocket, user_id, team_id, username)
+    connection_id = await manager.connect(websocket, user_id, team_id, username)
+    user_data = {**user_data, "connection_id": connection_id}
     
     try:
         while True:
             data = await websocket.receive_json()
             await handle_arena_message(websocket, data, user_data)
     except WebSocketDisconnect:
-        # ConnectionManager автоматически обработает отключение
-        pass
+        await manager.disconnect(connection_id)
 
 async def handle_arena_message(websocket: WebSocket, data: dict, user_data: dict):
     """Обработка входящих WebSocket сообщений"""
@@ -159,7 +372,7 @@ async def handle_arena_message(websocket: WebSocket, data: dict, user_data: dict
     username = user_data["username"]
     
     if message_type == "ping":
-        await websocket.send_json({
+        manager.send_to_connection(user_data["connection_id"], {
             "type": "pong",
             "timestamp": manager._get_timestamp()
         })
@@ -172,6 +385,19 @@ async def handle_arena_message(websocket: WebSocket, data: dict, user_data: dict
         # Отправка статуса команды
         await send_team_status(team_id, user_id)
     
+    elif message_type == "subscribe":
+        await handle_subscribe(websocket, data, user_data)
+    
+    elif message_type == "unsubscribe":
+        manager.unsubscribe(user_data["connection_id"], data.get("channel"))
+    
+    elif message_type == "scoreboard_resync":
+        # Клиент пропустил изменения - досылаем их из буфера или снимок
+        from app.services.scoreboard_publisher import scoreboard_publisher
+        await scoreboard_publisher.ensure_loaded()
+        for message in scoreboard_publisher.messages_since(data.get("epoch"), data.get("seq")):
+            manager.send_to_connection(user_data["connection_id"], message)
+    
     elif message_type == "chat_message":
         # Чат команды
         await manager.broadcast_to_team(team_id, {
@@ -182,6 +408,24 @@ async def handle_arena_message(websocket: WebSocket, data: dict, user_data: dict
             "timestamp": manager._get_timestamp()
         })
 
+async def handle_subscribe(websocket: WebSocket, data: dict, user_data: dict):
+    """Подписка на канал трансляции"""
+    from app.services.scoreboard_publisher import scoreboard_publisher, SCOREBOARD_CHANNEL
+    
+    channel = data.get("channel")
+    if channel != SCOREBOARD_CHANNEL:
+        manager.send_to_connection(user_data["connection_id"], {
+            "type": "error",
+            "message": f"Неизвестный канал: {channel}",
+            "timestamp": manager._get_timestamp()
+        })
+        return
+    
+    # Снимок ставится в очередь соединения до подписки, поэтому приходит раньше изменений
+    await scoreboard_publisher.ensure_loaded()
+    manager.send_to_connection(user_data["connection_id"], scoreboard_publisher.snapshot())
+    manager.subscribe(user_data["connection_id"], channel)
+
 async def handle_flag_submission(data: dict, user_data: dict):
     """Обработка отправки флага через WebSocket"""
     from app.services.flag_service import FlagService
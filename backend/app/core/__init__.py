@@ -7,8 +7,12 @@ from app.core.security import (
 )
 from app.core.auth import get_current_user, get_current_admin, get_current_user_ws
 from app.core.microservices import microservice_manager, BaseMicroservice
-from app.core.cache import cache_manager, cached, invalidate_cache
+from app.core.cache import cache_manager, async_cache_manager, cached, invalidate_cache
+from app.core.response_cache import response_cache
+from app.core.redis_lock import RedisLock
 from app.core.rate_limiting import rate_limiter, rate_limit
+from app.core.rate_limit_middleware import RateLimitMiddleware, RATE_LIMIT_RULES
+from app.core.message_bus import message_bus, MessageBus
 from app.core.metrics import (
     REQUEST_COUNT, REQUEST_DURATION, ACTIVE_USERS,
     ACTIVE_CONNECTIONS, SUBMISSION_COUNT, metrics_endpoint
@@ -20,8 +24,10 @@ __all__ = [
     'verify_password', 'get_password_hash', 'create_access_token', 'validate_flag_format',
     'get_current_user', 'get_current_admin', 'get_current_user_ws',
     'microservice_manager', 'BaseMicroservice',
-    'cache_manager', 'cached', 'invalidate_cache',
-    'rate_limiter', 'rate_limit',
+    'cache_manager', 'async_cache_manager', 'cached', 'invalidate_cache', 'response_cache',
+    'RedisLock',
+    'rate_limiter', 'rate_limit', 'RateLimitMiddleware', 'RATE_LIMIT_RULES',
+    'message_bus', 'MessageBus',
     'REQUEST_COUNT', 'REQUEST_DURATION', 'ACTIVE_USERS',
     'ACTIVE_CONNECTIONS', 'SUBMISSION_COUNT', 'metrics_endpoint'
 ]
\ No newline at end of file
@@ -1,4 +1,5 @@
 # backend/app/core/auth.py (дополнение)
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
@@ -11,6 +12,14 @@ from app.models.user import User
 
 security = HTTPBearer()
 
+def verify_token(token: str) -> Optional[str]:
+    """Проверка JWT токена, возвращает имя пользователя или None"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub")
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
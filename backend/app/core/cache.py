@@ -1,41 +1,210 @@
 # backend/app/core/cache.py
+import asyncio
 import redis
+import redis.asyncio
 import json
-import pickle
-from typing import Any, Optional, Union
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 from functools import wraps
 from app.core.config import settings
+from app.core.metrics import CACHE_EVICTIONS, CACHE_REQUESTS
+from app.core.serialization import CacheSerializer, build_serializer
+
+# Префиксы сообщений канала инвалидации: ключ или шаблон
+INVALIDATE_KEY = "k:"
+INVALIDATE_PATTERN = "p:"
+
+# Множество ключей кэша, помеченных тегом
+TAG_KEY = "cache_tag:{tag}"
+
+# Ключей на один SCAN и на одну команду UNLINK
+SCAN_BATCH_SIZE = 500
+
+
+def _tag_commands(pipe, key: str, tags: Iterable[str], expire: int):
+    """
+    Привязка ключа к тегам в том же pipeline, что и запись значения
+
+    Множество тега живет не меньше самого долгого из своих ключей:
+    NX задает время жизни новому множеству, GT только продлевает его.
+    """
+    for tag in tags:
+        tag_key = TAG_KEY.format(tag=tag)
+        pipe.sadd(tag_key, key)
+        pipe.expire(tag_key, expire, nx=True)
+        pipe.expire(tag_key, expire, gt=True)
+
+
+def _batches(keys: List[str], size: int = SCAN_BATCH_SIZE):
+    for start in range(0, len(keys), size):
+        yield keys[start:start + size]
+
+
+class LocalCache:
+    """
+    Ограниченный LRU-кэш процесса с временем жизни записей
+
+    Значения хранятся без копирования - объект из кэша разделяют все
+    вызывающие, поэтому изменять его нельзя (тот же контракт, что у
+    закэшированных payload каталога).
+    """
+
+    def __init__(self, max_items: int, on_evict=None):
+        self.max_items = max_items
+        self.on_evict = on_evict
+        self._items: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """(найдено, значение)"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return False, None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                expired = True
+            else:
+                self._items.move_to_end(key)
+                return True, value
+        if expired and self.on_evict:
+            self.on_evict(key, "expired")
+        return False, None
+
+    def set(self, key: str, value: Any, ttl: float):
+        evicted = []
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                evicted.append(self._items.popitem(last=False)[0])
+        if self.on_evict:
+            for evicted_key in evicted:
+                self.on_evict(evicted_key, "capacity")
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            removed = self._items.pop(key, None) is not None
+        if removed and self.on_evict:
+            self.on_evict(key, "invalidated")
+        return removed
+
+    def delete_pattern(self, pattern: str) -> int:
+        """Удаление по glob-шаблону в стиле Redis KEYS/SCAN"""
+        with self._lock:
+            keys = [key for key in self._items if fnmatchcase(key, pattern)]
+            for key in keys:
+                del self._items[key]
+        if self.on_evict:
+            for key in keys:
+                self.on_evict(key, "invalidated")
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
 
 class CacheManager:
-    """Менеджер кэширования на основе Redis"""
+    """
+    Менеджер кэширования на основе Redis
+
+    Перед Redis стоит локальный LRU-кэш процесса для пространств ключей
+    из CACHE_LOCAL_NAMESPACES (пространство - часть ключа до первого
+    двоеточия). Локальная копия живет не дольше CACHE_LOCAL_TTL и не
+    дольше ключа в Redis. set/delete/clear_pattern публикуют ключ или
+    шаблон в канал инвалидации, и каждый воркер удаляет свои копии.
+    Пока подписка на канал не работает, локальный уровень выключен -
+    иначе воркер мог бы пропустить инвалидацию и отдавать старые данные.
     
-    def __init__(self):
+    Значения сериализуются CacheSerializer (см. app.core.serialization):
+    формат и сжатие определяются по тегу, старые pickle-значения читаются.
+    """
+    
+    def __init__(self, serializer: Optional[CacheSerializer] = None):
         self.redis_client = redis.Redis.from_url(settings.REDIS_URL)
+        self.serializer = serializer or build_serializer(
+            settings.CACHE_SERIALIZER,
+            settings.CACHE_COMPRESSION,
+            settings.CACHE_COMPRESS_THRESHOLD
+        )
+        self.local_ttl = settings.CACHE_LOCAL_TTL
+        self.local_namespaces = {
+            namespace.strip()
+            for namespace in settings.CACHE_LOCAL_NAMESPACES.split(",")
+            if namespace.strip()
+        }
+        self.channel = settings.CACHE_INVALIDATION_CHANNEL
+        self.local = LocalCache(settings.CACHE_LOCAL_MAX_ITEMS, on_evict=self._on_local_evict)
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._stats_lock = threading.Lock()
+        # Номер инвалидации: чтение, во время которого пришла инвалидация, не кладет значение в локальный кэш
+        self._generation = 0
+        self._subscriber = None
+        self._subscribe_lock = threading.Lock()
+        self._subscribe_retry_at = 0.0
     
     def get(self, key: str) -> Optional[Any]:
         """Получение значения из кэша"""
+        namespace = self._namespace(key)
+        local = self._local_enabled(namespace)
+        if local:
+            found, value = self.local.get(key)
+            if found:
+                self._count(namespace, "local_hits")
+                return value
+            generation = self._generation
+        
         try:
-            value = self.redis_client.get(key)
+            if local:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.get(key)
+                pipe.pttl(key)
+                value, pttl = pipe.execute()
+            else:
+                value = self.redis_client.get(key)
             if value:
-                return pickle.loads(value)
+                result = self.serializer.loads(value)
+                self._count(namespace, "redis_hits")
+                if local:
+                    self._store_local(key, result, pttl, generation)
+                return result
+            self._count(namespace, "misses")
             return None
         except:
             return None
     
-    def set(self, key: str, value: Any, expire: int = 3600) -> bool:
-        """Установка значения в кэш"""
+    def set(self, key: str, value: Any, expire: int = 3600, tags: Iterable[str] = ()) -> bool:
+        """Установка значения в кэш (с тегами для invalidate_tag)"""
         try:
-            serialized_value = pickle.dumps(value)
-            return self.redis_client.setex(key, expire, serialized_value)
+            serialized_value = self.serializer.dumps(value)
+            if tags:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.setex(key, expire, serialized_value)
+                _tag_commands(pipe, key, tags, expire)
+                result = pipe.execute()[0]
+            else:
+                result = self.redis_client.setex(key, expire, serialized_value)
         except:
             return False
+        self._invalidate_local(key)
+        return result
     
     def delete(self, key: str) -> bool:
         """Удаление значения из кэша"""
         try:
-            return bool(self.redis_client.delete(key))
+            result = bool(self.redis_client.delete(key))
         except:
             return False
+        self._invalidate_local(key)
+        return result
     
     def exists(self, key: str) -> bool:
         """Проверка существования ключа"""
@@ -44,26 +213,410 @@ class CacheManager:
         except:
             return False
     
+    def incr(self, key: str, amount: int = 1) -> Optional[int]:
+        """Атомарное увеличение счетчика"""
+        try:
+            return self.redis_client.incrby(key, amount)
+        except:
+            return None
+    
+    def get_counter(self, key: str) -> Optional[int]:
+        """Получение значения счетчика (None, если Redis недоступен)"""
+        try:
+            value = self.redis_client.get(key)
+            return int(value) if value is not None else 0
+        except:
+            return None
+    
+    def invalidate_tag(self, *tags: str) -> int:
+        """Удаление всех ключей, записанных с любым из тегов; возвращает число удаленных ключей"""
+        if not tags:
+            return 0
+        tag_keys = [TAG_KEY.format(tag=tag) for tag in tags]
+        try:
+            # Чтение и удаление множеств одной транзакцией: ключ, привязанный
+            # к тегу позже, попадет уже в новое множество
+            pipe = self.redis_client.pipeline(transaction=True)
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            pipe.delete(*tag_keys)
+            *members, _ = pipe.execute()
+            keys = sorted({key.decode() for keys in members for key in keys})
+            return sum(self._unlink(batch) for batch in _batches(keys))
+        except:
+            return 0
+    
     def clear_pattern(self, pattern: str) -> int:
-        """Очистка ключей по шаблону"""
+        """
+        Очистка ключей по шаблону
+        
+        Ключи перебираются SCAN порциями и удаляются UNLINK - Redis не
+        блокируется на обходе всей базы, как при KEYS. Для регулярной
+        инвалидации лучше теги: SCAN все равно проходит все ключи базы.
+        """
+        deleted = 0
+        batch = []
+        try:
+            for key in self.redis_client.scan_iter(match=pattern, count=SCAN_BATCH_SIZE):
+                batch.append(key.decode())
+                if len(batch) >= SCAN_BATCH_SIZE:
+                    deleted += self._unlink(batch, publish=False)
+                    batch = []
+            if batch:
+                deleted += self._unlink(batch, publish=False)
+        except:
+            return deleted
+        self.local.delete_pattern(pattern)
+        self._publish(INVALIDATE_PATTERN + pattern)
+        return deleted
+    
+    def _unlink(self, keys: List[str], publish: bool = True) -> int:
+        """UNLINK пачки ключей с рассылкой инвалидации тем же pipeline"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.unlink(*keys)
+        if publish:
+            for key in keys:
+                if self._namespace(key) in self.local_namespaces:
+                    pipe.publish(self.channel, INVALIDATE_KEY + key)
+        deleted = pipe.execute()[0]
+        for key in keys:
+            self._evict_local(key)
+        return deleted
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Счетчики кэша этого процесса по пространствам ключей"""
+        with self._stats_lock:
+            namespaces = {namespace: dict(counters) for namespace, counters in self._stats.items()}
+        return {
+            "local_enabled": self._subscriber is not None,
+            "local_items": len(self.local),
+            "local_max_items": self.local.max_items,
+            "namespaces": namespaces
+        }
+    
+    # --- Локальный уровень ---
+    
+    @staticmethod
+    def _namespace(key: str) -> str:
+        return key.split(":", 1)[0]
+    
+    def _local_enabled(self, namespace: str) -> bool:
+        return namespace in self.local_namespaces and self._ensure_subscribed()
+    
+    def _store_local(self, key: str, value: Any, pttl: int, generation: int):
+        """Локальная копия значения, прочитанного из Redis при номере инвалидации generation"""
+        if generation != self._generation or pttl == -2:
+            return
+        ttl = self.local_ttl if pttl < 0 else min(self.local_ttl, pttl / 1000)
+        self.local.set(key, value, ttl)
+    
+    def _evict_local(self, key: str) -> bool:
+        """Удаление локальной копии; True, если ключ нужно инвалидировать и в остальных воркерах"""
+        if self._namespace(key) not in self.local_namespaces:
+            return False
+        self.local.delete(key)
+        return True
+    
+    def _invalidate_local(self, key: str):
+        if self._evict_local(key):
+            self._publish(INVALIDATE_KEY + key)
+    
+    def _publish(self, message: str):
+        try:
+            self.redis_client.publish(self.channel, message)
+        except Exception as e:
+            print(f"⚠️ Не удалось разослать инвалидацию кэша: {e}")
+    
+    def _ensure_subscribed(self) -> bool:
+        """Ленивая подписка на канал инвалидации в фоновом потоке"""
+        if self._subscriber is not None:
+            return True
+        if time.monotonic() < self._subscribe_retry_at:
+            return False
+        
+        with self._subscribe_lock:
+            if self._subscriber is not None:
+                return True
+            try:
+                pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{self.channel: self._on_invalidation})
+                # Инвалидации, пропущенные без подписки, не должны оставить старых копий
+                self.local.clear()
+                self._subscriber = pubsub.run_in_thread(
+                    sleep_time=1.0,
+                    daemon=True,
+                    exception_handler=self._on_subscriber_error
+                )
+            except Exception as e:
+                print(f"⚠️ Локальный кэш выключен, нет подписки на инвалидации: {e}")
+                self._subscribe_retry_at = time.monotonic() + 5
+                return False
+        return True
+    
+    def _on_subscriber_error(self, error: Exception, pubsub, thread):
+        print(f"⚠️ Подписка на инвалидации кэша потеряна, локальный кэш очищен: {error}")
+        self._subscriber = None
+        self._subscribe_retry_at = time.monotonic() + 5
+        self._generation += 1
+        self.local.clear()
+        thread.stop()
         try:
-            keys = self.redis_client.keys(pattern)
-            if keys:
-                return self.redis_client.delete(*keys)
+            pubsub.close()
+        except Exception:
+            pass
+    
+    def _on_invalidation(self, message: Dict[str, Any]):
+        data = message["data"]
+        if isinstance(data, bytes):
+            data = data.decode("utf-8", "replace")
+        self._generation += 1
+        if data.startswith(INVALIDATE_PATTERN):
+            self.local.delete_pattern(data[len(INVALIDATE_PATTERN):])
+        elif data.startswith(INVALIDATE_KEY):
+            self.local.delete(data[len(INVALIDATE_KEY):])
+    
+    def close(self):
+        """Остановка подписки на инвалидации"""
+        subscriber, self._subscriber = self._subscriber, None
+        if subscriber is not None:
+            subscriber.stop()
+        self.local.clear()
+    
+    # --- Счетчики ---
+    
+    def _count(self, namespace: str, counter: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[namespace][counter] += amount
+        CACHE_REQUESTS.labels(namespace=namespace, result=counter).inc(amount)
+    
+    def _on_local_evict(self, key: str, reason: str):
+        namespace = self._namespace(key)
+        with self._stats_lock:
+            self._stats[namespace]["evictions"] += 1
+            self._stats[namespace][f"evictions_{reason}"] += 1
+        CACHE_EVICTIONS.labels(namespace=namespace, reason=reason).inc()
+
+
+class AsyncCacheManager:
+    """
+    Асинхронный менеджер кэширования на redis.asyncio
+
+    Для async endpoint'ов: вызовы не блокируют цикл событий, соединения
+    берутся из общего пула (при исчерпании запрос ждет свободное соединение).
+    Формат значений, локальный уровень и канал инвалидации общие с
+    CacheManager, поэтому ключ, записанный одним API, читается другим.
+    Синхронный CacheManager остается для Celery задач и синхронного кода.
+    """
+    
+    def __init__(self, sync_manager: CacheManager):
+        self.sync = sync_manager
+        self.pool = redis.asyncio.BlockingConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT
+        )
+        self.redis_client = redis.asyncio.Redis(connection_pool=self.pool)
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """Получение значения из кэша"""
+        return (await self.get_many([key])).get(key)
+    
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Получение нескольких значений одним MGET; в результате только найденные ключи"""
+        result = {}
+        remote: List[str] = []
+        local_keys: List[str] = []
+        for key in dict.fromkeys(keys):
+            namespace = self.sync._namespace(key)
+            if self.sync._local_enabled(namespace):
+                found, value = self.sync.local.get(key)
+                if found:
+                    self.sync._count(namespace, "local_hits")
+                    result[key] = value
+                    continue
+                local_keys.append(key)
+            remote.append(key)
+        if not remote:
+            return result
+        
+        generation = self.sync._generation
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.mget(remote)
+            for key in local_keys:
+                pipe.pttl(key)
+            values, *ttls = await pipe.execute()
+        except:
+            return result
+        
+        ttl_by_key = dict(zip(local_keys, ttls))
+        for key, raw in zip(remote, values):
+            namespace = self.sync._namespace(key)
+            if not raw:
+                self.sync._count(namespace, "misses")
+                continue
+            try:
+                value = self.sync.serializer.loads(raw)
+            except:
+                continue
+            self.sync._count(namespace, "redis_hits")
+            result[key] = value
+            if key in ttl_by_key:
+                self.sync._store_local(key, value, ttl_by_key[key], generation)
+        return result
+    
+    async def set(self, key: str, value: Any, expire: int = 3600, tags: Iterable[str] = ()) -> bool:
+        """Установка значения в кэш (с тегами для invalidate_tag)"""
+        return await self.set_many({key: value}, expire, tags)
+    
+    async def set_many(self, mapping: Dict[str, Any], expire: int = 3600, tags: Iterable[str] = ()) -> bool:
+        """Установка нескольких значений одним pipeline; теги привязываются к каждому ключу"""
+        if not mapping:
+            return True
+        tags = list(tags)
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, value in mapping.items():
+                pipe.setex(key, expire, self.sync.serializer.dumps(value))
+            for key in mapping:
+                _tag_commands(pipe, key, tags, expire)
+            self._publish_invalidations(pipe, mapping)
+            results = await pipe.execute()
+        except:
+            return False
+        self._evict_local(mapping)
+        return all(results[:len(mapping)])
+    
+    async def delete(self, key: str) -> bool:
+        """Удаление значения из кэша"""
+        return bool(await self.delete_many([key]))
+    
+    async def delete_many(self, keys: Iterable[str], unlink: bool = False) -> int:
+        """Удаление нескольких значений (UNLINK освобождает память в фоне), возвращает число удаленных ключей"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return 0
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            if unlink:
+                pipe.unlink(*keys)
+            else:
+                pipe.delete(*keys)
+            self._publish_invalidations(pipe, keys)
+            deleted, *_ = await pipe.execute()
+        except:
+            return 0
+        self._evict_local(keys)
+        return deleted
+    
+    async def exists(self, key: str) -> bool:
+        """Проверка существования ключа"""
+        try:
+            return bool(await self.redis_client.exists(key))
+        except:
+            return False
+    
+    async def incr(self, key: str, amount: int = 1) -> Optional[int]:
+        """Атомарное увеличение счетчика"""
+        try:
+            return await self.redis_client.incrby(key, amount)
+        except:
+            return None
+    
+    async def get_counter(self, key: str) -> Optional[int]:
+        """Получение значения счетчика (None, если Redis недоступен)"""
+        try:
+            value = await self.redis_client.get(key)
+            return int(value) if value is not None else 0
+        except:
+            return None
+    
+    async def invalidate_tag(self, *tags: str) -> int:
+        """Удаление всех ключей, записанных с любым из тегов (см. CacheManager.invalidate_tag)"""
+        if not tags:
             return 0
+        tag_keys = [TAG_KEY.format(tag=tag) for tag in tags]
+        try:
+            pipe = self.redis_client.pipeline(transaction=True)
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            pipe.delete(*tag_keys)
+            *members, _ = await pipe.execute()
+            keys = sorted({key.decode() for keys in members for key in keys})
+            deleted = 0
+            for batch in _batches(keys):
+                deleted += await self.delete_many(batch, unlink=True)
+            return deleted
         except:
             return 0
+    
+    async def clear_pattern(self, pattern: str) -> int:
+        """Очистка ключей по шаблону через SCAN и UNLINK (см. CacheManager.clear_pattern)"""
+        deleted = 0
+        batch = []
+        try:
+            async for key in self.redis_client.scan_iter(match=pattern, count=SCAN_BATCH_SIZE):
+                batch.append(key.decode())
+                if len(batch) >= SCAN_BATCH_SIZE:
+                    deleted += await self.redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += await self.redis_client.unlink(*batch)
+            await self.redis_client.publish(self.sync.channel, INVALIDATE_PATTERN + pattern)
+        except:
+            return deleted
+        self.sync.local.delete_pattern(pattern)
+        return deleted
+    
+    def _publish_invalidations(self, pipe, keys: Iterable[str]):
+        """Инвалидация остальным воркерам уходит тем же pipeline, что и запись"""
+        for key in keys:
+            if self.sync._namespace(key) in self.sync.local_namespaces:
+                pipe.publish(self.sync.channel, INVALIDATE_KEY + key)
+    
+    def _evict_local(self, keys: Iterable[str]):
+        for key in keys:
+            self.sync._evict_local(key)
+    
+    async def close(self):
+        """Закрытие пула соединений"""
+        await self.redis_client.aclose()
+
 
 # Глобальный экземпляр кэш-менеджера
 cache_manager = CacheManager()
 
-def cached(key_pattern: str, expire: int = 3600):
-    """Декоратор для кэширования результатов функций"""
+# Асинхронный API поверх того же кэша
+async_cache_manager = AsyncCacheManager(cache_manager)
+
+def cached(key_pattern: str, expire: int = 3600, tags: Iterable[str] = ()):
+    """
+    Декоратор для кэширования результатов функций (обычных и корутин)
+    
+    Теги форматируются аргументами так же, как ключ: tags=("team:{0}",)
+    """
     def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                cache_key = key_pattern.format(*args, **kwargs)
+                cache_tags = [tag.format(*args, **kwargs) for tag in tags]
+                
+                cached_result = await async_cache_manager.get(cache_key)
+                if cached_result is not None:
+                    return cached_result
+                
+                result = await func(*args, **kwargs)
+                await async_cache_manager.set(cache_key, result, expire, cache_tags)
+                
+                return result
+            return async_wrapper
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Генерация ключа кэша
+            # Генерация ключа кэша и тегов
             cache_key = key_pattern.format(*args, **kwargs)
+            cache_tags = [tag.format(*args, **kwargs) for tag in tags]
             
             # Пытаемся получить из кэша
             cached_result = cache_manager.get(cache_key)
@@ -72,15 +625,26 @@ def cached(key_pattern: str, expire: int = 3600):
             
             # Выполняем функцию и сохраняем результат
             result = func(*args, **kwargs)
-            cache_manager.set(cache_key, result, expire)
+            cache_manager.set(cache_key, result, expire, cache_tags)
             
             return result
         return wrapper
     return decorator
 
 def invalidate_cache(key_pattern: str):
-    """Декоратор для инвалидации кэша"""
+    """Декоратор для инвалидации кэша (обычных функций и корутин)"""
     def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                result = await func(*args, **kwargs)
+                
+                cache_key = key_pattern.format(*args, **kwargs)
+                await async_cache_manager.delete(cache_key)
+                
+                return result
+            return async_wrapper
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
             result = func(*args, **kwargs)
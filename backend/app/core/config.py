@@ -37,6 +37,19 @@ class Settings(BaseSettings):
     
     # Настройки Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_MAX_CONNECTIONS: int = 50  # пул асинхронного клиента на воркер
+    REDIS_POOL_TIMEOUT: float = 5.0  # секунд ожидания свободного соединения
+    
+    # Локальный кэш процесса перед Redis (пространства ключей через запятую)
+    CACHE_LOCAL_NAMESPACES: str = "challenge_catalog,response_cache,team_stats,leaderboard"
+    CACHE_LOCAL_MAX_ITEMS: int = 10000
+    CACHE_LOCAL_TTL: float = 30.0  # секунд
+    CACHE_INVALIDATION_CHANNEL: str = "cache:invalidate"
+    
+    # Формат значений кэша: json (orjson, pickle для неподдерживаемых значений) или pickle
+    CACHE_SERIALIZER: str = "json"
+    CACHE_COMPRESSION: str = "auto"  # auto, zstd, lz4, zlib, none
+    CACHE_COMPRESS_THRESHOLD: int = 1024  # байт
     
     # Настройки файлов
     UPLOAD_DIR: str = "uploads"
@@ -54,9 +67,63 @@ class Settings(BaseSettings):
     # Настройки WebSocket
     WEBSOCKET_HOST: str = "0.0.0.0"
     WEBSOCKET_PORT: int = 8001
+    # Шина доставки сообщений между процессами: redis - pub/sub для нескольких
+    # процессов и узлов WebSocket, local - только текущий процесс
+    WEBSOCKET_BUS_BACKEND: str = "redis"  # redis, local
+    WEBSOCKET_BUS_CHANNEL: str = "ws:bus"
+    # Очередь исходящих сообщений соединения: при переполнении или записи
+    # дольше SEND_TIMEOUT клиент отключается как не успевающий читать
+    WEBSOCKET_SEND_QUEUE_SIZE: int = 256
+    WEBSOCKET_SEND_TIMEOUT: float = 10.0  # seconds
+    
+    # Настройки приема отправок флагов
+    SUBMISSION_INGEST_MODE: str = "sync"  # sync, queue
+    SUBMISSION_INGEST_BACKEND: str = "redis"  # redis, local
+    SUBMISSION_INGEST_STREAM: str = "submissions:ingest"
+    SUBMISSION_INGEST_BATCH_SIZE: int = 500
+    SUBMISSION_INGEST_FLUSH_INTERVAL: float = 0.05  # seconds
+    SUBMISSION_INGEST_MAX_ATTEMPTS: int = 5
+    SUBMISSION_INGEST_DEAD_LETTER_STREAM: str = "submissions:ingest:dead"
+    
+    # Настройки outbox (доставка побочных эффектов отправок)
+    OUTBOX_POLL_INTERVAL: float = 0.5  # seconds
+    OUTBOX_BATCH_SIZE: int = 200
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_RETENTION_HOURS: int = 24
+    OUTBOX_FAILED_RETENTION_HOURS: int = 168  # неудачные события хранятся дольше для повторной отправки
+    OUTBOX_PURGE_INTERVAL: float = 3600.0  # seconds
+    
+    # Настройки трансляции таблицы лидеров через WebSocket
+    SCOREBOARD_TICK_INTERVAL: float = 1.0  # seconds
+    SCOREBOARD_TOP_N: int = 100
+    SCOREBOARD_HISTORY_SIZE: int = 300
+    
+    # Динамическая оценка: период пересчета, если нет новых решений
+    DYNAMIC_SCORING_INTERVAL: float = 5.0  # seconds
+    DYNAMIC_SCORING_RECONCILE_INTERVAL: float = 60.0  # seconds
+    
+    # Счетчики решений и очков команд: sync - UPDATE строк при каждом решении,
+    # write_behind - счетчики в Redis с пакетным переносом в БД
+    SCORE_COUNTERS_MODE: str = "sync"  # sync, write_behind
+    SCORE_COUNTERS_FLUSH_INTERVAL: float = 1.0  # seconds
+    SCORE_COUNTERS_BATCH_SIZE: int = 1000
+    
+    # Ограничение неверных флагов по паре команда-задание: после FREE_ATTEMPTS
+    # неверных попыток пауза BASE_DELAY, удваивается с каждой попыткой до MAX_DELAY
+    FLAG_THROTTLE_ENABLED: bool = True
+    FLAG_THROTTLE_FREE_ATTEMPTS: int = 5
+    FLAG_THROTTLE_BASE_DELAY: float = 1.0  # seconds
+    FLAG_THROTTLE_MAX_DELAY: float = 300.0  # seconds
+    FLAG_THROTTLE_TTL: int = 3600  # seconds без попыток до сброса счетчика
+    FLAG_THROTTLE_FLUSH_INTERVAL: float = 5.0  # seconds
+    
+    # Кэш ответов публичных endpoint'ов (таблица лидеров, последние решения, статистика)
+    PUBLIC_CACHE_TTL: int = 5  # seconds
+    PUBLIC_STATS_CACHE_TTL: int = 30  # seconds
     
     # Настройки безопасности
-    RATE_LIMIT_REQUESTS: int = 100
+    RATE_LIMIT_ENABLED: bool = True  # правила - app.core.rate_limit_middleware.RATE_LIMIT_RULES
+    RATE_LIMIT_REQUESTS: int = 100  # общий лимит на пользователя (IP) для /api
     RATE_LIMIT_WINDOW: int = 60  # seconds
     ENABLE_AUDIT_LOG: bool = True
     
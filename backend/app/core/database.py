@@ -40,6 +40,8 @@ def init_db():
         from app.models.dynamic_challenge import DynamicChallenge, ChallengeInstance
         from app.models.notification import Notification
         from app.models.audit_log import AuditLog
+        from app.models.outbox_event import OutboxEvent
+        from app.models.competition_score import CompetitionScore
         
         # Создаем все таблицы
         Base.metadata.create_all(bind=engine)
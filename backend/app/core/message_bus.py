@@ -0,0 +1,133 @@
+# backend/app/core/message_bus.py
+import asyncio
+import json
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.cache import async_cache_manager
+from app.core.config import settings
+
+# Обработчик сообщения шины: (тема, данные)
+MessageHandler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+class MessageBus:
+    """
+    Шина сообщений между процессами
+
+    publish() сразу передает сообщение обработчикам своего процесса,
+    а реализация шины - остальным процессам, где его получают их
+    обработчики. Так каждый процесс доставляет сообщение только своим
+    WebSocket-соединениям, а отправитель не ждет круга через Redis.
+    """
+
+    def __init__(self):
+        # Сообщения своего процесса, вернувшиеся из шины, пропускаются
+        self.node_id = uuid.uuid4().hex[:12]
+        self._handlers: List[MessageHandler] = []
+
+    def subscribe(self, handler: MessageHandler):
+        """Регистрация обработчика сообщений"""
+        self._handlers.append(handler)
+
+    async def publish(self, topic: str, data: Dict[str, Any]):
+        """Отправка сообщения всем процессам, включая текущий"""
+        await self._dispatch(topic, data)
+        await self._publish_remote(topic, data)
+
+    async def start(self):
+        """Запуск приема сообщений других процессов"""
+
+    async def stop(self):
+        """Остановка приема"""
+
+    async def _publish_remote(self, topic: str, data: Dict[str, Any]):
+        """Передача сообщения другим процессам"""
+
+    async def _dispatch(self, topic: str, data: Dict[str, Any]):
+        for handler in self._handlers:
+            try:
+                await handler(topic, data)
+            except Exception as e:
+                print(f"❌ Ошибка обработки сообщения шины {topic}: {e}")
+
+
+class LocalMessageBus(MessageBus):
+    """Шина в пределах одного процесса (разработка, тесты, один воркер)"""
+
+
+class RedisMessageBus(MessageBus):
+    """
+    Шина на Redis pub/sub
+
+    Все процессы публикуют в один канал и слушают его. Сообщение
+    pub/sub не хранится: процесс, который в момент публикации не был
+    подписан (перезапуск, обрыв связи с Redis), его не получит - как и
+    соединения, которые в этот момент не были открыты.
+    """
+
+    def __init__(self, channel: str):
+        super().__init__()
+        self.channel = channel
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self.running = True
+        self._task = asyncio.create_task(self._run())
+        print(f"📨 Шина сообщений WebSocket запущена (канал {self.channel})")
+
+    async def stop(self):
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _publish_remote(self, topic: str, data: Dict[str, Any]):
+        try:
+            envelope = json.dumps({"node": self.node_id, "topic": topic, "data": data})
+            await async_cache_manager.redis_client.publish(self.channel, envelope)
+        except Exception as e:
+            print(f"⚠️ Сообщение {topic} не передано другим процессам: {e}")
+
+    async def _run(self):
+        while self.running:
+            pubsub = async_cache_manager.redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    await self._on_message(message["data"])
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Ошибка подписки на шину сообщений: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def _on_message(self, raw: bytes):
+        try:
+            envelope = json.loads(raw)
+        except ValueError:
+            return
+        if envelope.get("node") == self.node_id:
+            return
+        await self._dispatch(envelope["topic"], envelope["data"])
+
+
+def build_message_bus(backend: str = "redis") -> MessageBus:
+    """Шина по настройке WEBSOCKET_BUS_BACKEND"""
+    if backend == "local":
+        return LocalMessageBus()
+    return RedisMessageBus(settings.WEBSOCKET_BUS_CHANNEL)
+
+
+# Глобальный экземпляр шины сообщений
+message_bus = build_message_bus(settings.WEBSOCKET_BUS_BACKEND)
@@ -31,6 +31,36 @@ SUBMISSION_COUNT = Counter(
     ['status']
 )
 
+CACHE_REQUESTS = Counter(
+    'cache_requests_total',
+    'Cache lookups by key namespace and result',
+    ['namespace', 'result']
+)
+
+CACHE_EVICTIONS = Counter(
+    'cache_local_evictions_total',
+    'In-process cache evictions by key namespace and reason',
+    ['namespace', 'reason']
+)
+
+RATE_LIMITED_REQUESTS = Counter(
+    'rate_limited_requests_total',
+    'Requests rejected by the rate limiter',
+    ['rule']
+)
+
+WEBSOCKET_SEND_LAG = Histogram(
+    'websocket_send_lag_seconds',
+    'Time a WebSocket message waits in the connection send queue',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+)
+
+WEBSOCKET_DROPPED_CONNECTIONS = Counter(
+    'websocket_dropped_connections_total',
+    'WebSocket connections closed because the client could not keep up',
+    ['reason']
+)
+
 def metrics_endpoint():
     """Endpoint для Prometheus метрик"""
     return Response(generate_latest(), media_type="text/plain")
\ No newline at end of file
@@ -0,0 +1,139 @@
+# backend/app/core/rate_limit_middleware.py
+import json
+import math
+from fnmatch import fnmatchcase
+from typing import Iterable, List, Optional, Tuple
+
+from app.core.auth import verify_token
+from app.core.config import settings
+from app.core.metrics import RATE_LIMITED_REQUESTS
+from app.core.rate_limiting import RateLimiter, RateLimitStatus, rate_limiter
+
+
+class RateLimitRule:
+    """
+    Правило ограничения запросов
+
+    path - glob-шаблон пути без завершающего "/", methods - методы
+    (пусто - любые). Лимит считается на пользователя из токена, а для
+    анонимных запросов и правил со scope="ip" - на IP клиента.
+    Правило с limit=None исключает подходящие запросы из ограничения.
+    """
+
+    __slots__ = ("name", "path", "methods", "limit", "window", "scope")
+
+    def __init__(self,
+                 name: str,
+                 path: str,
+                 methods: Iterable[str] = (),
+                 limit: Optional[int] = None,
+                 window: int = 60,
+                 scope: str = "user"):
+        self.name = name
+        self.path = path.rstrip("/") or "/"
+        self.methods = frozenset(method.upper() for method in methods)
+        self.limit = limit
+        self.window = window
+        self.scope = scope
+
+    def matches(self, method: str, path: str) -> bool:
+        return (not self.methods or method in self.methods) and fnmatchcase(path, self.path)
+
+
+# Правила проверяются по порядку, применяется первое подходящее.
+# Имя правила - часть ключа в Redis (rate_limit:{name}:{identity})
+RATE_LIMIT_RULES: List[RateLimitRule] = [
+    RateLimitRule("health", "/api/health"),
+    RateLimitRule("flag_submission", "/api/submissions", methods=["POST"], limit=30, window=60),
+    RateLimitRule("login", "/api/auth/login", methods=["POST"], limit=10, window=60, scope="ip"),
+    RateLimitRule("register", "/api/auth/register", methods=["POST"], limit=5, window=3600, scope="ip"),
+    RateLimitRule("dynamic_instance", "/api/dynamic/*/instance", methods=["POST"], limit=5, window=60),
+    RateLimitRule("request", "/api/*", limit=settings.RATE_LIMIT_REQUESTS, window=settings.RATE_LIMIT_WINDOW),
+]
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware ограничения запросов
+
+    Запрос сверх лимита получает 429 до маршрутизации, т.е. до открытия
+    сессии БД и разрешения зависимостей. Разрешенные ответы дополняются
+    заголовками X-RateLimit-Limit/Remaining/Reset, отказ - еще и Retry-After.
+    Пользователь определяется по подписи JWT без обращения к БД.
+    """
+
+    def __init__(self, app, limiter: RateLimiter = rate_limiter, rules: Optional[List[RateLimitRule]] = None):
+        self.app = app
+        self.limiter = limiter
+        self.rules = RATE_LIMIT_RULES if rules is None else rules
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        rule = self._match(scope["method"], scope["path"])
+        if rule is None or rule.limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        result = await self.limiter.check(self._identity(scope, rule), rule.limit, rule.window, rule.name)
+        headers = self._headers(rule, result)
+
+        if result.limited:
+            RATE_LIMITED_REQUESTS.labels(rule=rule.name).inc()
+            await self._reject(send, headers, result)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    def _match(self, method: str, path: str) -> Optional[RateLimitRule]:
+        path = path.rstrip("/") or "/"
+        for rule in self.rules:
+            if rule.matches(method, path):
+                return rule
+        return None
+
+    @staticmethod
+    def _identity(scope, rule: RateLimitRule) -> str:
+        if rule.scope == "user":
+            for name, value in scope.get("headers", []):
+                if name == b"authorization":
+                    scheme, _, token = value.decode("latin-1").partition(" ")
+                    if scheme.lower() == "bearer" and token:
+                        username = verify_token(token)
+                        if username:
+                            return f"user:{username}"
+                    break
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    @staticmethod
+    def _headers(rule: RateLimitRule, result: RateLimitStatus) -> List[Tuple[bytes, bytes]]:
+        return [
+            (b"x-ratelimit-limit", str(rule.limit).encode()),
+            (b"x-ratelimit-remaining", str(max(result.remaining, 0)).encode()),
+            (b"x-ratelimit-reset", str(math.ceil(result.reset_after)).encode()),
+        ]
+
+    @staticmethod
+    async def _reject(send, headers: List[Tuple[bytes, bytes]], result: RateLimitStatus):
+        body = json.dumps(
+            {"detail": "Слишком много запросов. Попробуйте позже."},
+            ensure_ascii=False
+        ).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": headers + [
+                (b"retry-after", str(max(1, math.ceil(result.retry_after))).encode()),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,14 +1,105 @@
 # backend/app/core/rate_limiting.py
 import time
-from typing import Optional
+from collections import OrderedDict
+from typing import Tuple
 from fastapi import HTTPException, status
-from app.core.cache import cache_manager
+from app.core.cache import async_cache_manager
+
+# GCRA (generic cell rate algorithm): в ключе хранится только теоретическое
+# время следующего запроса (TAT, мкс). Запрос допускается, если после него
+# TAT уходит вперед от текущего времени не больше, чем на окно - это дает
+# всплеск до limit запросов и затем ровно limit запросов за window.
+# Время берется из Redis, поэтому воркеры с разными часами считают одинаково.
+# ARGV: интервал между запросами (мкс), окно (мкс), стоимость (0 - только чтение).
+# Ответ: {ограничен, осталось, ждать до следующего запроса (мкс), до полного сброса (мкс)}
+GCRA_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000000 + tonumber(now_parts[2])
+local interval = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+
+local new_tat = tat + interval * cost
+local retry_after = new_tat - window - now
+if retry_after > 0 then
+    return {1, 0, retry_after, tat - now}
+end
+
+if cost > 0 then
+    redis.call('SET', KEYS[1], string.format('%d', new_tat), 'PX', math.floor((new_tat - now) / 1000) + 1)
+end
+return {0, math.floor((window - (new_tat - now)) / interval), 0, new_tat - now}
+"""
+
+
+class RateLimitStatus:
+    """Результат проверки лимита"""
+
+    __slots__ = ("limited", "remaining", "retry_after", "reset_after")
+
+    def __init__(self, limited: bool, remaining: int, retry_after: float, reset_after: float):
+        self.limited = limited
+        self.remaining = remaining
+        self.retry_after = retry_after  # секунд до следующего разрешенного запроса
+        self.reset_after = reset_after  # секунд до полного восстановления лимита
+
+
+class LocalTokenBucket:
+    """
+    Лимит в памяти процесса на время недоступности Redis
+
+    Корзина на ключ: limit жетонов, пополнение limit за window. Считает
+    только запросы своего воркера, поэтому общий лимит мягче, но сервис
+    не остается без ограничений. Число ключей ограничено, дольше всех
+    не использованные вытесняются.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def check(self, key: str, limit: int, window: int, cost: int = 1) -> RateLimitStatus:
+        now = time.monotonic()
+        rate = limit / window
+        tokens, updated = self._buckets.pop(key, (float(limit), now))
+        tokens = min(float(limit), tokens + (now - updated) * rate)
+
+        limited = tokens < cost
+        if not limited:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+        return RateLimitStatus(
+            limited=limited,
+            remaining=int(tokens),
+            retry_after=(cost - tokens) / rate if limited else 0.0,
+            reset_after=(limit - tokens) / rate
+        )
+
 
 class RateLimiter:
-    """Система ограничения запросов"""
+    """
+    Система ограничения запросов
+    
+    Лимит проверяется атомарным Lua-скриптом GCRA: один round trip,
+    одно число в Redis на ключ, и одновременные запросы не могут вместе
+    превысить лимит. Если Redis недоступен, лимит считается в памяти
+    процесса (LocalTokenBucket), а Redis снова пробуется через redis_retry_interval.
+    """
     
-    def __init__(self, cache_manager):
+    def __init__(self, cache_manager, redis_retry_interval: float = 1.0):
         self.cache = cache_manager
+        self.fallback = LocalTokenBucket()
+        self.redis_retry_interval = redis_retry_interval
+        self._redis_retry_at = 0.0
+        self._script = None
     
     async def is_rate_limited(self, 
                             identifier: str, 
@@ -24,30 +115,8 @@ class RateLimiter:
             window: Временное окно в секундах
             action: Тип действия для дифференциации лимитов
         """
-        key = f"rate_limit:{action}:{identifier}"
-        current_time = int(time.time())
-        window_start = current_time - window
-        
-        try:
-            # Получаем историю запросов
-            requests = self.cache.get(key) or []
-            
-            # Удаляем старые запросы вне временного окна
-            requests = [req_time for req_time in requests if req_time > window_start]
-            
-            # Проверяем лимит
-            if len(requests) >= limit:
-                return True
-            
-            # Добавляем текущий запрос
-            requests.append(current_time)
-            self.cache.set(key, requests, window)
-            
-            return False
-            
-        except Exception as e:
-            print(f"Rate limit error: {e}")
-            return False
+        result = await self.check(identifier, limit, window, action)
+        return result.limited
     
     async def get_remaining_requests(self, 
                                    identifier: str, 
@@ -55,21 +124,47 @@ class RateLimiter:
                                    window: int,
                                    action: str = "request") -> int:
         """Получение количества оставшихся запросов"""
+        result = await self.check(identifier, limit, window, action, cost=0)
+        return result.remaining
+    
+    async def check(self,
+                    identifier: str,
+                    limit: int,
+                    window: int,
+                    action: str = "request",
+                    cost: int = 1) -> RateLimitStatus:
+        """Учет запроса (cost=0 - только чтение) и состояние лимита"""
         key = f"rate_limit:{action}:{identifier}"
-        current_time = int(time.time())
-        window_start = current_time - window
+        interval = max(1, window * 1_000_000 // limit)
+        
+        if time.monotonic() < self._redis_retry_at:
+            return self.fallback.check(key, limit, window, cost)
         
         try:
-            requests = self.cache.get(key) or []
-            requests = [req_time for req_time in requests if req_time > window_start]
-            
-            return max(0, limit - len(requests))
-            
-        except:
-            return limit
+            limited, remaining, retry_after, reset_after = await self._get_script()(
+                keys=[key],
+                args=[interval, window * 1_000_000, cost]
+            )
+        except Exception as e:
+            print(f"⚠️ Redis недоступен, лимиты запросов считаются в памяти процесса: {e}")
+            self._redis_retry_at = time.monotonic() + self.redis_retry_interval
+            return self.fallback.check(key, limit, window, cost)
+        
+        return RateLimitStatus(
+            limited=bool(limited),
+            remaining=int(remaining),
+            retry_after=int(retry_after) / 1_000_000,
+            reset_after=int(reset_after) / 1_000_000
+        )
+    
+    def _get_script(self):
+        client = self.cache.redis_client
+        if self._script is None or self._script.registered_client is not client:
+            self._script = client.register_script(GCRA_SCRIPT)
+        return self._script
 
 # Глобальный экземпляр rate limiter
-rate_limiter = RateLimiter(cache_manager)
+rate_limiter = RateLimiter(async_cache_manager)
 
 def rate_limit(limit: int = 60, window: int = 60, action: str = "request"):
     """Декоратор для ограничения запросов к endpoint"""
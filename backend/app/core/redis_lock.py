@@ -0,0 +1,85 @@
+# backend/app/core/redis_lock.py
+import threading
+import uuid
+from typing import Optional
+
+from app.core.cache import cache_manager
+
+# Удаление и продление только своей блокировки (ARGV[1] - токен владельца)
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+EXTEND_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class RedisLock:
+    """
+    Межпроцессная блокировка в Redis для фоновых задач
+
+    Блокировка берется через SET NX EX со случайным токеном, пока она
+    удерживается, фоновый поток продлевает TTL каждые ttl/3 секунд.
+    Снимается и продлевается только владельцем (сравнение токена в Lua),
+    поэтому долгая задача не удалит блокировку следующего владельца,
+    а блокировка упавшего процесса освободится через ttl.
+
+    Ошибки Redis при acquire() передаются вызывающему коду - он сам решает,
+    выполнять ли работу без блокировки.
+    """
+
+    def __init__(self, key: str, ttl: int = 30):
+        self.key = key
+        self.ttl = ttl
+        self.token: Optional[str] = None
+        self.lost = False
+        self._stop = threading.Event()
+        self._renewer: Optional[threading.Thread] = None
+
+    def acquire(self) -> bool:
+        """Попытка взять блокировку без ожидания"""
+        token = uuid.uuid4().hex
+        if not cache_manager.redis_client.set(self.key, token, nx=True, ex=self.ttl):
+            return False
+
+        self.token = token
+        self.lost = False
+        self._stop.clear()
+        self._renewer = threading.Thread(target=self._renew, name=f"lock:{self.key}", daemon=True)
+        self._renewer.start()
+        return True
+
+    def release(self):
+        """Снятие своей блокировки"""
+        if self.token is None:
+            return
+        self._stop.set()
+        if self._renewer is not None:
+            self._renewer.join()
+            self._renewer = None
+        try:
+            self._run_script(RELEASE_SCRIPT, self.token)
+        except Exception as e:
+            print(f"⚠️ Не удалось снять блокировку {self.key}: {e}")
+        finally:
+            self.token = None
+
+    def _renew(self):
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                if not self._run_script(EXTEND_SCRIPT, self.token, self.ttl * 1000):
+                    self.lost = True
+                    print(f"⚠️ Блокировка {self.key} потеряна до завершения работы")
+                    return
+            except Exception as e:
+                print(f"⚠️ Не удалось продлить блокировку {self.key}: {e}")
+
+    def _run_script(self, source: str, *args):
+        return cache_manager.redis_client.eval(source, 1, self.key, *args)
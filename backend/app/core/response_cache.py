@@ -0,0 +1,139 @@
+# backend/app/core/response_cache.py
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+
+from app.core.cache import async_cache_manager
+
+# Готовый ответ: ETag и тело JSON
+CachedBody = Tuple[str, bytes]
+
+
+class ResponseCache:
+    """
+    Кэш ответов публичных endpoint'ов
+
+    Ответ сериализуется в JSON один раз и хранится в Redis вместе со
+    строгим ETag (хэш тела), поэтому готовое тело видят все воркеры uvicorn.
+    Одновременные промахи в процессе ждут одно вычисление, а между
+    процессами вычисление захватывает короткую блокировку в Redis - остальные
+    ждут появления ответа. Cache-Control позволяет кэшировать ответ и nginx.
+    """
+
+    def __init__(self, prefix: str = "response_cache", lock_timeout: float = 5.0, poll_interval: float = 0.05):
+        self.prefix = prefix
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def respond(self,
+                      request: Request,
+                      name: str,
+                      compute: Callable[[], Union[Any, Awaitable[Any]]],
+                      ttl: int,
+                      version: Optional[int] = None,
+                      tags: Tuple[str, ...] = (),
+                      params: Optional[Dict[str, Any]] = None) -> Response:
+        """
+        Ответ из кэша или результат compute()
+
+        Ключ строится из имени, параметров params и версии данных (если
+        источник ее ведет, как каталог заданий - тогда изменение видно сразу,
+        а не по истечении TTL). В params endpoint передает уже разобранные
+        значения параметров, от которых зависит ответ: прочие параметры
+        строки запроса в ключ не попадают и не плодят записи в кэше.
+        Теги позволяют удалить ответ через cache_manager.invalidate_tag.
+        Синхронный compute выполняется в пуле потоков.
+        """
+        key = self._key(name, params, version)
+        entry = await async_cache_manager.get(key)
+        if entry is None:
+            entry = await self._single_flight(key, compute, ttl, tags)
+
+        etag, body = entry
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={ttl}"}
+        if self._matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def _key(self, name: str, params: Optional[Dict[str, Any]], version: Optional[int]) -> str:
+        query = urlencode(sorted((params or {}).items()))
+        suffix = f":v{version}" if version is not None else ""
+        return f"{self.prefix}:{name}{suffix}:{query}"
+
+    async def _single_flight(self, key: str, compute: Callable, ttl: int, tags: Tuple[str, ...]) -> CachedBody:
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_event_loop().create_future()
+        self._inflight[key] = future
+        try:
+            entry = await self._fill(key, compute, ttl, tags)
+            future.set_result(entry)
+            return entry
+        except BaseException as e:
+            future.set_exception(e)
+            # Ошибку получает каждый ожидающий, без предупреждения о непрочитанном исключении
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _fill(self, key: str, compute: Callable, ttl: int, tags: Tuple[str, ...]) -> CachedBody:
+        lock_key = f"{key}:lock"
+        try:
+            leader = bool(await async_cache_manager.redis_client.set(lock_key, 1, nx=True, px=int(self.lock_timeout * 1000)))
+        except Exception:
+            leader = True
+
+        if not leader:
+            # Ответ вычисляет другой воркер - ждем его, но не дольше блокировки
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                entry = await async_cache_manager.get(key)
+                if entry is not None:
+                    return entry
+
+        try:
+            if asyncio.iscoroutinefunction(compute):
+                result = await compute()
+            else:
+                result = await run_in_threadpool(compute)
+
+            body = json.dumps(
+                jsonable_encoder(result),
+                ensure_ascii=False,
+                allow_nan=False,
+                separators=(",", ":")
+            ).encode("utf-8")
+            entry = (f'"{hashlib.sha256(body).hexdigest()[:32]}"', body)
+            await async_cache_manager.set(key, entry, ttl, tags)
+            return entry
+        finally:
+            if leader:
+                await async_cache_manager.delete(lock_key)
+
+    @staticmethod
+    def _matches(if_none_match: Optional[str], etag: str) -> bool:
+        """If-None-Match сравнивается слабым сравнением (RFC 7232, 3.2)"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        return any(
+            candidate.strip().removeprefix("W/") == etag
+            for candidate in if_none_match.split(",")
+        )
+
+
+# Глобальный экземпляр кэша публичных ответов
+response_cache = ResponseCache()
@@ -0,0 +1,268 @@
+# backend/app/core/serialization.py
+import base64
+import pickle
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+# Первый байт значения в Redis - формат. Pickle (протокол 2+) всегда начинается
+# с 0x80, поэтому значения, записанные до появления тегов, читаются как раньше
+TAG_PICKLE = 0x80
+TAG_JSON = ord("J")
+# Метка внутри тела JSON: в значении есть обертки типов, которые нужно восстановить
+TAG_JSON_EXTENDED = ord("X")
+TAG_ZLIB = ord("z")
+TAG_ZSTD = ord("s")
+TAG_LZ4 = ord("l")
+
+# Ключ объекта-обертки для типов, которых нет в JSON
+EXTENDED_TYPE_KEY = "__cache_type__"
+
+
+class Codec:
+    """Формат значения кэша: тег и преобразование в байты и обратно (без тега)"""
+
+    tag: int
+
+    def dumps(self, value: Any) -> Optional[bytes]:
+        """Тело значения; None - формат не умеет хранить значение без потерь"""
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class PickleCodec(Codec):
+    """Pickle: любые объекты Python, тег - собственный заголовок протокола"""
+
+    tag = TAG_PICKLE
+
+    def dumps(self, value: Any) -> Optional[bytes]:
+        # Заголовок протокола (0x80) и есть тег - отрезается, чтобы не дублировать
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)[1:]
+
+    def loads(self, data: bytes) -> Any:
+        return pickle.loads(bytes((TAG_PICKLE,)) + data)
+
+
+class JSONCodec(Codec):
+    """
+    JSON на orjson
+
+    datetime, date, bytes, Decimal и множества кодируются объектами-обертками
+    и восстанавливаются при чтении (такие значения помечаются отдельным
+    тегом, чтобы чистый JSON не обходить заново). Кортежи читаются
+    списками. Значения, которые JSON без потерь не хранит (ключи словаря
+    не строки, произвольные объекты), возвращают None - их пишет pickle.
+    """
+
+    tag = TAG_JSON
+    options = 0
+
+    def __init__(self):
+        if orjson is not None:
+            self.options = (
+                orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_DATACLASS
+                | orjson.OPT_PASSTHROUGH_SUBCLASS
+            )
+
+    def dumps(self, value: Any) -> Optional[bytes]:
+        extended = []
+
+        def default(obj: Any) -> Any:
+            wrapped = _wrap_extended(obj)
+            extended.append(True)
+            return wrapped
+
+        try:
+            data = orjson.dumps(value, default=default, option=self.options)
+        except TypeError:
+            return None
+        return data if not extended else bytes((TAG_JSON_EXTENDED,)) + data
+
+    def loads(self, data: bytes) -> Any:
+        # JSON-текст не начинается с "X", поэтому метка не путается с данными
+        if data[:1] == bytes((TAG_JSON_EXTENDED,)):
+            return _unwrap_extended(orjson.loads(data[1:]))
+        return orjson.loads(data)
+
+
+def _wrap_extended(obj: Any) -> Dict[str, Any]:
+    if isinstance(obj, datetime):
+        return {EXTENDED_TYPE_KEY: "datetime", "v": obj.isoformat()}
+    if isinstance(obj, date):
+        return {EXTENDED_TYPE_KEY: "date", "v": obj.isoformat()}
+    if isinstance(obj, (bytes, bytearray)):
+        return {EXTENDED_TYPE_KEY: "bytes", "v": base64.b64encode(obj).decode("ascii")}
+    if isinstance(obj, Decimal):
+        return {EXTENDED_TYPE_KEY: "decimal", "v": str(obj)}
+    if type(obj) in (set, frozenset):
+        return {EXTENDED_TYPE_KEY: "set", "v": list(obj)}
+    raise TypeError(f"Тип {type(obj).__name__} не хранится в JSON")
+
+
+_EXTENDED_DECODERS = {
+    "datetime": datetime.fromisoformat,
+    "date": date.fromisoformat,
+    "bytes": base64.b64decode,
+    "decimal": Decimal,
+    "set": set,
+}
+
+
+def _unwrap_extended(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_unwrap_extended(item) for item in value]
+    if isinstance(value, dict):
+        kind = value.get(EXTENDED_TYPE_KEY)
+        if len(value) == 2 and kind in _EXTENDED_DECODERS:
+            return _EXTENDED_DECODERS[kind](_unwrap_extended(value["v"]))
+        return {key: _unwrap_extended(item) for key, item in value.items()}
+    return value
+
+
+class Compressor:
+    """Сжатие тела значения с собственным тегом"""
+
+    tag: int
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def decompress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+
+class ZlibCompressor(Compressor):
+    tag = TAG_ZLIB
+
+    def __init__(self, level: int = 1):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class ZstdCompressor(Compressor):
+    tag = TAG_ZSTD
+
+    def __init__(self, level: int = 3):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zstandard.ZstdDecompressor().decompress(data)
+
+
+class LZ4Compressor(Compressor):
+    tag = TAG_LZ4
+
+    def compress(self, data: bytes) -> bytes:
+        return lz4.frame.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return lz4.frame.decompress(data)
+
+
+class CacheSerializer:
+    """
+    Сериализация значений кэша
+
+    Значение пишется основным форматом (JSON, если он хранит его без
+    потерь, иначе pickle) и сжимается, если длиннее threshold байт и
+    сжатие дает выигрыш. Чтение определяет формат и сжатие по тегу в
+    первом байте, поэтому ключи, записанные другим форматом или старой
+    версией (pickle без тега), читаются без миграции.
+    """
+
+    def __init__(self,
+                 codec: Optional[Codec] = None,
+                 compressor: Optional[Compressor] = None,
+                 threshold: int = 1024):
+        self.codec = codec or PickleCodec()
+        self.fallback = PickleCodec()
+        self.compressor = compressor
+        self.threshold = threshold
+        self._codecs: Dict[int, Codec] = {TAG_PICKLE: self.fallback}
+        self._codecs[self.codec.tag] = self.codec
+        self._compressors: Dict[int, Compressor] = {TAG_ZLIB: ZlibCompressor()}
+        if zstandard is not None:
+            self._compressors[TAG_ZSTD] = ZstdCompressor()
+        if lz4 is not None:
+            self._compressors[TAG_LZ4] = LZ4Compressor()
+        if compressor is not None:
+            self._compressors[compressor.tag] = compressor
+
+    def dumps(self, value: Any) -> bytes:
+        codec = self.codec
+        body = codec.dumps(value)
+        if body is None:
+            codec = self.fallback
+            body = codec.dumps(value)
+        data = bytes((codec.tag,)) + body
+
+        if self.compressor is not None and len(data) > self.threshold:
+            compressed = self.compressor.compress(data)
+            if len(compressed) + 1 < len(data):
+                return bytes((self.compressor.tag,)) + compressed
+        return data
+
+    def loads(self, data: bytes) -> Any:
+        tag = data[0]
+        compressor = self._compressors.get(tag)
+        if compressor is not None:
+            data = compressor.decompress(data[1:])
+            tag = data[0]
+        codec = self._codecs.get(tag)
+        if codec is None:
+            raise ValueError(f"Неизвестный формат значения кэша: {tag:#x}")
+        return codec.loads(data[1:])
+
+
+def build_serializer(codec: str = "json", compression: str = "auto", threshold: int = 1024) -> CacheSerializer:
+    """Сериализатор по настройкам CACHE_SERIALIZER и CACHE_COMPRESSION"""
+    if codec == "json" and orjson is None:
+        print("⚠️ orjson не установлен, значения кэша пишутся pickle")
+        codec = "pickle"
+
+    if compression == "auto":
+        # zlib заметно медленнее и по умолчанию не включается
+        compression = "zstd" if zstandard is not None else "lz4" if lz4 is not None else "none"
+    compressors = {
+        "zstd": ZstdCompressor if zstandard is not None else None,
+        "lz4": LZ4Compressor if lz4 is not None else None,
+        "zlib": ZlibCompressor,
+        "none": None,
+    }
+    if compressors.get(compression) is None and compression != "none":
+        print(f"⚠️ Сжатие {compression} недоступно, используется zlib")
+        compression = "zlib"
+    compressor_class = compressors[compression]
+
+    return CacheSerializer(
+        codec=JSONCodec() if codec == "json" else PickleCodec(),
+        compressor=compressor_class() if compressor_class else None,
+        threshold=threshold
+    )
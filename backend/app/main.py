@@ -5,7 +5,9 @@ from contextlib import asynccontextmanager
 import asyncio
 
 from app.core.config import settings
+from app.core.cache import async_cache_manager, cache_manager
 from app.core.database import init_db
+from app.core.rate_limit_middleware import RateLimitMiddleware
 from app.core.microservices import microservice_manager, AuthService, ScoringService
 from app.api.websocket import manager as websocket_manager
 from app.plugins import start_plugin_initialization  # ИЗМЕНЕНО: импортируем функцию инициализации
@@ -42,6 +44,37 @@ async def lifespan(app: FastAPI):
                 self.client = None
         docker_manager = DummyDockerManager()
     
+    # Шина доставки WebSocket-сообщений между процессами
+    from app.core.message_bus import message_bus
+    await message_bus.start()
+    
+    # Асинхронный прием отправок флагов
+    from app.services.submission_ingest import submission_ingest
+    if submission_ingest.enabled:
+        await submission_ingest.start()
+    
+    # Фоновая доставка событий outbox (уведомления, аудит, хуки плагинов)
+    from app.services.outbox_service import outbox_dispatcher
+    await outbox_dispatcher.start()
+    
+    # Трансляция изменений таблицы лидеров через WebSocket
+    from app.services.scoreboard_publisher import scoreboard_publisher
+    await scoreboard_publisher.start()
+    
+    # Пересчет очков при динамической оценке
+    from app.services.dynamic_scoring import dynamic_scoring
+    await dynamic_scoring.start()
+    
+    # Перенос счетчиков решений и очков из Redis в БД
+    from app.services.score_counters import score_counters
+    if score_counters.enabled:
+        await score_counters.start()
+    
+    # Перенос повторов неверных флагов в submissions.attempts
+    from app.services.flag_throttle import flag_throttle
+    if flag_throttle.enabled:
+        await flag_throttle.start()
+    
     # Запуск фоновых задач
     asyncio.create_task(background_tasks())
     
@@ -52,7 +85,18 @@ async def lifespan(app: FastAPI):
     # Shutdown
     print("🛑 Остановка CyberCTF Arena...")
     
+    if submission_ingest.enabled:
+        await submission_ingest.stop()
+    await outbox_dispatcher.stop()
+    await scoreboard_publisher.stop()
+    await dynamic_scoring.stop()
+    if score_counters.enabled:
+        await score_counters.stop()
+    if flag_throttle.enabled:
+        await flag_throttle.stop()
+    
     await websocket_manager.disconnect_all()
+    await message_bus.stop()
     await microservice_manager.shutdown()
     
     # ИЗМЕНЕНО: Асинхронная выгрузка плагинов
@@ -63,6 +107,9 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️ Ошибка выгрузки плагинов: {e}")
     
+    cache_manager.close()
+    await async_cache_manager.close()
+    
     print("✅ Приложение остановлено")
 
 async def background_tasks():
@@ -103,6 +150,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Ограничение запросов до маршрутизации (добавляется раньше CORS,
+# чтобы ответы 429 тоже получали CORS-заголовки)
+app.add_middleware(RateLimitMiddleware)
+
 # Настройка CORS
 app.add_middleware(
     CORSMiddleware,
@@ -116,7 +167,8 @@ app.add_middleware(
 from app.api import (
     auth_router, users_router, teams_router, challenges_router, 
     submissions_router, admin_router, monitoring_router, websocket_router,
-    dynamic_challenges_router, notifications_router, analytics_router
+    dynamic_challenges_router, notifications_router, analytics_router,
+    competitions_router
 )
 
 app.include_router(auth_router, prefix="/api/auth", tags=["Аутентификация"])
@@ -130,6 +182,7 @@ app.include_router(websocket_router, prefix="/api/ws", tags=["WebSocket"])
 app.include_router(dynamic_challenges_router, prefix="/api/dynamic", tags=["Динамические задания"])
 app.include_router(notifications_router, prefix="/api/notifications", tags=["Уведомления"])
 app.include_router(analytics_router, prefix="/api/analytics", tags=["Аналитика"])
+app.include_router(competitions_router, prefix="/api/competitions", tags=["Соревнования"])
 
 # Статические файлы
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -163,9 +216,9 @@ async def health_check():
     # Проверка Redis (если используется)
     cache_status = "not_configured"
     try:
-        from app.core.cache import cache_manager
-        cache_manager.set("health_check", "test", 10)
-        if cache_manager.get("health_check") == "test":
+        from app.core.cache import async_cache_manager
+        await async_cache_manager.set("health_check", "test", 10)
+        if await async_cache_manager.get("health_check") == "test":
             cache_status = "healthy"
         else:
             cache_status = "error"
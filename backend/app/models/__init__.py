@@ -9,6 +9,8 @@ from app.models.competition import Competition
 from app.models.dynamic_challenge import DynamicChallenge, ChallengeInstance
 from app.models.notification import Notification
 from app.models.audit_log import AuditLog
+from app.models.outbox_event import OutboxEvent
+from app.models.competition_score import CompetitionScore
 
 __all__ = [
     'User',
@@ -21,5 +23,7 @@ __all__ = [
     'DynamicChallenge',
     'ChallengeInstance',
     'Notification',
-    'AuditLog'
+    'AuditLog',
+    'OutboxEvent',
+    'CompetitionScore'
 ]
\ No newline at end of file
@@ -22,6 +22,9 @@ class Competition(Base):
     scoring_type = Column(String(20), default="dynamic")  # static, dynamic
     allowed_categories = Column(Text)  # JSON список разрешенных категорий
     
+    # Время построения таблицы competition_scores (None - нужно перестроить)
+    standings_built_at = Column(DateTime)
+    
     # Отметки времени
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, UniqueConstraint, text
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class CompetitionScore(Base):
+    """Материализованный счет команды в рамках соревнования"""
+    __tablename__ = "competition_scores"
+    __table_args__ = (
+        UniqueConstraint("competition_id", "team_id", name="uq_competition_scores_competition_team"),
+        # Порядок таблицы лидеров соревнования (score DESC, last_solve_at ASC)
+        # читается прямо из индекса, без сортировки
+        Index(
+            "ix_competition_scores_standings",
+            "competition_id", text("score DESC"), text("last_solve_at ASC"), "team_id"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    competition_id = Column(Integer, ForeignKey("competitions.id", ondelete="CASCADE"), nullable=False)
+    team_id = Column(Integer, ForeignKey("teams.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Integer, default=0, nullable=False)
+    solves = Column(Integer, default=0, nullable=False)
+    last_solve_at = Column(DateTime)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<CompetitionScore(competition_id={self.competition_id}, team_id={self.team_id}, score={self.score})>"
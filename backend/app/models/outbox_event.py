@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
+from sqlalchemy.sql import func
+from datetime import datetime
+from app.core.database import Base
+
+class OutboxEvent(Base):
+    """Событие транзакционного outbox - побочный эффект, записанный вместе с данными"""
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        Index("ix_outbox_events_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String(50), nullable=False)  # audit, telegram.*, websocket.*, plugin_hook
+    payload = Column(JSON, nullable=False)
+    status = Column(String(20), default="pending")  # pending, processing, delivered, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=func.now())
+    delivered_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"<OutboxEvent(type='{self.event_type}', status='{self.status}')>"
@@ -1,5 +1,5 @@
 # backend/app/models/submission.py
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -7,12 +7,31 @@ from app.core.database import Base
 
 class Submission(Base):
     __tablename__ = "submissions"
+    __table_args__ = (
+        # Команда может решить задание только один раз
+        Index(
+            "uq_submissions_team_challenge_accepted",
+            "team_id", "challenge_id",
+            unique=True,
+            postgresql_where=text("status = 'accepted'"),
+            sqlite_where=text("status = 'accepted'")
+        ),
+        # Выборка принятых решений за окно соревнования
+        Index(
+            "ix_submissions_accepted_submitted_at",
+            "submitted_at",
+            postgresql_where=text("status = 'accepted'"),
+            sqlite_where=text("status = 'accepted'")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     flag = Column(String(500), nullable=False)
     status = Column(String(20), nullable=False)  # pending, accepted, rejected
     points_awarded = Column(Integer, default=0)
     is_first_blood = Column(Boolean, default=False)
+    # Число отправок этого флага: повторы неверного флага не создают новых строк
+    attempts = Column(Integer, nullable=False, default=1, server_default="1")
     
     # Внешние ключи
     team_id = Column(Integer, ForeignKey("teams.id"), nullable=False)
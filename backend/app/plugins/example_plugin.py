@@ -29,7 +29,7 @@ class ExamplePlugin:
         pass
     
     # Пример хуков
-    async def on_flag_submission(self, user_id: int, challenge_id: int, result: bool):
+    async def on_flag_submission(self, submission_data: Dict[str, Any]):
         """Хук для обработки отправки флага"""
-        if result:
-            print(f"🎉 Пользователь {user_id} решил задание {challenge_id}")
+        if submission_data.get("status") == "accepted":
+            print(f"🎉 Пользователь {submission_data['user_id']} решил задание {submission_data['challenge_id']}")
@@ -12,6 +12,12 @@ from app.services.cache_service import CacheService
 from app.services.analytics_service import AnalyticsService
 from app.services.notification_service import NotificationService
 from app.services.audit_service import AuditService
+from app.services.challenge_index import ChallengeIndex
+from app.services.leaderboard_service import LeaderboardService
+from app.services.challenge_catalog import ChallengeCatalog
+from app.services.team_solves import TeamSolvesService
+from app.services.score_counters import ScoreCounters
+from app.services.flag_throttle import FlagThrottle
 
 __all__ = [
     'AuthService',
@@ -26,5 +32,11 @@ __all__ = [
     'CacheService',
     'AnalyticsService',
     'NotificationService',
-    'AuditService'
+    'AuditService',
+    'ChallengeIndex',
+    'LeaderboardService',
+    'ChallengeCatalog',
+    'TeamSolvesService',
+    'ScoreCounters',
+    'FlagThrottle'
 ]
\ No newline at end of file
@@ -1,7 +1,7 @@
 # backend/app/services/analytics_service.py
 from typing import Dict, List, Any, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, and_
+from sqlalchemy import func, desc, and_, case
 from datetime import datetime, timedelta
 
 class AnalyticsService:
@@ -260,14 +260,14 @@ class AnalyticsService:
             Challenge.points,
             func.count(Submission.id).label('total_attempts'),
             func.sum(
-                func.case((Submission.status == 'accepted', 1), else_=0)
+                case((Submission.status == 'accepted', 1), else_=0)
             ).label('successful_attempts')
         ).join(Submission).group_by(
             Challenge.id, Challenge.title, Challenge.category, Challenge.points
         ).having(
             func.count(Submission.id) >= 5  # Минимум 5 попыток
         ).order_by(
-            (func.sum(func.case((Submission.status == 'accepted', 1), else_=0)) / func.count(Submission.id)).asc()
+            (func.sum(case((Submission.status == 'accepted', 1), else_=0)) / func.count(Submission.id)).asc()
         ).limit(5).all()
         
         return {
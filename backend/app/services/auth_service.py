@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from app.models.user import User
 from app.models.team import Team
 from app.core.security import verify_password, get_password_hash
+from app.services.leaderboard_service import LeaderboardService
 
 class AuthService:
     def __init__(self, db: Session):
@@ -31,6 +32,7 @@ class AuthService:
         team = Team(name=team_name)
         self.db.add(team)
         self.db.flush()  # Получаем ID команды
+        LeaderboardService(self.db).track_team(team.id)
 
         # Создание пользователя (капитана)
         user = User(
@@ -1,20 +1,47 @@
 # backend/app/services/cache_service.py
+import json
 from typing import Any, Optional
 from app.core.cache import cache_manager
 
+# Тег всех закэшированных ответов каталога заданий
+CATALOG_TAG = "catalog"
+
 class CacheService:
     """Сервис для работы с кэшем"""
     
     def __init__(self):
         self.cache = cache_manager
     
-    def get_challenge(self, challenge_id: int) -> Optional[dict]:
-        """Получение задания из кэша"""
-        return self.cache.get(f"challenge:{challenge_id}")
+    def get_challenge(self, challenge_id: int, version: int) -> Optional[dict]:
+        """Получение карточки задания из кэша для версии каталога"""
+        return self.get_catalog_payload(version, "challenge", challenge_id)
+    
+    def set_challenge(self, challenge_id: int, version: int, challenge_data: dict, expire: int = 300):
+        """Сохранение карточки задания в кэш для версии каталога"""
+        return self.set_catalog_payload(version, challenge_data, "challenge", challenge_id, expire=expire)
+    
+    def get_catalog_payload(self, version: int, *parts: Any) -> Optional[Any]:
+        """Готовый ответ каталога заданий (список, карточка, категории) для версии"""
+        return self.cache.get(self._catalog_key(version, parts))
+    
+    def set_catalog_payload(self, version: int, payload: Any, *parts: Any, expire: int = 300):
+        """Сохранение ответа каталога: старые версии никто не читает, они истекают по TTL"""
+        return self.cache.set(self._catalog_key(version, parts), payload, expire, tags=[CATALOG_TAG])
+    
+    @staticmethod
+    def _catalog_key(version: int, parts: tuple) -> str:
+        # Фильтры приходят из запроса, JSON исключает склейку разных наборов в один ключ
+        return f"challenge_catalog:{version}:{json.dumps(parts, ensure_ascii=False)}"
+    
+    def get_catalog_version(self) -> Optional[int]:
+        """Текущая версия каталога заданий (None, если Redis недоступен)"""
+        return self.cache.get_counter("challenge_catalog:version")
     
-    def set_challenge(self, challenge_id: int, challenge_data: dict, expire: int = 300):
-        """Сохранение задания в кэш"""
-        return self.cache.set(f"challenge:{challenge_id}", challenge_data, expire)
+    def bump_catalog_version(self) -> Optional[int]:
+        """Увеличение версии каталога после изменения заданий; ответы старых версий удаляются по тегу"""
+        version = self.cache.incr("challenge_catalog:version")
+        self.cache.invalidate_tag(CATALOG_TAG)
+        return version
     
     def get_team_stats(self, team_id: int) -> Optional[dict]:
         """Получение статистики команды из кэша"""
@@ -22,15 +49,19 @@ class CacheService:
     
     def set_team_stats(self, team_id: int, stats: dict, expire: int = 60):
         """Сохранение статистики команды в кэш"""
-        return self.cache.set(f"team_stats:{team_id}", stats, expire)
+        return self.cache.set(f"team_stats:{team_id}", stats, expire, tags=[f"team:{team_id}"])
     
     def invalidate_challenge(self, challenge_id: int):
-        """Инвалидация кэша задания"""
-        self.cache.delete(f"challenge:{challenge_id}")
+        """Инвалидация кэша задания
+        
+        Задание входит и в карточку, и в списки с фильтрами, поэтому
+        сбрасывается вся версия каталога.
+        """
+        self.bump_catalog_version()
     
     def invalidate_team_stats(self, team_id: int):
-        """Инвалидация кэша статистики команды"""
-        self.cache.delete(f"team_stats:{team_id}")
+        """Инвалидация кэша статистики команды и остальных значений с тегом команды"""
+        self.cache.invalidate_tag(f"team:{team_id}")
     
     def get_leaderboard(self) -> Optional[list]:
         """Получение таблицы лидеров из кэша"""
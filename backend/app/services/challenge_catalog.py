@@ -0,0 +1,176 @@
+# backend/app/services/challenge_catalog.py
+import threading
+import time
+from typing import Any, Callable, Container, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.challenge import Challenge
+from app.schemas.challenge import ChallengeDetail, ChallengeResponse
+from app.services.cache_service import CacheService
+from app.services.challenge_index import challenge_index
+from app.services.score_counters import CHALLENGE_SOLVES_KEY, score_counters
+
+
+class ChallengeCatalog:
+    """
+    Кэш каталога заданий: списки, карточки и категории
+
+    Ответы сериализуются один раз на версию каталога (см. ChallengeIndex)
+    и набор фильтров и хранятся в два уровня: в памяти процесса и в Redis
+    под ключом с номером версии, так что другие процессы получают готовый
+    ответ без запроса к БД. Любое изменение заданий проходит через
+    invalidate() и увеличивает версию - записи старых версий больше никто
+    не читает, и они истекают по TTL.
+
+    Счетчики решений и First Blood меняются с каждым принятым флагом,
+    поэтому они подставляются из отдельного снимка, который перечитывается
+    одним запросом не чаще раза в counts_ttl секунд.
+    """
+
+    def __init__(self, counts_ttl: float = 1.0, fallback_ttl: float = 5.0, payload_ttl: int = 300):
+        self.cache_service = CacheService()
+        self.counts_ttl = counts_ttl
+        self.fallback_ttl = fallback_ttl
+        self.payload_ttl = payload_ttl
+        self._payloads: Dict[Tuple[Any, ...], Any] = {}
+        self._version: Optional[int] = None
+        self._loaded_at = 0.0
+        self._stats: Dict[int, Tuple[int, Optional[int]]] = {}
+        self._stats_loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def list_challenges(self,
+                        db: Session,
+                        solved: Container[int],
+                        category: Optional[str] = None,
+                        difficulty: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Видимые задания с отметками решения для команды, готовые к отдаче в JSON"""
+        payload, fresh = self._get_payload(
+            db, ("list", category, difficulty),
+            lambda: self._load_list(db, category, difficulty)
+        )
+        # Только что загруженный из БД каталог уже содержит актуальные счетчики,
+        # если они не ждут переноса из Redis
+        stats = {} if fresh and not score_counters.enabled else self._get_stats(db)
+        return [
+            {
+                **item,
+                "solved_count": stats.get(item["id"], (item["solved_count"],))[0],
+                "is_solved": item["id"] in solved
+            }
+            for item in payload
+        ]
+
+    def get_challenge(self, db: Session, challenge_id: int) -> Optional[Dict[str, Any]]:
+        """Карточка задания (в том числе скрытого - видимость проверяет вызывающий код)"""
+        payload, fresh = self._get_payload(
+            db, ("challenge", challenge_id),
+            lambda: self._load_challenge(db, challenge_id)
+        )
+        # Пустой словарь - закэшированное отсутствие задания
+        if not payload:
+            return None
+
+        if fresh and not score_counters.enabled:
+            return dict(payload)
+
+        solved_count, first_blood_user_id = self._get_stats(db).get(
+            challenge_id, (payload["solved_count"], payload["first_blood_user_id"])
+        )
+        return {**payload, "solved_count": solved_count, "first_blood_user_id": first_blood_user_id}
+
+    def get_categories(self, db: Session) -> List[str]:
+        """Категории всех заданий"""
+        payload, _ = self._get_payload(db, ("categories",), lambda: [
+            category for category, in db.query(Challenge.category).distinct().all()
+        ])
+        return list(payload)
+
+    def invalidate(self):
+        """Сброс каталога и индекса заданий во всех процессах после изменения заданий"""
+        challenge_index.invalidate()
+        with self._lock:
+            self._payloads = {}
+            self._version = None
+            self._loaded_at = 0.0
+            self._stats_loaded_at = 0.0
+
+    def _get_payload(self, db: Session, key: Tuple[Any, ...],
+                     loader: Callable[[], Any]) -> Tuple[Any, bool]:
+        remote_version = self.cache_service.get_catalog_version()
+
+        with self._lock:
+            if remote_version is None:
+                # Redis недоступен - ограничиваемся локальным TTL
+                if time.monotonic() - self._loaded_at >= self.fallback_ttl:
+                    self._payloads = {}
+                    self._version = None
+                    self._loaded_at = time.monotonic()
+            elif remote_version != self._version:
+                self._payloads = {}
+                self._version = remote_version
+
+            payload = self._payloads.get(key)
+            if payload is not None:
+                return payload, False
+
+        fresh = False
+        payload = None
+        if remote_version is not None:
+            payload = self.cache_service.get_catalog_payload(remote_version, *key)
+
+        if payload is None:
+            payload = loader()
+            fresh = True
+            if remote_version is not None:
+                self.cache_service.set_catalog_payload(remote_version, payload, *key, expire=self.payload_ttl)
+
+        with self._lock:
+            # Пока шла загрузка, каталог мог смениться - такой ответ не сохраняется
+            if remote_version == self._version:
+                self._payloads[key] = payload
+        return payload, fresh
+
+    def _load_list(self, db: Session, category: Optional[str], difficulty: Optional[str]) -> List[Dict[str, Any]]:
+        query = db.query(Challenge).filter(Challenge.is_visible == True)
+
+        if category:
+            query = query.filter(Challenge.category == category)
+
+        if difficulty:
+            query = query.filter(Challenge.difficulty == difficulty)
+
+        challenges = query.order_by(Challenge.points.asc()).all()
+        return [
+            ChallengeResponse.model_validate(challenge).model_dump(mode="json")
+            for challenge in challenges
+        ]
+
+    def _load_challenge(self, db: Session, challenge_id: int) -> Dict[str, Any]:
+        challenge = db.query(Challenge).filter(Challenge.id == challenge_id).first()
+        if not challenge:
+            return {}
+        return ChallengeDetail.model_validate(challenge).model_dump(mode="json")
+
+    def _get_stats(self, db: Session) -> Dict[int, Tuple[int, Optional[int]]]:
+        if time.monotonic() - self._stats_loaded_at < self.counts_ttl:
+            return self._stats
+
+        stats = {
+            challenge_id: (solved_count or 0, first_blood_user_id)
+            for challenge_id, solved_count, first_blood_user_id in db.query(
+                Challenge.id, Challenge.solved_count, Challenge.first_blood_user_id
+            ).all()
+        }
+        for challenge_id, solved_count in score_counters.get_values(CHALLENGE_SOLVES_KEY).items():
+            if challenge_id in stats:
+                stats[challenge_id] = (solved_count, stats[challenge_id][1])
+        with self._lock:
+            self._stats = stats
+            self._stats_loaded_at = time.monotonic()
+        return stats
+
+
+# Глобальный экземпляр кэша каталога заданий
+challenge_catalog = ChallengeCatalog()
@@ -0,0 +1,92 @@
+import hashlib
+import hmac
+import threading
+import time
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+
+from app.models.challenge import Challenge
+from app.services.cache_service import CacheService
+
+
+def flag_digest(flag: str) -> bytes:
+    """SHA-256 дайджест флага"""
+    return hashlib.sha256(flag.encode("utf-8")).digest()
+
+
+class IndexedChallenge:
+    """Снимок задания, достаточный для проверки флага"""
+
+    __slots__ = ("id", "title", "points", "category", "is_active", "is_visible", "flag_digest")
+
+    def __init__(self, challenge: Challenge):
+        self.id = challenge.id
+        self.title = challenge.title
+        self.points = challenge.points
+        self.category = challenge.category
+        self.is_active = bool(challenge.is_active)
+        self.is_visible = bool(challenge.is_visible)
+        self.flag_digest = flag_digest(challenge.flag)
+
+    def check_flag(self, submitted_flag: str) -> bool:
+        """Сравнение флага с дайджестом за постоянное время"""
+        return hmac.compare_digest(flag_digest(submitted_flag), self.flag_digest)
+
+
+class ChallengeIndex:
+    """
+    Процессный индекс заданий для горячего пути отправки флагов.
+
+    Индекс привязан к версии каталога в Redis: любое изменение заданий
+    (создание, обновление, переключение, смена флагов) увеличивает версию,
+    и каждый процесс перечитывает задания при следующем обращении.
+    Если Redis недоступен, индекс живет не дольше fallback_ttl секунд.
+    """
+
+    def __init__(self, fallback_ttl: float = 5.0):
+        self.cache_service = CacheService()
+        self.fallback_ttl = fallback_ttl
+        self._entries: Dict[int, IndexedChallenge] = {}
+        self._version: Optional[int] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def get(self, db: Session, challenge_id: int) -> Optional[IndexedChallenge]:
+        """Получение задания из индекса"""
+        self._ensure_fresh(db)
+        return self._entries.get(challenge_id)
+
+    def invalidate(self):
+        """Сброс индекса во всех процессах"""
+        self._version = None
+        self.cache_service.bump_catalog_version()
+
+    def _ensure_fresh(self, db: Session):
+        remote_version = self.cache_service.get_catalog_version()
+
+        if remote_version is None:
+            # Redis недоступен - ограничиваемся локальным TTL
+            if self._version is not None and time.monotonic() - self._loaded_at < self.fallback_ttl:
+                return
+        elif remote_version == self._version:
+            return
+
+        with self._lock:
+            if remote_version is not None and remote_version == self._version:
+                return
+            self._load(db, remote_version)
+
+    def _load(self, db: Session, version: Optional[int]):
+        challenges = db.query(Challenge).all()
+        self._entries = {challenge.id: IndexedChallenge(challenge) for challenge in challenges}
+        # Без Redis храним -1, чтобы следующая доступная версия вызвала перезагрузку
+        self._version = version if version is not None else -1
+        self._loaded_at = time.monotonic()
+
+
+# Глобальный экземпляр индекса заданий
+challenge_index = ChallengeIndex()
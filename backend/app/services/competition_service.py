@@ -1,7 +1,15 @@
 # backend/app/services/competition_service.py
 from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import delete, func, insert, literal, select, update
 from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.models.challenge import Challenge
 from app.models.competition import Competition
+from app.models.competition_score import CompetitionScore
+from app.models.submission import Submission
+from app.models.team import Team
+from app.utils.helpers import safe_json_loads
 
 class CompetitionService:
     def __init__(self, db: Session):
@@ -46,19 +54,229 @@ class CompetitionService:
 
     def get_leaderboard(self, competition_id: int, limit: int = 10):
         """Получение таблицы лидеров для соревнования"""
-        from app.models.team import Team
-        from app.models.submission import Submission
-        
-        # В реальной системе здесь будет сложный запрос
-        # для подсчета очков только за текущее соревнование
-        teams = self.db.query(Team).order_by(Team.score.desc()).limit(limit).all()
-        
         return [
             {
-                "position": idx + 1,
-                "team_name": team.name,
-                "score": team.score,
-                "country": team.country
+                "position": entry["position"],
+                "team_name": entry["team_name"],
+                "score": entry["score"],
+                "country": entry["country"]
+            }
+            for entry in self.get_standings(competition_id, limit=limit)
+        ]
+
+    def get_standings(self, competition_id: int, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Таблица лидеров соревнования из материализованных счетов
+
+        Читается по индексу competition_scores без обращения к submissions;
+        при первом запросе таблица строится по окну соревнования в отдельной
+        сессии, транзакция запроса остается только читающей.
+        """
+        competition = self.db.query(Competition).filter(Competition.id == competition_id).first()
+        if not competition:
+            return []
+        if competition.standings_built_at is None:
+            self._build_missing_standings(competition_id)
+
+        rows = self.db.query(
+            CompetitionScore.team_id,
+            CompetitionScore.score,
+            CompetitionScore.solves,
+            CompetitionScore.last_solve_at,
+            Team.name,
+            Team.country
+        ).join(
+            Team, Team.id == CompetitionScore.team_id
+        ).filter(
+            CompetitionScore.competition_id == competition_id
+        ).order_by(
+            CompetitionScore.score.desc(),
+            CompetitionScore.last_solve_at.asc(),
+            CompetitionScore.team_id.asc()
+        ).offset(offset).limit(limit).all()
+
+        return [
+            {
+                "position": position,
+                "team_id": team_id,
+                "team_name": team_name,
+                "score": score,
+                "solves": solves,
+                "last_solve_at": last_solve_at,
+                "country": country
+            }
+            for position, (team_id, score, solves, last_solve_at, team_name, country)
+            in enumerate(rows, start=offset + 1)
+        ]
+
+    def rebuild_standings(self, competition_id: int, only_missing: bool = False) -> int:
+        """
+        Перестроение счетов соревнования по принятым решениям в его окне
+
+        Строка соревнования блокируется (FOR UPDATE) до commit: параллельные
+        перестроения выполняются по очереди, а решения, которые учитывает
+        apply_solve (FOR SHARE на той же строке), либо попадают в выборку,
+        либо ждут commit и прибавляются к уже построенной таблице.
+        Отметка standings_built_at ставится до выборки в той же транзакции.
+        С only_missing таблица, которую уже построил другой запрос, не
+        перестраивается. После изменения окна или категорий соревнования
+        таблицу перестраивает администратор (POST .../standings/rebuild).
+        Возвращает количество команд в таблице.
+        """
+        competition = self.db.query(Competition).filter(
+            Competition.id == competition_id
+        ).with_for_update().populate_existing().first()
+        if not competition:
+            self.db.rollback()
+            return 0
+
+        if not (only_missing and competition.standings_built_at is not None):
+            competition.standings_built_at = datetime.utcnow()
+            self.db.flush()
+
+            aggregate = select(
+                literal(competition.id),
+                Submission.team_id,
+                func.coalesce(func.sum(Submission.points_awarded), 0),
+                func.count(Submission.id),
+                func.max(Submission.submitted_at)
+            ).join(
+                Challenge, Challenge.id == Submission.challenge_id
+            ).where(
+                *self._solve_conditions(competition)
+            ).group_by(Submission.team_id)
+
+            self.db.execute(delete(CompetitionScore).where(CompetitionScore.competition_id == competition.id))
+            self.db.execute(insert(CompetitionScore).from_select(
+                ["competition_id", "team_id", "score", "solves", "last_solve_at"],
+                aggregate
+            ))
+        self.db.commit()
+
+        return self.db.query(CompetitionScore).filter(CompetitionScore.competition_id == competition.id).count()
+
+    @staticmethod
+    def _build_missing_standings(competition_id: int):
+        """Построение еще не построенной таблицы в собственной сессии"""
+        db = SessionLocal()
+        try:
+            CompetitionService(db).rebuild_standings(competition_id, only_missing=True)
+        finally:
+            db.close()
+
+    def refresh_scores(self, team_ids: List[int]) -> int:
+        """
+        Пересчет очков команд в построенных таблицах по submissions.points_awarded
+
+        Вызывается пересчетом динамической оценки внутри его транзакции
+        (без commit) после того, как points_awarded подешевевших заданий
+        переписаны. Возвращает количество обновленных таблиц.
+        """
+        if not team_ids:
+            return 0
+
+        competitions = self.db.query(Competition).filter(Competition.standings_built_at.isnot(None)).all()
+        for competition in competitions:
+            total = select(
+                func.coalesce(func.sum(Submission.points_awarded), 0)
+            ).join(
+                Challenge, Challenge.id == Submission.challenge_id
+            ).where(
+                Submission.team_id == CompetitionScore.team_id,
+                *self._solve_conditions(competition)
+            ).scalar_subquery()
+
+            self.db.execute(
+                update(CompetitionScore)
+                .where(
+                    CompetitionScore.competition_id == competition.id,
+                    CompetitionScore.team_id.in_(team_ids)
+                )
+                .values(score=total)
+                .execution_options(synchronize_session=False)
+            )
+        return len(competitions)
+
+    def apply_solve(self, team_id: int, category: str, points: int, solved_at: datetime) -> int:
+        """
+        Учет принятого решения в счетах соревнований, в окно которых оно попадает
+
+        Вызывается внутри транзакции записи решения (без commit).
+        Соревнования окна блокируются FOR SHARE до commit решения, поэтому
+        идущее перестроение таблицы (rebuild_standings) либо дожидается
+        решения и включает его в выборку, либо завершается раньше - тогда
+        отметка standings_built_at уже видна и решение прибавляется.
+        Возвращает количество обновленных соревнований.
+        """
+        # standings_built_at проверяется после блокировки: условие в WHERE
+        # вычислялось бы по снимку до commit параллельного перестроения
+        competitions = self.db.query(Competition).filter(
+            Competition.start_time <= solved_at,
+            Competition.end_time >= solved_at
+        ).with_for_update(read=True).populate_existing().all()
+
+        competition_ids = []
+        for competition in competitions:
+            if competition.standings_built_at is None:
+                continue
+            categories = self._allowed_categories(competition)
+            if categories and (category or "").lower() not in categories:
+                continue
+            competition_ids.append(competition.id)
+
+        if competition_ids:
+            self._upsert_scores([
+                {
+                    "competition_id": competition_id,
+                    "team_id": team_id,
+                    "score": points,
+                    "solves": 1,
+                    "last_solve_at": solved_at
+                }
+                for competition_id in competition_ids
+            ])
+        return len(competition_ids)
+
+    def _upsert_scores(self, rows: List[Dict[str, Any]]):
+        """Прибавление очков к счетам через INSERT ... ON CONFLICT DO UPDATE"""
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            latest = func.greatest
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            latest = func.max
+
+        statement = dialect_insert(CompetitionScore).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=["competition_id", "team_id"],
+            set_={
+                "score": CompetitionScore.score + statement.excluded.score,
+                "solves": CompetitionScore.solves + statement.excluded.solves,
+                "last_solve_at": latest(
+                    func.coalesce(CompetitionScore.last_solve_at, statement.excluded.last_solve_at),
+                    statement.excluded.last_solve_at
+                ),
+                "updated_at": func.now()
             }
-            for idx, team in enumerate(teams)
-        ]
\ No newline at end of file
+        )
+        self.db.execute(statement)
+
+    def _solve_conditions(self, competition: Competition) -> list:
+        """Условия принятого решения, которое учитывается в счете соревнования"""
+        conditions = [
+            Submission.status == "accepted",
+            Submission.submitted_at >= competition.start_time,
+            Submission.submitted_at <= competition.end_time
+        ]
+        categories = self._allowed_categories(competition)
+        if categories:
+            conditions.append(func.lower(Challenge.category).in_(categories))
+        return conditions
+
+    def _allowed_categories(self, competition: Competition) -> Optional[List[str]]:
+        """Разрешенные категории в нижнем регистре (None - все категории)"""
+        categories = safe_json_loads(competition.allowed_categories)
+        if not categories:
+            return None
+        return [str(category).lower() for category in categories]
\ No newline at end of file
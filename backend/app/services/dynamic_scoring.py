@@ -0,0 +1,426 @@
+# backend/app/services/dynamic_scoring.py
+import asyncio
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_manager
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.redis_lock import RedisLock
+from app.models.challenge import Challenge
+from app.models.submission import Submission
+from app.models.team import Team
+from app.services.leaderboard_service import TIME_BITS, TIME_EPOCH, TIME_MAX, LeaderboardService
+from app.services.score_counters import TEAM_SCORES_KEY, score_counters
+
+# Те же коэффициенты, что и в ScoringService.calculate_dynamic_score
+MIN_POINTS_RATIO = 0.3
+DECAY = 0.95
+
+ENGINE_LOCK_KEY = "dynamic_scoring:lock"
+# Текущая стоимость заданий (id задания -> очки) для процессов без матрицы
+CHALLENGE_VALUES_KEY = "dynamic_scoring:values"
+
+
+def dynamic_values(base_points: np.ndarray, solve_counts: np.ndarray) -> np.ndarray:
+    """Текущая стоимость заданий по количеству решений (векторный calculate_dynamic_score)"""
+    min_points = base_points * MIN_POINTS_RATIO
+    decayed = np.floor(min_points + (base_points - min_points) * np.power(DECAY, solve_counts))
+    return np.where(solve_counts == 0, base_points, decayed)
+
+
+def dynamic_value(base_points: int, solve_count: int) -> int:
+    """Стоимость одного задания при solve_count решениях"""
+    return int(dynamic_values(np.array([base_points or 0], dtype=np.float32), np.array([solve_count]))[0])
+
+
+class DynamicScoringEngine:
+    """
+    Движок динамической оценки
+
+    Держит в памяти матрицу решений команда × задание. Каждое новое решение
+    удешевляет задание для всех решивших его команд, поэтому после изменений
+    счет всех команд пересчитывается одним матричным умножением, а в БД
+    и таблицу лидеров записываются только изменившиеся значения.
+    Новые решения подгружаются из submissions инкрементально по id, а раз
+    в DYNAMIC_SCORING_RECONCILE_INTERVAL число решений каждого задания
+    сверяется с COUNT принятых отправок: id выдаются до commit, и решение
+    с меньшим id может зафиксироваться позже.
+
+    Вместе со счетом команд пересчет переписывает submissions.points_awarded
+    решений подешевевших заданий и счета команд в таблицах соревнований,
+    поэтому все производные данные считаются по текущей стоимости заданий.
+    """
+
+    def __init__(self):
+        self.team_ids: List[int] = []
+        self.team_rows: Dict[int, int] = {}
+        self.challenge_ids: List[int] = []
+        self.challenge_cols: Dict[int, int] = {}
+
+        self.solves = np.zeros((0, 0), dtype=np.float32)
+        self.base_points = np.zeros(0, dtype=np.float32)
+        self.last_solve = np.zeros(0, dtype=np.int64)
+        # Счет команд и стоимость заданий, записанные в БД последним пересчетом
+        self.team_scores = np.zeros(0, dtype=np.int64)
+        self.challenge_values = np.zeros(0, dtype=np.int64)
+
+        self.last_submission_id = 0
+        self._dirty_rows: set = set()
+        self._lock = threading.Lock()
+        self._reconciled_at = 0.0
+
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._active_checked_at = 0.0
+        self._active = False
+
+    # --- Матрица решений ---
+
+    def _team_row(self, team_id: int) -> int:
+        row = self.team_rows.get(team_id)
+        if row is None:
+            row = len(self.team_ids)
+            self.team_ids.append(team_id)
+            self.team_rows[team_id] = row
+            if row >= self.solves.shape[0]:
+                self._resize(max(64, row * 2), self.solves.shape[1])
+        return row
+
+    def _challenge_col(self, challenge_id: int) -> int:
+        col = self.challenge_cols.get(challenge_id)
+        if col is None:
+            col = len(self.challenge_ids)
+            self.challenge_ids.append(challenge_id)
+            self.challenge_cols[challenge_id] = col
+            if col >= self.solves.shape[1]:
+                self._resize(self.solves.shape[0], max(32, col * 2))
+        return col
+
+    def _resize(self, rows: int, cols: int):
+        """Увеличение емкости с запасом, чтобы не копировать матрицу на каждую новую команду"""
+        solves = np.zeros((rows, cols), dtype=np.float32)
+        solves[:self.solves.shape[0], :self.solves.shape[1]] = self.solves
+        self.solves = solves
+
+        if rows > self.last_solve.shape[0]:
+            self.last_solve = np.concatenate([self.last_solve, np.zeros(rows - self.last_solve.shape[0], dtype=np.int64)])
+            self.team_scores = np.concatenate([self.team_scores, np.zeros(rows - self.team_scores.shape[0], dtype=np.int64)])
+        if cols > self.base_points.shape[0]:
+            self.base_points = np.concatenate([self.base_points, np.zeros(cols - self.base_points.shape[0], dtype=np.float32)])
+            self.challenge_values = np.concatenate([self.challenge_values, np.full(cols - self.challenge_values.shape[0], -1, dtype=np.int64)])
+
+    def set_challenge_points(self, points: Iterable[Tuple[int, int]]):
+        """Базовая стоимость заданий"""
+        for challenge_id, base in points:
+            col = self._challenge_col(challenge_id)
+            self.base_points[col] = base or 0
+
+    def set_team_scores(self, scores: Iterable[Tuple[int, int]]):
+        """Счет команд, который сейчас записан в БД"""
+        for team_id, score in scores:
+            row = self._team_row(team_id)
+            self.team_scores[row] = score or 0
+
+    def add_solves(self, solves: Iterable[Tuple[int, int, Optional[datetime]]]) -> int:
+        """
+        Отметка решений (команда, задание, время) в матрице
+
+        Повторная отметка того же решения ничего не меняет, поэтому
+        перекрывающиеся выборки безопасны. Возвращает число новых решений.
+        """
+        added = 0
+        for team_id, challenge_id, solved_at in solves:
+            row = self._team_row(team_id)
+            col = self._challenge_col(challenge_id)
+            if self.solves[row, col] == 0:
+                self.solves[row, col] = 1
+                self._dirty_rows.add(row)
+                added += 1
+            if solved_at is not None:
+                seconds = int((solved_at - TIME_EPOCH).total_seconds())
+                if seconds > self.last_solve[row]:
+                    self.last_solve[row] = seconds
+        return added
+
+    def compute(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Стоимость заданий и счет всех команд одним проходом"""
+        teams, challenges = len(self.team_ids), len(self.challenge_ids)
+        matrix = self.solves[:teams, :challenges]
+        values = dynamic_values(self.base_points[:challenges], matrix.sum(axis=0))
+        scores = np.rint(matrix @ values.astype(np.float32)).astype(np.int64)
+        return values, scores
+
+    def changed_scores(self) -> Dict[int, int]:
+        """Команды, чей счет отличается от записанного в БД"""
+        _, scores = self.compute()
+        teams = len(self.team_ids)
+        changed = scores != self.team_scores[:teams]
+        # Команды с новыми решениями переписываются всегда: record_solve уже
+        # прибавил им статичные очки задания
+        if self._dirty_rows:
+            changed[list(self._dirty_rows)] = True
+        rows = np.flatnonzero(changed)
+        return {self.team_ids[row]: int(scores[row]) for row in rows}
+
+    def leaderboard_scores(self, team_scores: Dict[int, int]) -> Dict[int, int]:
+        """Составные счета для таблицы лидеров (см. leaderboard_service.encode_score)"""
+        result = {}
+        for team_id, score in team_scores.items():
+            seconds = int(self.last_solve[self.team_rows[team_id]])
+            tiebreak = TIME_MAX - min(max(seconds, 0), TIME_MAX) if seconds else 0
+            result[team_id] = (score << TIME_BITS) + tiebreak
+        return result
+
+    def challenge_value(self, challenge_id: int) -> Optional[int]:
+        """Текущая стоимость задания"""
+        col = self.challenge_cols.get(challenge_id)
+        if col is None:
+            return None
+        values, _ = self.compute()
+        return int(values[col])
+
+    # --- Синхронизация с БД ---
+
+    def sync(self, db: Session, reconcile: bool = False) -> int:
+        """
+        Подгрузка новых решений и стоимости заданий из БД
+
+        Решения после последнего прочитанного id дочитываются по индексу.
+        С reconcile число решений каждого задания сверяется с принятыми
+        отправками: задания, где оно разошлось (решение с меньшим id
+        зафиксировалось позже, отправка удалена), перечитываются целиком.
+        Возвращает число изменившихся решений.
+        """
+        self.set_challenge_points(db.query(Challenge.id, Challenge.points).all())
+
+        if not self.team_ids:
+            self.set_team_scores(db.query(Team.id, Team.score).all())
+
+        rows = db.query(
+            Submission.id,
+            Submission.team_id,
+            Submission.challenge_id,
+            Submission.submitted_at
+        ).filter(
+            Submission.status == "accepted",
+            Submission.id > self.last_submission_id
+        ).order_by(Submission.id).all()
+
+        if rows:
+            self.last_submission_id = rows[-1][0]
+        added = self.add_solves((team_id, challenge_id, submitted_at) for _, team_id, challenge_id, submitted_at in rows)
+        if not reconcile:
+            return added
+
+        counts = dict(db.query(Submission.challenge_id, func.count(Submission.id)).filter(
+            Submission.status == "accepted"
+        ).group_by(Submission.challenge_id).all())
+        matrix_counts = self.solves[:len(self.team_ids), :len(self.challenge_ids)].sum(axis=0)
+        stale = [
+            challenge_id for challenge_id in set(counts) | set(self.challenge_ids)
+            if challenge_id not in self.challenge_cols
+            or counts.get(challenge_id, 0) != int(matrix_counts[self.challenge_cols[challenge_id]])
+        ]
+        if stale:
+            added += self._reload_challenges(db, stale)
+        return added
+
+    def _reload_challenges(self, db: Session, challenge_ids: List[int]) -> int:
+        """Перечитывание всех решений заданий, возвращает число изменившихся отметок"""
+        cols = [self._challenge_col(challenge_id) for challenge_id in challenge_ids]
+        teams = len(self.team_ids)
+        before = self.solves[:teams, cols].copy()
+        dirty = set(self._dirty_rows)
+
+        self.solves[:teams, cols] = 0
+        self.add_solves(db.query(
+            Submission.team_id,
+            Submission.challenge_id,
+            Submission.submitted_at
+        ).filter(
+            Submission.status == "accepted",
+            Submission.challenge_id.in_(challenge_ids)
+        ).all())
+
+        # Новыми считаются только отметки, которых не было до перечитывания
+        after = self.solves[:len(self.team_ids), cols]
+        changed = after[:teams] != before
+        self._dirty_rows = dirty | set(np.flatnonzero(changed.any(axis=1)).tolist()) | set(range(teams, len(self.team_ids)))
+        return int(changed.sum()) + int(after[teams:].sum())
+
+    def recompute(self, db: Session) -> int:
+        """
+        Синхронизация и пересчет счета команд
+
+        Изменившиеся значения записываются одной транзакцией: счет команд
+        пакетным UPDATE по первичному ключу, points_awarded решений
+        подешевевших заданий и счета команд в таблицах соревнований;
+        после commit - одним ZADD в таблицу лидеров. Перед записью строки
+        команд блокируются и решения дочитываются еще раз: решение, которое
+        уже увеличило счет, но не зафиксировано, дожидается и попадает
+        в пересчет, а не перезаписывается. Решение после блокировки прибавит
+        свою стоимость поверх записанного счета и будет учтено следующим
+        пересчетом. Возвращает число обновленных команд.
+        """
+        from app.services.competition_service import CompetitionService
+
+        with self._lock:
+            reconcile = time.monotonic() - self._reconciled_at >= settings.DYNAMIC_SCORING_RECONCILE_INTERVAL
+            if reconcile:
+                self._reconciled_at = time.monotonic()
+            self.sync(db, reconcile=reconcile)
+            changed = self.changed_scores()
+            if not changed:
+                return 0
+
+            db.query(Team.id).filter(Team.id.in_(list(changed))).order_by(Team.id).with_for_update().all()
+            self.sync(db)
+            changed = self.changed_scores()
+            if not changed:
+                db.commit()
+                return 0
+
+            values, _ = self.compute()
+            values = values.astype(np.int64)
+            challenges = len(self.challenge_ids)
+            changed_values = {
+                self.challenge_ids[col]: int(values[col])
+                for col in np.flatnonzero(values != self.challenge_values[:challenges])
+            }
+
+            db.execute(update(Team), [
+                {"id": team_id, "score": score}
+                for team_id, score in changed.items()
+            ])
+            if changed_values:
+                submissions = Submission.__table__
+                db.execute(
+                    update(submissions)
+                    .where(
+                        submissions.c.challenge_id == bindparam("solved_challenge_id"),
+                        submissions.c.status == "accepted",
+                        submissions.c.points_awarded != bindparam("value")
+                    )
+                    .values(points_awarded=bindparam("value")),
+                    [{"solved_challenge_id": challenge_id, "value": value} for challenge_id, value in changed_values.items()]
+                )
+            CompetitionService(db).refresh_scores(list(changed))
+            db.commit()
+
+            for team_id, score in changed.items():
+                self.team_scores[self.team_rows[team_id]] = score
+            self.challenge_values[:challenges] = values
+            self._dirty_rows.clear()
+
+            # Иначе отложенная запись вернула бы в БД прежний счет
+            score_counters.set_values(TEAM_SCORES_KEY, changed)
+            self._publish_values(values)
+
+            LeaderboardService(db).set_scores(self.leaderboard_scores(changed))
+            return len(changed)
+
+    def _publish_values(self, values: np.ndarray):
+        """Стоимость заданий для рядов счета в других процессах"""
+        try:
+            cache_manager.redis_client.hset(CHALLENGE_VALUES_KEY, mapping={
+                challenge_id: int(value) for challenge_id, value in zip(self.challenge_ids, values)
+            })
+        except Exception as e:
+            print(f"⚠️ Не удалось сохранить стоимость заданий: {e}")
+
+    @staticmethod
+    def published_values() -> Dict[int, int]:
+        """Стоимость заданий, записанная последним пересчетом (пусто, если Redis недоступен)"""
+        try:
+            raw = cache_manager.redis_client.hgetall(CHALLENGE_VALUES_KEY)
+        except Exception:
+            return {}
+        return {int(challenge_id): int(value) for challenge_id, value in raw.items()}
+
+    def is_active(self, db: Session) -> bool:
+        """Динамическая оценка включена в текущем соревновании"""
+        from app.services.competition_service import CompetitionService
+
+        if time.monotonic() - self._active_checked_at > 10:
+            competition = CompetitionService(db).get_current_competition()
+            self._active = bool(competition and competition.scoring_type == "dynamic")
+            self._active_checked_at = time.monotonic()
+        return self._active
+
+    def run_once(self) -> int:
+        """Пересчет под межпроцессной блокировкой (пересчитывает один воркер)"""
+        db = SessionLocal()
+        try:
+            if not self.is_active(db):
+                return 0
+
+            lock = RedisLock(ENGINE_LOCK_KEY)
+            try:
+                acquired = lock.acquire()
+            except Exception:
+                # Без Redis пересчет идемпотентен - выполняем без блокировки
+                acquired = True
+            if not acquired:
+                return 0
+
+            try:
+                return self.recompute(db)
+            finally:
+                lock.release()
+        finally:
+            db.close()
+
+    # --- Фоновый пересчет ---
+
+    def notify(self):
+        """Разбудить пересчет после записи нового решения"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self):
+        """Запуск фонового пересчета"""
+        self.running = True
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        print("📉 Движок динамической оценки запущен")
+
+    async def stop(self):
+        """Остановка фонового пересчета"""
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+
+        while self.running:
+            try:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.DYNAMIC_SCORING_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+                await loop.run_in_executor(None, self.run_once)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Ошибка пересчета динамической оценки: {e}")
+                await asyncio.sleep(1)
+
+
+# Глобальный экземпляр движка динамической оценки
+dynamic_scoring = DynamicScoringEngine()
@@ -2,26 +2,26 @@
 from sqlalchemy.orm import Session
 from app.models.challenge import Challenge
 from app.core.security import validate_flag_format
+from app.services.challenge_index import challenge_index, IndexedChallenge
+from app.services.challenge_catalog import challenge_catalog
 
 class FlagService:
     def __init__(self, db: Session):
         self.db = db
 
-    def verify_flag(self, challenge_id: int, submitted_flag: str) -> bool:
-        """Проверка правильности флага"""
+    def verify_flag(self, challenge_id: int, submitted_flag: str,
+                    challenge: IndexedChallenge = None) -> bool:
+        """Проверка правильности флага по индексу заданий (без запроса к БД)"""
         if not validate_flag_format(submitted_flag):
             return False
 
-        challenge = self.db.query(Challenge).filter(
-            Challenge.id == challenge_id,
-            Challenge.is_active == True
-        ).first()
+        if challenge is None:
+            challenge = challenge_index.get(self.db, challenge_id)
 
-        if not challenge:
+        if not challenge or not challenge.is_active:
             return False
 
-        # Простая проверка (в реальной системе может быть сложнее)
-        return challenge.flag == submitted_flag
+        return challenge.check_flag(submitted_flag)
 
     def generate_flag(self, challenge_id: int) -> str:
         """Генерация флага для задания"""
@@ -40,4 +40,5 @@ class FlagService:
             new_flag = self.generate_flag(challenge.id)
             challenge.flag = new_flag
         
-        self.db.commit()
\ No newline at end of file
+        self.db.commit()
+        challenge_catalog.invalidate()
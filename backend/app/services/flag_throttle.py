@@ -0,0 +1,268 @@
+# backend/app/services/flag_throttle.py
+import asyncio
+import hashlib
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import bindparam, event, update
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_manager
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.redis_lock import RedisLock
+from app.models.submission import Submission
+
+# Состояние пары команда-задание: fails, until (мкс по часам Redis),
+# f:{хэш флага} -> id отправки, в которой этот неверный флаг уже записан
+THROTTLE_KEY = "flag_throttle:{team_id}:{challenge_id}"
+# Повторы неверных флагов, еще не перенесенные в submissions.attempts: id отправки -> число
+REPEATS_KEY = "flag_throttle:repeats"
+REPEATS_FLUSHING_KEY = "flag_throttle:repeats:flushing"
+FLUSH_LOCK_KEY = "flag_throttle:flush_lock"
+
+# Ключ в Session.info для неверных флагов, которые запоминаются после commit
+PENDING_WRONG_FLAGS_KEY = "flag_throttle_pending"
+
+# Оставшаяся пауза пары (мкс), 0 - попытки разрешены
+CHECK_SCRIPT = """
+local until_at = tonumber(redis.call('HGET', KEYS[1], 'until') or 0)
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000000 + tonumber(now_parts[2])
+if until_at > now then
+    return until_at - now
+end
+return 0
+"""
+
+# Учет неверной попытки: счетчик подряд, пауза после free попыток
+# (base * 2^n, не больше max) и поиск такого же флага среди записанных.
+# ARGV: хэш флага, free, base (мкс), max (мкс), TTL состояния (с)
+# Ответ: {id отправки с тем же флагом или 0, пауза (мкс)}
+RECORD_WRONG_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000000 + tonumber(now_parts[2])
+local fails = redis.call('HINCRBY', KEYS[1], 'fails', 1)
+local free = tonumber(ARGV[2])
+local delay = 0
+if fails > free then
+    delay = math.min(tonumber(ARGV[3]) * 2 ^ (fails - free - 1), tonumber(ARGV[4]))
+    redis.call('HSET', KEYS[1], 'until', string.format('%d', now + delay))
+end
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+
+local submission_id = redis.call('HGET', KEYS[1], 'f:' .. ARGV[1])
+if submission_id then
+    redis.call('HINCRBY', KEYS[2], submission_id, 1)
+    return {tonumber(submission_id), string.format('%d', delay)}
+end
+return {0, string.format('%d', delay)}
+"""
+
+
+class FlagThrottle:
+    """
+    Адаптивное ограничение неверных флагов по паре команда-задание
+
+    После FLAG_THROTTLE_FREE_ATTEMPTS неверных попыток подряд каждая
+    следующая удваивает паузу (до FLAG_THROTTLE_MAX_DELAY), в паузе
+    отправка отклоняется до проверки флага. Верный флаг или
+    FLAG_THROTTLE_TTL без попыток сбрасывают счетчик.
+
+    Неверный флаг, который команда уже отправляла, не записывается
+    заново: ответ строится по ранее записанной отправке, а повтор
+    увеличивает счетчик в Redis, который фоновый перенос добавляет
+    в submissions.attempts пакетным UPDATE. Так перебор одних и тех же
+    флагов не создает строк submissions и audit_logs.
+
+    Если Redis недоступен, ограничение не действует.
+    """
+
+    def __init__(self):
+        self.free_attempts = settings.FLAG_THROTTLE_FREE_ATTEMPTS
+        self.base_delay = settings.FLAG_THROTTLE_BASE_DELAY
+        self.max_delay = settings.FLAG_THROTTLE_MAX_DELAY
+        self.ttl = settings.FLAG_THROTTLE_TTL
+        self.flush_interval = settings.FLAG_THROTTLE_FLUSH_INTERVAL
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+        self._scripts = {}
+
+    @property
+    def enabled(self) -> bool:
+        return settings.FLAG_THROTTLE_ENABLED
+
+    @staticmethod
+    def flag_digest(flag: str) -> str:
+        return hashlib.sha256(flag.encode("utf-8")).hexdigest()[:16]
+
+    # --- Проверка ---
+
+    def retry_after(self, team_id: int, challenge_id: int) -> float:
+        """Секунд до следующей разрешенной попытки (0 - можно отправлять)"""
+        if not self.enabled:
+            return 0.0
+        try:
+            remaining = self._script(CHECK_SCRIPT)(keys=[THROTTLE_KEY.format(team_id=team_id, challenge_id=challenge_id)])
+        except Exception as e:
+            print(f"⚠️ Ограничение неверных флагов недоступно: {e}")
+            return 0.0
+        return int(remaining) / 1_000_000
+
+    def record_wrong(self, team_id: int, challenge_id: int, flag: str) -> Tuple[Optional[int], float]:
+        """
+        Учет неверного флага
+
+        Returns:
+            (id отправки, в которой этот флаг уже записан, или None;
+             пауза до следующей попытки в секундах)
+        """
+        if not self.enabled:
+            return None, 0.0
+        try:
+            submission_id, delay = self._script(RECORD_WRONG_SCRIPT)(
+                keys=[THROTTLE_KEY.format(team_id=team_id, challenge_id=challenge_id), REPEATS_KEY],
+                args=[
+                    self.flag_digest(flag),
+                    self.free_attempts,
+                    int(self.base_delay * 1_000_000),
+                    int(self.max_delay * 1_000_000),
+                    self.ttl
+                ]
+            )
+        except Exception as e:
+            print(f"⚠️ Ограничение неверных флагов недоступно: {e}")
+            return None, 0.0
+        return int(submission_id) or None, int(delay) / 1_000_000
+
+    def remember_wrong(self, db: Session, team_id: int, challenge_id: int, flag: str, submission_id: int):
+        """Записанный неверный флаг - запоминается после commit текущей транзакции"""
+        if self.enabled:
+            db.info.setdefault(PENDING_WRONG_FLAGS_KEY, []).append(
+                (team_id, challenge_id, self.flag_digest(flag), submission_id)
+            )
+
+    def apply_wrong_flags(self, flags: Iterable[Tuple[int, int, str, int]]):
+        """Запоминание записанных неверных флагов одним pipeline"""
+        try:
+            pipe = cache_manager.redis_client.pipeline(transaction=False)
+            for team_id, challenge_id, digest, submission_id in flags:
+                key = THROTTLE_KEY.format(team_id=team_id, challenge_id=challenge_id)
+                pipe.hsetnx(key, f"f:{digest}", submission_id)
+                pipe.expire(key, self.ttl)
+            pipe.execute()
+        except Exception as e:
+            print(f"⚠️ Не удалось запомнить неверные флаги: {e}")
+
+    def reset(self, team_id: int, challenge_id: int):
+        """Сброс после решения задания"""
+        if not self.enabled:
+            return
+        try:
+            cache_manager.redis_client.delete(THROTTLE_KEY.format(team_id=team_id, challenge_id=challenge_id))
+        except Exception as e:
+            print(f"⚠️ Не удалось сбросить ограничение неверных флагов: {e}")
+
+    def _script(self, source: str):
+        client = cache_manager.redis_client
+        script = self._scripts.get(source)
+        if script is None or script.registered_client is not client:
+            script = self._scripts[source] = client.register_script(source)
+        return script
+
+    # --- Перенос повторов в БД ---
+
+    def flush_repeats(self) -> int:
+        """Перенос накопленных повторов в submissions.attempts под межпроцессной блокировкой, возвращает число строк"""
+        lock = RedisLock(FLUSH_LOCK_KEY)
+        try:
+            # Перенос запускается в каждом воркере: снимок обрабатывает только один
+            if not lock.acquire():
+                return 0
+        except Exception as e:
+            print(f"⚠️ Повторы неверных флагов недоступны: {e}")
+            return 0
+
+        try:
+            return self._flush_snapshot()
+        finally:
+            lock.release()
+
+    def _flush_snapshot(self) -> int:
+        redis = cache_manager.redis_client
+        # Недоперенесенный снимок (сбой прошлого переноса) обрабатывается первым,
+        # новые повторы копятся в REPEATS_KEY до следующего вызова
+        if not redis.exists(REPEATS_FLUSHING_KEY):
+            if not redis.exists(REPEATS_KEY):
+                return 0
+            redis.rename(REPEATS_KEY, REPEATS_FLUSHING_KEY)
+        repeats = redis.hgetall(REPEATS_FLUSHING_KEY)
+
+        rows = [{"submission_id": int(submission_id), "repeats": int(count)} for submission_id, count in repeats.items()]
+        if rows:
+            db = SessionLocal()
+            try:
+                db.execute(
+                    update(Submission.__table__)
+                    .where(Submission.__table__.c.id == bindparam("submission_id"))
+                    .values(attempts=Submission.__table__.c.attempts + bindparam("repeats")),
+                    rows
+                )
+                db.commit()
+            finally:
+                db.close()
+        # Снимок удаляется только после commit: при ошибке его перенесет следующий вызов
+        redis.delete(REPEATS_FLUSHING_KEY)
+        return len(rows)
+
+    async def start(self):
+        """Запуск фонового переноса повторов"""
+        self.running = True
+        self._task = asyncio.create_task(self._run())
+        print("🚦 Ограничение неверных флагов запущено")
+
+    async def stop(self):
+        """Остановка с последним переносом"""
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await asyncio.get_event_loop().run_in_executor(None, self.flush_repeats)
+        except Exception as e:
+            print(f"⚠️ Не удалось перенести повторы неверных флагов при остановке: {e}")
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+
+        while self.running:
+            try:
+                await asyncio.sleep(self.flush_interval)
+                await loop.run_in_executor(None, self.flush_repeats)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Ошибка переноса повторов неверных флагов: {e}")
+                await asyncio.sleep(1)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_wrong_flags(session: Session):
+    """Неверный флаг запоминается только после фиксации его отправки"""
+    flags = session.info.pop(PENDING_WRONG_FLAGS_KEY, None)
+    if flags:
+        flag_throttle.apply_wrong_flags(flags)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending_wrong_flags(session: Session, transaction):
+    """Откат внешней транзакции отбрасывает отложенные флаги"""
+    if transaction.parent is None and not transaction.nested:
+        session.info.pop(PENDING_WRONG_FLAGS_KEY, None)
+
+
+# Глобальный экземпляр ограничения неверных флагов
+flag_throttle = FlagThrottle()
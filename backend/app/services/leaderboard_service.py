@@ -0,0 +1,292 @@
+# backend/app/services/leaderboard_service.py
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, event, func
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_manager
+from app.models.submission import Submission
+from app.models.team import Team
+from app.models.user import User
+from app.services.score_counters import TEAM_SCORES_KEY, score_counters
+
+LEADERBOARD_KEY = "leaderboard:teams"
+LEADERBOARD_BUILT_KEY = "leaderboard:built"
+# Увеличивается при каждом изменении рейтинга - по нему подписчики узнают о новых данных
+LEADERBOARD_VERSION_KEY = "leaderboard:version"
+
+# Ключ в Session.info для изменений, которые применяются после commit
+PENDING_UPDATES_KEY = "leaderboard_updates"
+
+# Под время последнего решения отводятся младшие 32 бита счета:
+# секунд от TIME_EPOCH хватает на ~136 лет, очки занимают старшие разряды
+# (точность double сохраняется до ~2 млн очков)
+TIME_BITS = 32
+TIME_EPOCH = datetime(2020, 1, 1)
+TIME_MAX = 2 ** TIME_BITS - 1
+
+
+def encode_score(points: int, last_solve_at: Optional[datetime] = None) -> int:
+    """
+    Составной счет для ZSET: очки и время последнего решения
+
+    При равных очках выше стоит команда, набравшая их раньше.
+    Команды без решений получают нулевую временную часть.
+    """
+    if last_solve_at is None:
+        tiebreak = 0
+    else:
+        seconds = int((last_solve_at - TIME_EPOCH).total_seconds())
+        tiebreak = TIME_MAX - min(max(seconds, 0), TIME_MAX)
+    return ((points or 0) << TIME_BITS) + tiebreak
+
+
+def decode_points(score: float) -> int:
+    """Очки из составного счета"""
+    return int(score) >> TIME_BITS
+
+
+class LeaderboardService:
+    """
+    Таблица лидеров на Redis sorted set
+
+    Позиция команды определяется ZREVRANK за O(log n), страница рейтинга -
+    ZREVRANGE. Счет обновляется инкрементально при записи решения
+    (ZADD GT после commit транзакции) и может быть перестроен из БД.
+    Если Redis недоступен, данные отдаются запросом к БД.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.redis = cache_manager.redis_client
+
+    # --- Обновление ---
+
+    def record_score(self, team_id: int, points: int, solved_at: Optional[datetime] = None):
+        """Новый счет команды - применяется к ZSET после commit текущей транзакции"""
+        score = encode_score(points, solved_at or datetime.utcnow())
+        pending = self.db.info.setdefault(PENDING_UPDATES_KEY, {})
+        pending[team_id] = max(score, pending.get(team_id, score))
+
+    def track_team(self, team_id: int):
+        """Новая команда без решений - попадает в рейтинг после commit"""
+        pending = self.db.info.setdefault(PENDING_UPDATES_KEY, {})
+        pending.setdefault(team_id, encode_score(0))
+
+    def remove_team(self, team_id: int):
+        """Удаление команды из рейтинга"""
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.zrem(LEADERBOARD_KEY, team_id)
+            pipe.incr(LEADERBOARD_VERSION_KEY)
+            pipe.execute()
+        except Exception as e:
+            print(f"⚠️ Не удалось удалить команду из таблицы лидеров: {e}")
+
+    def set_scores(self, scores: Dict[int, int]):
+        """Прямая запись составных счетов (без GT, например после пересчета очков)"""
+        if not scores:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.zadd(LEADERBOARD_KEY, scores)
+            pipe.incr(LEADERBOARD_VERSION_KEY)
+            pipe.execute()
+        except Exception as e:
+            print(f"⚠️ Не удалось обновить таблицу лидеров: {e}")
+
+    @staticmethod
+    def apply_updates(updates: Dict[int, int]):
+        """
+        Применение составных счетов через ZADD GT
+
+        GT оставляет больший счет, поэтому обновления из параллельных
+        транзакций можно применять в любом порядке.
+        """
+        try:
+            pipe = cache_manager.redis_client.pipeline(transaction=False)
+            pipe.zadd(LEADERBOARD_KEY, updates, gt=True)
+            pipe.incr(LEADERBOARD_VERSION_KEY)
+            pipe.execute()
+        except Exception as e:
+            print(f"⚠️ Не удалось обновить таблицу лидеров: {e}")
+
+    def rebuild(self) -> int:
+        """
+        Перестроение рейтинга из БД, возвращает количество команд
+
+        В режиме отложенной записи teams.score может отставать от счетчиков
+        в Redis, поэтому загруженные счетчики важнее значений из БД.
+        """
+        last_solves = self.db.query(
+            Team.id,
+            Team.score,
+            func.max(Submission.submitted_at)
+        ).outerjoin(
+            Submission,
+            and_(Submission.team_id == Team.id, Submission.status == "accepted")
+        ).group_by(Team.id, Team.score).all()
+
+        pending = score_counters.get_values(TEAM_SCORES_KEY)
+        scores = {
+            team_id: encode_score(pending.get(team_id, score or 0), last_solve_at)
+            for team_id, score, last_solve_at in last_solves
+        }
+
+        # Новая версия собирается во временном ключе и атомарно заменяет старую
+        temp_key = f"{LEADERBOARD_KEY}:rebuild"
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(temp_key)
+        items = list(scores.items())
+        for start in range(0, len(items), 5000):
+            pipe.zadd(temp_key, dict(items[start:start + 5000]))
+        if items:
+            pipe.rename(temp_key, LEADERBOARD_KEY)
+        else:
+            pipe.delete(LEADERBOARD_KEY)
+        pipe.set(LEADERBOARD_BUILT_KEY, datetime.utcnow().isoformat())
+        pipe.incr(LEADERBOARD_VERSION_KEY)
+        pipe.execute()
+
+        return len(scores)
+
+    def _ensure_built(self):
+        """Ленивое построение рейтинга (например, после перезапуска Redis)"""
+        if not self.redis.exists(LEADERBOARD_BUILT_KEY):
+            self.rebuild()
+
+    # --- Чтение ---
+
+    @staticmethod
+    def get_version() -> Optional[int]:
+        """Версия рейтинга (None, если Redis недоступен)"""
+        return cache_manager.get_counter(LEADERBOARD_VERSION_KEY)
+
+    def get_rank(self, team_id: int) -> Optional[int]:
+        """Позиция команды в рейтинге (с 1) или None"""
+        try:
+            self._ensure_built()
+            rank = self.redis.zrevrank(LEADERBOARD_KEY, team_id)
+            return rank + 1 if rank is not None else None
+        except Exception as e:
+            print(f"⚠️ Таблица лидеров недоступна в Redis: {e}")
+            return self._sql_rank(team_id)
+
+    def get_total(self) -> int:
+        """Количество команд в рейтинге"""
+        try:
+            self._ensure_built()
+            return self.redis.zcard(LEADERBOARD_KEY)
+        except Exception as e:
+            print(f"⚠️ Таблица лидеров недоступна в Redis: {e}")
+            return self.db.query(Team).count()
+
+    def get_top(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """Страница рейтинга начиная с позиции offset + 1"""
+        if limit <= 0:
+            return []
+        try:
+            self._ensure_built()
+            entries = self.redis.zrevrange(
+                LEADERBOARD_KEY, offset, offset + limit - 1, withscores=True
+            )
+        except Exception as e:
+            print(f"⚠️ Таблица лидеров недоступна в Redis: {e}")
+            return self._sql_standings(limit, offset)
+
+        return self._with_details(
+            [(int(member), decode_points(score)) for member, score in entries],
+            offset + 1
+        )
+
+    def get_around(self, team_id: int, radius: int = 5) -> Dict[str, Any]:
+        """Команда и ее соседи по рейтингу"""
+        position = self.get_rank(team_id)
+        if position is None:
+            return {"position": None, "leaderboard": []}
+
+        offset = max(position - 1 - radius, 0)
+        return {
+            "position": position,
+            "leaderboard": self.get_top(limit=position - offset + radius, offset=offset)
+        }
+
+    def _with_details(self, entries: List[tuple], first_position: int) -> List[Dict[str, Any]]:
+        """Данные команд для страницы рейтинга - два запроса на всю страницу"""
+        team_ids = [team_id for team_id, _ in entries]
+        if not team_ids:
+            return []
+
+        teams = {
+            team.id: team
+            for team in self.db.query(Team).filter(Team.id.in_(team_ids)).all()
+        }
+        member_counts = dict(
+            self.db.query(User.team_id, func.count(User.id))
+            .filter(User.team_id.in_(team_ids))
+            .group_by(User.team_id)
+            .all()
+        )
+
+        leaderboard = []
+        for position, (team_id, points) in enumerate(entries, start=first_position):
+            team = teams.get(team_id)
+            if team is None:
+                # Команда удалена, а рейтинг еще не перестроен
+                continue
+            leaderboard.append({
+                "position": position,
+                "id": team.id,
+                "name": team.name,
+                "score": points,
+                "country": team.country,
+                "member_count": member_counts.get(team_id, 0)
+            })
+        return leaderboard
+
+    # --- Запасной вариант на БД ---
+
+    def _last_solve_subquery(self):
+        return self.db.query(
+            Submission.team_id.label("team_id"),
+            func.max(Submission.submitted_at).label("last_solve_at")
+        ).filter(
+            Submission.status == "accepted"
+        ).group_by(Submission.team_id).subquery()
+
+    def _sql_standings(self, limit: int, offset: int) -> List[Dict[str, Any]]:
+        last_solve = self._last_solve_subquery()
+        rows = self.db.query(
+            Team.id, func.coalesce(Team.score, 0)
+        ).outerjoin(
+            last_solve, last_solve.c.team_id == Team.id
+        ).order_by(
+            func.coalesce(Team.score, 0).desc(),
+            last_solve.c.last_solve_at.is_(None),
+            last_solve.c.last_solve_at.asc(),
+            Team.id.desc()
+        ).offset(offset).limit(limit).all()
+        return self._with_details([(team_id, score) for team_id, score in rows], offset + 1)
+
+    def _sql_rank(self, team_id: int) -> Optional[int]:
+        score = self.db.query(Team.score).filter(Team.id == team_id).scalar()
+        if score is None and not self.db.query(Team.id).filter(Team.id == team_id).first():
+            return None
+        higher = self.db.query(Team).filter(func.coalesce(Team.score, 0) > (score or 0)).count()
+        return higher + 1
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_updates(session: Session):
+    """Изменения рейтинга попадают в Redis только после фиксации транзакции"""
+    updates = session.info.pop(PENDING_UPDATES_KEY, None)
+    if updates:
+        LeaderboardService.apply_updates(updates)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending_updates(session: Session, transaction):
+    """Откат внешней транзакции отбрасывает отложенные изменения рейтинга"""
+    if transaction.parent is None and not transaction.nested:
+        session.info.pop(PENDING_UPDATES_KEY, None)
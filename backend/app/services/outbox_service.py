@@ -0,0 +1,391 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.audit_log import AuditLog
+from app.models.outbox_event import OutboxEvent
+
+
+class OutboxService:
+    """Запись побочных эффектов в outbox в той же транзакции, что и данные"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def add_event(self, event_type: str, payload: Dict[str, Any]) -> OutboxEvent:
+        """Добавление события (без commit - фиксируется вместе с транзакцией)"""
+        event = OutboxEvent(event_type=event_type, payload=payload)
+        self.db.add(event)
+        return event
+
+    def add_events(self, events: List[Dict[str, Any]]):
+        """Пакетное добавление событий через executemany"""
+        if events:
+            self.db.execute(insert(OutboxEvent), [
+                {
+                    "event_type": event["event_type"],
+                    "payload": event["payload"],
+                    "next_attempt_at": datetime.utcnow()
+                }
+                for event in events
+            ])
+
+    def get_failed(self, limit: int = 100, offset: int = 0) -> List[OutboxEvent]:
+        """События, доставка которых исчерпала попытки, от новых к старым"""
+        return self.db.query(OutboxEvent).filter(
+            OutboxEvent.status == "failed"
+        ).order_by(OutboxEvent.id.desc()).offset(offset).limit(limit).all()
+
+    def count_failed(self) -> int:
+        return self.db.query(OutboxEvent).filter(OutboxEvent.status == "failed").count()
+
+    def replay_failed(self, event_ids: Optional[List[int]] = None) -> int:
+        """
+        Возврат неудачных событий в очередь доставки с новым счетчиком попыток
+
+        Без event_ids возвращаются все неудачные события.
+        Возвращает количество возвращенных событий.
+        """
+        query = self.db.query(OutboxEvent).filter(OutboxEvent.status == "failed")
+        if event_ids is not None:
+            query = query.filter(OutboxEvent.id.in_(event_ids))
+        replayed = query.update({
+            OutboxEvent.status: "pending",
+            OutboxEvent.attempts: 0,
+            OutboxEvent.next_attempt_at: datetime.utcnow()
+        }, synchronize_session=False)
+        self.db.commit()
+        return replayed
+
+
+def build_flag_submission_events(user_id: int,
+                                 username: str,
+                                 team_id: int,
+                                 team_name: str,
+                                 challenge_id: int,
+                                 challenge_title: str,
+                                 submission_id: int,
+                                 status: str,
+                                 points: int,
+                                 is_first_blood: bool,
+                                 submitted_at: datetime,
+                                 audit: bool = True,
+                                 team_broadcast: bool = True) -> List[Dict[str, Any]]:
+    """Побочные эффекты отправки флага в виде событий outbox"""
+    timestamp = submitted_at.isoformat()
+    submission_data = {
+        "submission_id": submission_id,
+        "user_id": user_id,
+        "team_id": team_id,
+        "challenge_id": challenge_id,
+        "status": status,
+        "points": points,
+        "is_first_blood": is_first_blood,
+        "timestamp": timestamp
+    }
+    events = []
+
+    if audit:
+        events.append({"event_type": "audit", "payload": {
+            "user_id": user_id,
+            "action": "flag_submission",
+            "resource_type": "challenge",
+            "resource_id": challenge_id,
+            "details": {"submission_id": submission_id, "is_first_blood": is_first_blood},
+            "status": status,
+            "timestamp": timestamp
+        }})
+
+    events.append({"event_type": "telegram.flag_submission", "payload": {
+        "username": username,
+        "challenge_title": challenge_title,
+        "status": status
+    }})
+    events.append({"event_type": "plugin_hook", "payload": {
+        "hook": "on_flag_submission",
+        "data": submission_data
+    }})
+
+    if status == "accepted":
+        if team_broadcast:
+            events.append({"event_type": "websocket.team", "payload": {
+                "team_id": team_id,
+                "message": {
+                    "type": "team_flag_submitted",
+                    "user_id": user_id,
+                    "username": username,
+                    "challenge_id": challenge_id,
+                    "challenge_title": challenge_title,
+                    "points": points,
+                    "is_first_blood": is_first_blood,
+                    "timestamp": timestamp
+                }
+            }})
+        events.append({"event_type": "plugin_hook", "payload": {
+            "hook": "on_challenge_solve",
+            "data": submission_data
+        }})
+
+    if is_first_blood:
+        events.append({"event_type": "telegram.first_blood", "payload": {
+            "username": username,
+            "challenge_title": challenge_title,
+            "team_name": team_name
+        }})
+
+    return events
+
+
+async def deliver_telegram_flag_submission(payload: Dict[str, Any]):
+    from app.services.telegram_service import TelegramService
+    sent = await TelegramService().send_flag_submission_notification(
+        payload["username"], payload["challenge_title"], payload["status"]
+    )
+    if sent is False:
+        raise RuntimeError("Не удалось отправить уведомление в Telegram")
+
+
+async def deliver_telegram_first_blood(payload: Dict[str, Any]):
+    from app.services.telegram_service import TelegramService
+    sent = await TelegramService().send_first_blood_notification(
+        payload["username"], payload["challenge_title"], payload["team_name"]
+    )
+    if sent is False:
+        raise RuntimeError("Не удалось отправить уведомление в Telegram")
+
+
+async def deliver_websocket_team(payload: Dict[str, Any]):
+    from app.api.websocket import manager as websocket_manager
+    await websocket_manager.broadcast_to_team(payload["team_id"], payload["message"])
+
+
+async def deliver_websocket_user(payload: Dict[str, Any]):
+    from app.api.websocket import manager as websocket_manager
+    await websocket_manager.send_personal_message(payload["user_id"], payload["message"])
+
+
+async def deliver_websocket_all(payload: Dict[str, Any]):
+    from app.api.websocket import manager as websocket_manager
+    await websocket_manager.broadcast_to_all(payload["message"])
+
+
+async def deliver_plugin_hook(payload: Dict[str, Any]):
+    from app.plugins import plugin_manager
+    await plugin_manager.execute_hook(payload["hook"], payload["data"])
+
+
+class OutboxDispatcher:
+    """
+    Фоновая доставка событий outbox с повторными попытками.
+
+    События забираются пачками (FOR UPDATE SKIP LOCKED на PostgreSQL),
+    помечаются как processing на время доставки и после нее
+    становятся delivered либо откладываются с экспоненциальной задержкой.
+    """
+
+    # Время, через которое событие в статусе processing считается потерянным
+    LEASE_SECONDS = 60
+
+    def __init__(self):
+        self.handlers: Dict[str, Callable] = {
+            "telegram.flag_submission": deliver_telegram_flag_submission,
+            "telegram.first_blood": deliver_telegram_first_blood,
+            "websocket.team": deliver_websocket_team,
+            "websocket.user": deliver_websocket_user,
+            "websocket.all": deliver_websocket_all,
+            "plugin_hook": deliver_plugin_hook,
+        }
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_purge = time.monotonic()
+
+    def register_handler(self, event_type: str, handler: Callable):
+        """Регистрация обработчика для типа события"""
+        self.handlers[event_type] = handler
+
+    def notify(self):
+        """Разбудить диспетчер сразу после коммита новых событий"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self):
+        """Запуск фоновой доставки"""
+        self.running = True
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        print("📤 Диспетчер outbox запущен")
+
+    async def stop(self):
+        """Остановка доставки"""
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+
+        while self.running:
+            try:
+                delivered = await self.dispatch_once(loop)
+                if delivered < settings.OUTBOX_BATCH_SIZE:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), settings.OUTBOX_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Ошибка диспетчера outbox: {e}")
+                await asyncio.sleep(1)
+
+    async def dispatch_once(self, loop=None) -> int:
+        """Один цикл доставки, возвращает количество обработанных событий"""
+        loop = loop or asyncio.get_event_loop()
+        # Очистка по своему интервалу: при постоянном потоке событий пустых пакетов не бывает
+        if time.monotonic() - self._last_purge >= settings.OUTBOX_PURGE_INTERVAL:
+            self._last_purge = time.monotonic()
+            await loop.run_in_executor(None, self.purge_delivered)
+
+        events = await loop.run_in_executor(None, self._claim_batch)
+        if not events:
+            return 0
+
+        outcomes: Dict[int, Optional[str]] = {}
+
+        # Записи аудита вставляются одной пачкой
+        audit_events = [event for event in events if event["event_type"] == "audit"]
+        if audit_events:
+            try:
+                await loop.run_in_executor(None, self._write_audit, [e["payload"] for e in audit_events])
+                outcomes.update({event["id"]: None for event in audit_events})
+            except Exception as e:
+                outcomes.update({event["id"]: str(e) for event in audit_events})
+
+        other_events = [event for event in events if event["event_type"] != "audit"]
+        results = await asyncio.gather(
+            *(self._deliver(event) for event in other_events),
+            return_exceptions=True
+        )
+        for event, result in zip(other_events, results):
+            outcomes[event["id"]] = str(result) if isinstance(result, BaseException) else None
+
+        await loop.run_in_executor(None, self._finalize, events, outcomes)
+        return len(events)
+
+    async def _deliver(self, event: Dict[str, Any]):
+        handler = self.handlers.get(event["event_type"])
+        if handler is None:
+            raise ValueError(f"Нет обработчика для события {event['event_type']}")
+        await handler(event["payload"])
+
+    def _claim_batch(self) -> List[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            events = db.query(OutboxEvent).filter(
+                or_(OutboxEvent.status == "pending", OutboxEvent.status == "processing"),
+                OutboxEvent.next_attempt_at <= now
+            ).order_by(OutboxEvent.id).limit(
+                settings.OUTBOX_BATCH_SIZE
+            ).with_for_update(skip_locked=True).all()
+
+            claimed = []
+            for event in events:
+                event.status = "processing"
+                event.attempts = (event.attempts or 0) + 1
+                event.next_attempt_at = now + timedelta(seconds=self.LEASE_SECONDS)
+                claimed.append({
+                    "id": event.id,
+                    "event_type": event.event_type,
+                    "payload": event.payload,
+                    "attempts": event.attempts
+                })
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    def _write_audit(self, payloads: List[Dict[str, Any]]):
+        db = SessionLocal()
+        try:
+            db.execute(insert(AuditLog), [
+                {
+                    "user_id": payload.get("user_id"),
+                    "action": payload["action"],
+                    "resource_type": payload["resource_type"],
+                    "resource_id": payload.get("resource_id"),
+                    "details": payload.get("details") or {},
+                    "severity": payload.get("severity", "info"),
+                    "status": payload.get("status", "success"),
+                    "timestamp": datetime.fromisoformat(payload["timestamp"]) if payload.get("timestamp") else datetime.utcnow()
+                }
+                for payload in payloads
+            ])
+            db.commit()
+        finally:
+            db.close()
+
+    def _finalize(self, events: List[Dict[str, Any]], outcomes: Dict[int, Optional[str]]):
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            attempts = {event["id"]: event["attempts"] for event in events}
+            rows = db.query(OutboxEvent).filter(OutboxEvent.id.in_(list(outcomes.keys()))).all()
+
+            for row in rows:
+                error = outcomes[row.id]
+                if error is None:
+                    row.status = "delivered"
+                    row.delivered_at = now
+                    row.last_error = None
+                elif attempts[row.id] >= settings.OUTBOX_MAX_ATTEMPTS:
+                    row.status = "failed"
+                    row.last_error = error
+                else:
+                    row.status = "pending"
+                    row.last_error = error
+                    row.next_attempt_at = now + timedelta(seconds=min(2 ** attempts[row.id], 300))
+            db.commit()
+        finally:
+            db.close()
+
+    def purge_delivered(self) -> int:
+        """
+        Удаление доставленных событий старше срока хранения
+
+        Неудачные события удаляются по более длинному сроку
+        (OUTBOX_FAILED_RETENTION_HOURS от создания): до этого их можно
+        посмотреть и отправить повторно через админку.
+        """
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            deleted = db.query(OutboxEvent).filter(
+                OutboxEvent.status == "delivered",
+                OutboxEvent.delivered_at < now - timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+            ).delete(synchronize_session=False)
+            deleted += db.query(OutboxEvent).filter(
+                OutboxEvent.status == "failed",
+                OutboxEvent.created_at < now - timedelta(hours=settings.OUTBOX_FAILED_RETENTION_HOURS)
+            ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+
+# Глобальный экземпляр диспетчера outbox
+outbox_dispatcher = OutboxDispatcher()
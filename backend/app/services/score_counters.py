@@ -0,0 +1,292 @@
+# backend/app/services/score_counters.py
+import asyncio
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, update
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_manager
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.redis_lock import RedisLock
+from app.models.challenge import Challenge
+from app.models.submission import Submission
+from app.models.team import Team
+
+CHALLENGE_SOLVES_KEY = "score_counters:challenge_solves"
+TEAM_SCORES_KEY = "score_counters:team_scores"
+DIRTY_KEY = "{counter}:dirty"
+FLUSH_LOCK_KEY = "score_counters:flush_lock"
+
+# Счетчик (hash в Redis) -> модель и колонка, куда он переносится
+COUNTERS = {
+    CHALLENGE_SOLVES_KEY: (Challenge, "solved_count"),
+    TEAM_SCORES_KEY: (Team, "score"),
+}
+
+# Ключ в Session.info для увеличений, которые откатываются вместе с транзакцией
+PENDING_INCREMENTS_KEY = "score_counters_pending"
+
+# Увеличение только загруженного из БД счетчика с отметкой для переноса в БД.
+# Незагруженное поле не создается с нуля - иначе в БД ушло бы одно приращение
+INCREMENT_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then
+    return false
+end
+redis.call('SADD', KEYS[2], ARGV[1])
+return redis.call('HINCRBY', KEYS[1], ARGV[1], ARGV[2])
+"""
+
+
+class ScoreCounters:
+    """
+    Отложенная запись счетчиков решений и очков команд
+
+    В режиме write_behind решение не обновляет строки challenges и teams:
+    solved_count и score хранятся в Redis абсолютными значениями
+    (HINCRBY отдает новое значение так же, как UPDATE ... RETURNING),
+    а измененные строки переносятся в БД фоновым сбросом пакетными UPDATE
+    по первичному ключу. Поле загружается из БД при первом обращении.
+
+    Увеличение выполняется до commit и откатывается вместе с транзакцией.
+    Расхождения, которые остаются после сбоя процесса между увеличением
+    и commit, потери данных Redis или обновления строки в обход счетчика
+    (когда Redis был недоступен), исправляет reconcile() по submissions.
+    """
+
+    def __init__(self):
+        self.batch_size = settings.SCORE_COUNTERS_BATCH_SIZE
+        self.flush_interval = settings.SCORE_COUNTERS_FLUSH_INTERVAL
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+        self._script = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.SCORE_COUNTERS_MODE == "write_behind"
+
+    # --- Запись ---
+
+    def increment(self, db: Session, counter: str, row_id: int, delta: int) -> Optional[int]:
+        """
+        Увеличение счетчика строки в рамках транзакции db
+
+        Returns:
+            Новое значение или None, если Redis недоступен
+            (тогда вызывающий код обновляет строку в БД)
+        """
+        try:
+            value = self._increment(counter, row_id, delta)
+            if value is None:
+                model, column = COUNTERS[counter]
+                current = db.query(getattr(model, column)).filter(model.id == row_id).scalar()
+                cache_manager.redis_client.hsetnx(counter, row_id, current or 0)
+                value = self._increment(counter, row_id, delta)
+        except Exception as e:
+            print(f"⚠️ Счетчики в Redis недоступны, запись в БД: {e}")
+            return None
+
+        if value is None:
+            return None
+        db.info.setdefault(PENDING_INCREMENTS_KEY, []).append((counter, row_id, delta))
+        return value
+
+    def _increment(self, counter: str, row_id: int, delta: int) -> Optional[int]:
+        if self._script is None:
+            self._script = cache_manager.redis_client.register_script(INCREMENT_SCRIPT)
+        value = self._script(keys=[counter, DIRTY_KEY.format(counter=counter)], args=[row_id, delta])
+        return int(value) if value is not None else None
+
+    def compensate(self, increments: Iterable[Tuple[str, int, int]]):
+        """Откат увеличений транзакции, которая не была зафиксирована"""
+        for counter, row_id, delta in increments:
+            try:
+                self._increment(counter, row_id, -delta)
+            except Exception as e:
+                print(f"⚠️ Не удалось откатить счетчик {counter}:{row_id}: {e}")
+
+    def set_values(self, counter: str, values: Dict[int, int]):
+        """Запись значений, которые уже сохранены в БД (например, после пересчета очков)"""
+        if not values or not self.enabled:
+            return
+        try:
+            cache_manager.redis_client.hset(counter, mapping=values)
+        except Exception as e:
+            print(f"⚠️ Не удалось обновить счетчики {counter}: {e}")
+
+    # --- Чтение ---
+
+    def get_values(self, counter: str, row_ids: Optional[List[int]] = None) -> Dict[int, int]:
+        """Текущие значения счетчиков (пусто, если слой выключен или Redis недоступен)"""
+        if not self.enabled:
+            return {}
+        try:
+            if row_ids is None:
+                raw = cache_manager.redis_client.hgetall(counter).items()
+            else:
+                if not row_ids:
+                    return {}
+                raw = zip(row_ids, cache_manager.redis_client.hmget(counter, row_ids))
+        except Exception:
+            return {}
+        return {int(row_id): int(value) for row_id, value in raw if value is not None}
+
+    def team_score(self, team_id: int, stored_score: Optional[int]) -> int:
+        """Счет команды с учетом еще не перенесенных в БД решений"""
+        return self.get_values(TEAM_SCORES_KEY, [team_id]).get(team_id, stored_score or 0)
+
+    # --- Перенос в БД ---
+
+    def flush_once(self) -> int:
+        """Перенос измененных счетчиков в БД под межпроцессной блокировкой, возвращает число строк"""
+        lock = RedisLock(FLUSH_LOCK_KEY)
+        try:
+            if not lock.acquire():
+                return 0
+        except Exception:
+            return 0
+
+        db = SessionLocal()
+        try:
+            return sum(self._flush_counter(db, counter) for counter in COUNTERS)
+        finally:
+            db.close()
+            lock.release()
+
+    def _flush_counter(self, db: Session, counter: str) -> int:
+        model, column = COUNTERS[counter]
+        redis = cache_manager.redis_client
+        dirty_key = DIRTY_KEY.format(counter=counter)
+        flushed = 0
+
+        while True:
+            # Увеличение после SPOP снова отметит строку - значение не потеряется
+            row_ids = sorted(int(row_id) for row_id in redis.spop(dirty_key, self.batch_size) or [])
+            if not row_ids:
+                return flushed
+
+            values = redis.hmget(counter, row_ids)
+            rows = [
+                {"id": row_id, column: int(value)}
+                for row_id, value in zip(row_ids, values)
+                if value is not None
+            ]
+            try:
+                if rows:
+                    db.execute(update(model), rows)
+                    db.commit()
+            except Exception:
+                db.rollback()
+                redis.sadd(dirty_key, *row_ids)
+                raise
+
+            flushed += len(rows)
+            if len(row_ids) < self.batch_size:
+                return flushed
+
+    def reconcile(self, db: Session) -> Dict[str, int]:
+        """
+        Сверка счетчиков с принятыми отправками
+
+        Расхождение применяется приращением (в Redis для загруженных полей,
+        иначе в строке БД), поэтому параллельные решения не теряются.
+        Решение, не зафиксированное в момент сверки, исправит следующая сверка.
+        Очки команд при динамической оценке считает DynamicScoringEngine,
+        они не сверяются. Возвращает число исправленных строк по счетчикам.
+        """
+        from app.services.dynamic_scoring import dynamic_scoring
+
+        expected = {
+            CHALLENGE_SOLVES_KEY: dict(db.query(Challenge.id, func.count(Submission.id)).outerjoin(
+                Submission, (Submission.challenge_id == Challenge.id) & (Submission.status == "accepted")
+            ).group_by(Challenge.id).all())
+        }
+        if not dynamic_scoring.is_active(db):
+            expected[TEAM_SCORES_KEY] = dict(db.query(Team.id, func.coalesce(func.sum(Submission.points_awarded), 0)).outerjoin(
+                Submission, (Submission.team_id == Team.id) & (Submission.status == "accepted")
+            ).group_by(Team.id).all())
+
+        fixed = {}
+        for counter, values in expected.items():
+            model, column = COUNTERS[counter]
+            loaded = self.get_values(counter)
+            stored = {row_id: value or 0 for row_id, value in db.query(model.id, getattr(model, column)).all()}
+            current = {**stored, **loaded}
+
+            # Строки, отстающие от Redis, уходят в БД со следующим переносом
+            unflushed = [row_id for row_id, value in loaded.items() if stored.get(row_id, value) != value]
+            if unflushed:
+                cache_manager.redis_client.sadd(DIRTY_KEY.format(counter=counter), *unflushed)
+
+            fixed[counter] = 0
+            for row_id, value in values.items():
+                drift = int(value) - current.get(row_id, 0)
+                if not drift:
+                    continue
+                if row_id not in loaded or self._increment(counter, row_id, drift) is None:
+                    db.execute(
+                        update(model)
+                        .where(model.id == row_id)
+                        .values({column: func.coalesce(getattr(model, column), 0) + drift})
+                    )
+                fixed[counter] += 1
+            db.commit()
+
+        if self.enabled:
+            self.flush_once()
+        return fixed
+
+    # --- Фоновый перенос ---
+
+    async def start(self):
+        """Запуск фонового переноса счетчиков в БД"""
+        self.running = True
+        self._task = asyncio.create_task(self._run())
+        print("🧮 Отложенная запись счетчиков запущена")
+
+    async def stop(self):
+        """Остановка с последним переносом"""
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await asyncio.get_event_loop().run_in_executor(None, self.flush_once)
+        except Exception as e:
+            print(f"⚠️ Не удалось перенести счетчики при остановке: {e}")
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+
+        while self.running:
+            try:
+                await asyncio.sleep(self.flush_interval)
+                await loop.run_in_executor(None, self.flush_once)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Ошибка переноса счетчиков в БД: {e}")
+                await asyncio.sleep(1)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_committed_increments(session: Session):
+    """Зафиксированные увеличения остаются в счетчиках"""
+    session.info.pop(PENDING_INCREMENTS_KEY, None)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _compensate_rolled_back_increments(session: Session, transaction):
+    """Откат внешней транзакции откатывает и увеличения счетчиков"""
+    if transaction.parent is None and not transaction.nested:
+        increments = session.info.pop(PENDING_INCREMENTS_KEY, None)
+        if increments:
+            score_counters.compensate(increments)
+
+
+# Глобальный экземпляр счетчиков
+score_counters = ScoreCounters()
@@ -0,0 +1,323 @@
+# backend/app/services/score_timeline.py
+import struct
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_manager
+from app.core.redis_lock import RedisLock
+from app.models.submission import Submission
+from app.services.dynamic_scoring import DynamicScoringEngine, dynamic_scoring
+from app.services.leaderboard_service import TIME_EPOCH, LeaderboardService
+
+# v4: ряды хранятся поколениями, читатели находят текущее по указателю
+TIMELINE_PREFIX = "score_timeline:v4:"
+TIMELINE_SERIES_PREFIX = TIMELINE_PREFIX + "series:"
+TIMELINE_KEY = TIMELINE_SERIES_PREFIX + "{generation}:{team_id}"
+TIMELINE_GENERATION_KEY = TIMELINE_PREFIX + "generation"
+TIMELINE_BUILDING_KEY = TIMELINE_PREFIX + "building"
+TIMELINE_COUNTER_KEY = TIMELINE_PREFIX + "generations"
+TIMELINE_LOCK_KEY = TIMELINE_PREFIX + "lock"
+
+# Страховочный TTL метки строящегося поколения (если процесс упал во время сборки)
+TIMELINE_BUILDING_TTL = 600
+# Сколько живут ряды прежнего поколения после переключения (для уже начатых чтений)
+TIMELINE_RETIRED_TTL = 60
+# Сколько ждет чтение, пока ряды строит другой процесс
+TIMELINE_BUILD_WAIT = 5.0
+
+# Ключ в Session.info для точек, которые дописываются после commit
+PENDING_POINTS_KEY = "score_timeline_points"
+
+# Точка ряда: секунды от TIME_EPOCH, id задания и начисленные очки, 12 байт
+POINT = struct.Struct("<Iii")
+
+# Точки дописываются в текущее поколение и в строящееся, если оно есть.
+# Оба номера читаются в том же скрипте, поэтому переключение поколения
+# не может произойти между чтением номера и APPEND.
+# KEYS: указатель, метка сборки; ARGV: префикс рядов, затем пары (команда, точка)
+APPEND_SCRIPT = """
+local generations = redis.call('MGET', KEYS[1], KEYS[2])
+for _, generation in ipairs(generations) do
+    if generation then
+        for i = 2, #ARGV, 2 do
+            redis.call('APPEND', ARGV[1] .. generation .. ':' .. ARGV[i], ARGV[i + 1])
+        end
+    end
+end
+return 0
+"""
+
+
+def encode_point(timestamp: datetime, challenge_id: int, points: int) -> bytes:
+    seconds = max(int((timestamp - TIME_EPOCH).total_seconds()), 0)
+    return POINT.pack(seconds, challenge_id, points)
+
+
+def decode_series(raw: Optional[bytes], values: Optional[Dict[int, int]] = None) -> List[Tuple[int, int]]:
+    """
+    Разбор ряда в список (секунды от TIME_EPOCH, накопленный счет), отсортированный по времени
+
+    values - текущая стоимость заданий при динамической оценке: она заменяет
+    очки, записанные в точках, как и в счете команды. Задание учитывается
+    один раз: точку решения могут записать и перестроение, и дописывание
+    во время него.
+    """
+    if not raw:
+        return []
+    usable = len(raw) - len(raw) % POINT.size
+    points = [POINT.unpack_from(raw, offset) for offset in range(0, usable, POINT.size)]
+    # Параллельные транзакции могут дописать точки не по порядку:
+    # счет накапливается уже после сортировки
+    points.sort()
+    values = values or {}
+    series = []
+    seen = set()
+    score = 0
+    for seconds, challenge_id, awarded in points:
+        if challenge_id in seen:
+            continue
+        seen.add(challenge_id)
+        score += values.get(challenge_id, awarded)
+        series.append((seconds, score))
+    return series
+
+
+def downsample(points: List[Tuple[int, int]], start: int, end: int, resolution: int) -> List[Tuple[int, int]]:
+    """
+    Ступенчатый ряд на resolution равных интервалах [start, end]
+
+    Для каждой границы интервала берется последний счет на этот момент.
+    """
+    if resolution < 2 or end <= start:
+        resolution = max(resolution, 1)
+        return [(end, points[-1][1] if points else 0)]
+
+    step = (end - start) / (resolution - 1)
+    result = []
+    index = 0
+    score = 0
+    for bucket in range(resolution):
+        moment = int(start + step * bucket)
+        while index < len(points) and points[index][0] <= moment:
+            score = points[index][1]
+            index += 1
+        result.append((moment, score))
+    return result
+
+
+class ScoreTimelineService:
+    """
+    Ряды счета команд во времени
+
+    Для каждой команды в Redis хранится строка из упакованных точек
+    (время, задание, начисленные очки), к которой после каждого принятого
+    решения дописывается одна точка через APPEND; накопленный счет считается
+    при чтении. График топа строится из этих рядов без обращения к таблице
+    submissions и может быть перестроен из нее.
+
+    При динамической оценке очки каждой точки при чтении заменяются текущей
+    стоимостью задания из последнего пересчета (DynamicScoringEngine), как
+    в счете команды и submissions.points_awarded, поэтому конец ряда
+    совпадает со счетом команды и подешевление заданий не требует
+    перестроения рядов.
+
+    Перестроение пишет ряды в новое поколение ключей и переключает на него
+    указатель одной командой, а прежнее поколение удаляется по TTL: чтения
+    не видят частично построенных рядов. Пока поколение строится, точки
+    после commit дописываются и в него (см. APPEND_SCRIPT), поэтому решения,
+    принятые во время выборки, не теряются. Строит ряды только владелец
+    блокировки TIMELINE_LOCK_KEY.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.redis = cache_manager.redis_client
+
+    def record_point(self, team_id: int, challenge_id: int, points: int, solved_at: Optional[datetime] = None):
+        """Очки, начисленные за решение, - дописываются после commit текущей транзакции"""
+        pending = self.db.info.setdefault(PENDING_POINTS_KEY, [])
+        pending.append((team_id, encode_point(solved_at or datetime.utcnow(), challenge_id, points)))
+
+    @staticmethod
+    def append_points(points: List[Tuple[int, bytes]]):
+        """Дописывание точек в текущее и строящееся поколения одним скриптом"""
+        args = [TIMELINE_SERIES_PREFIX]
+        for team_id, point in points:
+            args.extend((team_id, point))
+        try:
+            cache_manager.redis_client.eval(
+                APPEND_SCRIPT, 2, TIMELINE_GENERATION_KEY, TIMELINE_BUILDING_KEY, *args
+            )
+        except Exception as e:
+            print(f"⚠️ Не удалось обновить ряды счета: {e}")
+
+    def rebuild(self) -> Optional[int]:
+        """
+        Перестроение рядов из принятых отправок в новом поколении
+
+        Возвращает количество команд или None, если ряды уже строит
+        другой процесс.
+        """
+        lock = RedisLock(TIMELINE_LOCK_KEY)
+        if not lock.acquire():
+            return None
+        try:
+            return self._build_generation()
+        finally:
+            lock.release()
+
+    def _build_generation(self) -> int:
+        generation = self.redis.incr(TIMELINE_COUNTER_KEY)
+        # Метка ставится до выборки: решения, зафиксированные после снимка,
+        # дописываются в новое поколение после своего commit
+        self.redis.set(TIMELINE_BUILDING_KEY, generation, ex=TIMELINE_BUILDING_TTL)
+
+        try:
+            rows = self.db.query(
+                Submission.team_id,
+                Submission.challenge_id,
+                Submission.submitted_at,
+                Submission.points_awarded
+            ).filter(
+                Submission.status == "accepted"
+            ).order_by(
+                Submission.team_id, Submission.submitted_at, Submission.id
+            ).yield_per(10000)
+
+            series: Dict[int, bytearray] = {}
+            for team_id, challenge_id, submitted_at, points in rows:
+                series.setdefault(team_id, bytearray()).extend(
+                    encode_point(submitted_at or datetime.utcnow(), challenge_id, points or 0)
+                )
+
+            # APPEND, а не SET: точки, уже дописанные в поколение во время
+            # выборки, сохраняются (повторы отбрасывает decode_series)
+            pipe = self.redis.pipeline(transaction=False)
+            for team_id, raw in series.items():
+                pipe.append(TIMELINE_KEY.format(generation=generation, team_id=team_id), bytes(raw))
+            pipe.execute()
+        except Exception:
+            # Недостроенное поколение не получает новых точек и истечет при следующем перестроении
+            self.redis.delete(TIMELINE_BUILDING_KEY)
+            raise
+
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.set(TIMELINE_GENERATION_KEY, generation)
+        pipe.delete(TIMELINE_BUILDING_KEY)
+        pipe.execute()
+
+        self._retire_old_keys(generation)
+        return len(series)
+
+    def _retire_old_keys(self, generation: int):
+        """Прежние поколения истекают по TTL, ряды прежних форматов удаляются"""
+        current = TIMELINE_KEY.format(generation=generation, team_id="")
+        pipe = self.redis.pipeline(transaction=False)
+        for key in self.redis.scan_iter(match="score_timeline:*", count=1000):
+            name = key.decode() if isinstance(key, bytes) else key
+            if not name.startswith(TIMELINE_PREFIX):
+                pipe.delete(key)
+            elif name.startswith(TIMELINE_SERIES_PREFIX) and not name.startswith(current):
+                pipe.expire(key, TIMELINE_RETIRED_TTL)
+        pipe.execute()
+
+    def _current_generation(self) -> Optional[int]:
+        """
+        Номер текущего поколения
+
+        Без указателя (например, после перезапуска Redis) ряды строятся
+        лениво: строит один вызов, остальные ждут указатель до
+        TIMELINE_BUILD_WAIT секунд.
+        """
+        generation = self.redis.get(TIMELINE_GENERATION_KEY)
+        if generation is not None:
+            return int(generation)
+
+        if self.rebuild() is None:
+            deadline = time.monotonic() + TIMELINE_BUILD_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                generation = self.redis.get(TIMELINE_GENERATION_KEY)
+                if generation is not None:
+                    return int(generation)
+            return None
+
+        generation = self.redis.get(TIMELINE_GENERATION_KEY)
+        return int(generation) if generation is not None else None
+
+    def get_series(self, team_ids: List[int]) -> Dict[int, List[Tuple[int, int]]]:
+        """Ряды нескольких команд за один запрос к Redis"""
+        if not team_ids:
+            return {}
+        generation = self._current_generation()
+        if generation is None:
+            return {team_id: [] for team_id in team_ids}
+        raw_values = self.redis.mget([
+            TIMELINE_KEY.format(generation=generation, team_id=team_id) for team_id in team_ids
+        ])
+        values = DynamicScoringEngine.published_values() if dynamic_scoring.is_active(self.db) else None
+        return {team_id: decode_series(raw, values) for team_id, raw in zip(team_ids, raw_values)}
+
+    def get_top_timelines(self,
+                          top: int = 10,
+                          resolution: int = 100,
+                          start: Optional[datetime] = None,
+                          end: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Ряды счета команд из топа, приведенные к resolution точкам
+
+        Без start берется время первого решения среди выбранных команд,
+        без end - текущий момент.
+        """
+        teams = LeaderboardService(self.db).get_top(limit=top)
+        series = self.get_series([team["id"] for team in teams])
+
+        end_seconds = int(((end or datetime.utcnow()) - TIME_EPOCH).total_seconds())
+        if start is not None:
+            start_seconds = int((start - TIME_EPOCH).total_seconds())
+        else:
+            first_points = [points[0][0] for points in series.values() if points]
+            start_seconds = min(first_points) if first_points else end_seconds
+
+        def to_iso(seconds: int) -> str:
+            return (TIME_EPOCH + timedelta(seconds=seconds)).isoformat()
+
+        return {
+            "start": to_iso(start_seconds),
+            "end": to_iso(end_seconds),
+            "resolution": resolution,
+            "teams": [
+                {
+                    "id": team["id"],
+                    "name": team["name"],
+                    "position": team["position"],
+                    "score": team["score"],
+                    "series": [
+                        [to_iso(moment), score]
+                        for moment, score in downsample(
+                            series.get(team["id"], []), start_seconds, end_seconds, resolution
+                        )
+                    ]
+                }
+                for team in teams
+            ]
+        }
+
+
+@event.listens_for(Session, "after_commit")
+def _append_pending_points(session: Session):
+    """Точки попадают в Redis только после фиксации транзакции"""
+    points = session.info.pop(PENDING_POINTS_KEY, None)
+    if points:
+        ScoreTimelineService.append_points(points)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending_points(session: Session, transaction):
+    """Откат внешней транзакции отбрасывает отложенные точки"""
+    if transaction.parent is None and not transaction.nested:
+        session.info.pop(PENDING_POINTS_KEY, None)
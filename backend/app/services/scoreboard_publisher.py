@@ -0,0 +1,220 @@
+# backend/app/services/scoreboard_publisher.py
+import asyncio
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.challenge import Challenge
+from app.models.submission import Submission
+from app.models.team import Team
+from app.models.user import User
+from app.services.leaderboard_service import LeaderboardService
+
+SCOREBOARD_CHANNEL = "scoreboard"
+
+
+class ScoreboardPublisher:
+    """
+    Трансляция изменений таблицы лидеров подписчикам канала scoreboard
+
+    Раз в тик публикатор сверяет версию рейтинга в Redis и, если она изменилась,
+    один раз пересчитывает топ и рассылает всем подписчикам только разницу
+    с предыдущим состоянием: изменившиеся позиции и очки, выбывшие команды
+    и новые First Blood. Каждое изменение получает порядковый номер, последние
+    изменения хранятся в кольцевом буфере для догоняющей синхронизации.
+    """
+
+    def __init__(self):
+        self.tick_interval = settings.SCOREBOARD_TICK_INTERVAL
+        self.top_n = settings.SCOREBOARD_TOP_N
+        # Номера изменений уникальны в пределах epoch (запуска процесса)
+        self.epoch = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self.standings: Dict[int, Dict[str, Any]] = {}
+        self.history: deque = deque(maxlen=settings.SCOREBOARD_HISTORY_SIZE)
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+        self._version: Optional[int] = None
+        # Задания, First Blood которых уже разослан (None - еще не загружены)
+        self._announced_first_bloods: Optional[Set[int]] = None
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        """Запуск тикера"""
+        self.running = True
+        self._task = asyncio.create_task(self._run())
+        print("📡 Трансляция таблицы лидеров запущена")
+
+    async def stop(self):
+        """Остановка тикера"""
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        from app.api.websocket import manager as websocket_manager
+
+        while self.running:
+            try:
+                await asyncio.sleep(self.tick_interval)
+                # Без подписчиков ничего не считаем
+                if websocket_manager.channel_size(SCOREBOARD_CHANNEL):
+                    await self.tick()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Ошибка трансляции таблицы лидеров: {e}")
+
+    async def tick(self) -> Optional[Dict[str, Any]]:
+        """Один тик: пересчет при изменении версии и рассылка разницы"""
+        from app.api.websocket import manager as websocket_manager
+
+        async with self._lock:
+            version = LeaderboardService.get_version()
+            # Если Redis недоступен, версии нет - пересчитываем на каждом тике
+            if version is not None and version == self._version and self.standings:
+                return None
+
+            loop = asyncio.get_event_loop()
+            top, first_bloods = await loop.run_in_executor(None, self._load_state)
+            self._version = version
+
+            delta = self._apply(top, first_bloods)
+            if delta is None:
+                return None
+
+        await websocket_manager.broadcast_to_channel(SCOREBOARD_CHANNEL, delta)
+        return delta
+
+    def _load_state(self):
+        db = SessionLocal()
+        try:
+            top = LeaderboardService(db).get_top(limit=self.top_n)
+            return top, self._load_first_bloods(db)
+        finally:
+            db.close()
+
+    def _load_first_bloods(self, db) -> List[Dict[str, Any]]:
+        """
+        Новые First Blood с прошлого тика
+
+        Новые определяются по заданиям с first_blood_user_id, которых еще
+        нет в множестве разосланных, а не по id отправки: id выдаются до
+        commit, и решение с меньшим id может стать видимым позже. Задание
+        отмечается разосланным, только когда видна сама отправка (при
+        отложенной записи она появляется позже отметки в задании).
+        """
+        solved = {
+            challenge_id for (challenge_id,) in db.query(Challenge.id).filter(
+                Challenge.first_blood_user_id.isnot(None)
+            )
+        }
+        if self._announced_first_bloods is None:
+            # При запуске историю не рассылаем
+            self._announced_first_bloods = solved
+            return []
+
+        new_ids = solved - self._announced_first_bloods
+        if not new_ids:
+            return []
+
+        rows = db.query(
+            Submission.challenge_id,
+            Submission.submitted_at,
+            Challenge.title,
+            Team.id,
+            Team.name,
+            User.username
+        ).join(
+            Challenge, Challenge.id == Submission.challenge_id
+        ).join(
+            Team, Team.id == Submission.team_id
+        ).join(
+            User, User.id == Submission.user_id
+        ).filter(
+            Submission.is_first_blood == True,
+            Submission.challenge_id.in_(new_ids)
+        ).order_by(Submission.submitted_at, Submission.id).all()
+
+        first_bloods = []
+        for challenge_id, submitted_at, challenge_title, team_id, team_name, username in rows:
+            if challenge_id in self._announced_first_bloods:
+                continue
+            self._announced_first_bloods.add(challenge_id)
+            first_bloods.append({
+                "challenge_id": challenge_id,
+                "challenge_title": challenge_title,
+                "team_id": team_id,
+                "team_name": team_name,
+                "username": username,
+                "timestamp": submitted_at.isoformat() if submitted_at else None
+            })
+        return first_bloods
+
+    def _apply(self, top: List[Dict[str, Any]], first_bloods: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Сравнение нового топа с текущим состоянием, возвращает изменение или None"""
+        new_standings = {entry["id"]: entry for entry in top}
+
+        changes = [
+            entry for team_id, entry in new_standings.items()
+            if self.standings.get(team_id) != entry
+        ]
+        removed = [team_id for team_id in self.standings if team_id not in new_standings]
+        self.standings = new_standings
+
+        if not changes and not removed and not first_bloods:
+            return None
+
+        self.seq += 1
+        delta = {
+            "type": "scoreboard_delta",
+            "epoch": self.epoch,
+            "seq": self.seq,
+            "changes": sorted(changes, key=lambda entry: entry["position"]),
+            "removed": removed,
+            "first_bloods": first_bloods,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        self.history.append(delta)
+        return delta
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Полное состояние топа с номером последнего изменения"""
+        return {
+            "type": "scoreboard_snapshot",
+            "epoch": self.epoch,
+            "seq": self.seq,
+            "leaderboard": sorted(self.standings.values(), key=lambda entry: entry["position"]),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    def messages_since(self, epoch: Optional[str], seq: Optional[int]) -> List[Dict[str, Any]]:
+        """
+        Сообщения для догоняющей синхронизации клиента
+
+        Если пропущенные изменения еще в буфере, возвращаются только они,
+        иначе - снимок текущего состояния.
+        """
+        if epoch == self.epoch and seq is not None:
+            if seq == self.seq:
+                return []
+            if self.history and self.history[0]["seq"] <= seq + 1 and seq < self.seq:
+                return [delta for delta in self.history if delta["seq"] > seq]
+        return [self.snapshot()]
+
+    async def ensure_loaded(self):
+        """Загрузка состояния для первого подписчика"""
+        if not self.standings:
+            await self.tick()
+
+
+# Глобальный экземпляр публикатора
+scoreboard_publisher = ScoreboardPublisher()
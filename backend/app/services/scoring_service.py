@@ -1,49 +1,157 @@
-# backend/app/services/scoring_service.py
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import update, case, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.models.team import Team
 from app.models.challenge import Challenge
 from app.models.submission import Submission
+from app.services.team_solves import TeamSolvesService
+from app.services.score_counters import CHALLENGE_SOLVES_KEY, TEAM_SCORES_KEY, score_counters
+from app.services.competition_service import CompetitionService
+from app.services.leaderboard_service import LeaderboardService
+from app.services.score_timeline import ScoreTimelineService
+from app.services.dynamic_scoring import dynamic_scoring, dynamic_value
 
 class ScoringService:
     def __init__(self, db: Session):
         self.db = db
 
-    def award_points(self, team_id: int, challenge_id: int, user_id: int) -> bool:
-        """Начисление очков за решение задания"""
-        challenge = self.db.query(Challenge).filter(Challenge.id == challenge_id).first()
-        team = self.db.query(Team).filter(Team.id == team_id).first()
-        
-        if not challenge or not team:
-            return False
-
-        # Проверяем, первое ли это решение (First Blood)
-        is_first_blood = self.db.query(Submission).filter(
-            Submission.challenge_id == challenge_id,
-            Submission.status == "accepted"
-        ).count() == 0
-
-        # Начисляем очки
-        points = challenge.points
-        team.score += points
-
-        # Обновляем статистику задания
-        challenge.solved_count += 1
-        if is_first_blood:
-            challenge.first_blood_user_id = user_id
-
-        # Обновляем submission
-        submission = self.db.query(Submission).filter(
-            Submission.team_id == team_id,
-            Submission.challenge_id == challenge_id,
-            Submission.user_id == user_id
-        ).order_by(Submission.submitted_at.desc()).first()
-
-        if submission:
-            submission.points_awarded = points
+    def record_solve(self,
+                     team_id: int,
+                     user_id: int,
+                     challenge_id: int,
+                     flag: str,
+                     points: int,
+                     submitted_at: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        Атомарная запись решения задания
+
+        points - базовая стоимость задания. При динамической оценке команде
+        начисляется стоимость с учетом этого решения (dynamic_value), а
+        подешевление задания для остальных решивших применяет DynamicScoringEngine.
+        Счетчик решений и очки команды увеличиваются через UPDATE ... RETURNING,
+        First Blood определяется по новому значению счетчика, а повторное решение
+        отсекается частичным уникальным индексом на принятых отправках.
+        В режиме отложенной записи (см. ScoreCounters) счетчики увеличиваются
+        в Redis, а строки заданий и команд не блокируются.
+        Изменения не фиксируются - commit остается за вызывающим кодом.
+
+        Returns:
+            None, если команда уже решила задание, иначе словарь с отправкой,
+            признаком First Blood и новыми значениями счетчиков
+        """
+        # Одно время решения для отправки, рейтинга, рядов счета и соревнований
+        submitted_at = submitted_at or datetime.utcnow()
+        write_behind = score_counters.enabled
+        dynamic = dynamic_scoring.is_active(self.db)
+
+        savepoint = self.db.begin_nested()
+        try:
+            if write_behind:
+                solved_count = team_score = None
+                category, stored_count = self.db.query(
+                    Challenge.category, Challenge.solved_count
+                ).filter(Challenge.id == challenge_id).one()
+                if dynamic:
+                    # Счетчик увеличится после вставки - стоимость по следующему значению
+                    current = score_counters.get_values(CHALLENGE_SOLVES_KEY, [challenge_id]).get(challenge_id, stored_count or 0)
+                    points = dynamic_value(points, current + 1)
+            else:
+                solved_count, category = self._increment_solved_count(challenge_id, user_id)
+                if dynamic:
+                    points = dynamic_value(points, solved_count)
+                team_score = self._increment_team_score(team_id, points)
+
+            is_first_blood = solved_count == 1
+            submission = Submission(
+                team_id=team_id,
+                user_id=user_id,
+                challenge_id=challenge_id,
+                flag=flag,
+                status="accepted",
+                points_awarded=points,
+                is_first_blood=is_first_blood,
+                submitted_at=submitted_at
+            )
+            self.db.add(submission)
+            self.db.flush()
+
+            # Счета соревнований, в окно которых попадает решение
+            CompetitionService(self.db).apply_solve(team_id, category, points, submitted_at)
+            savepoint.commit()
+        except IntegrityError:
+            # Команда уже решила задание - откатываем и счетчики
+            savepoint.rollback()
+            return None
+
+        if write_behind:
+            # Счетчики увеличиваются только после успешной вставки отправки
+            solved_count = score_counters.increment(self.db, CHALLENGE_SOLVES_KEY, challenge_id, 1)
+            if solved_count is None:
+                solved_count, _ = self._increment_solved_count(challenge_id, user_id)
+                is_first_blood = solved_count == 1
+            else:
+                is_first_blood = solved_count == 1 and self._claim_first_blood(challenge_id, user_id)
             submission.is_first_blood = is_first_blood
 
-        self.db.commit()
-        return is_first_blood
+            team_score = score_counters.increment(self.db, TEAM_SCORES_KEY, team_id, points)
+            if team_score is None:
+                team_score = self._increment_team_score(team_id, points)
+
+        # Таблица лидеров, ряд счета и кэш решений обновятся после commit вызывающего кода
+        LeaderboardService(self.db).record_score(team_id, team_score, submitted_at)
+        ScoreTimelineService(self.db).record_point(team_id, challenge_id, points, submitted_at)
+        TeamSolvesService(self.db).record_solve(team_id, challenge_id)
+
+        return {
+            "submission": submission,
+            "is_first_blood": is_first_blood,
+            "solved_count": solved_count,
+            "team_score": team_score
+        }
+
+    def _increment_solved_count(self, challenge_id: int, user_id: int) -> Tuple[int, str]:
+        """Счетчик решений и First Blood в строке задания, возвращает счетчик и категорию"""
+        return self.db.execute(
+            update(Challenge)
+            .where(Challenge.id == challenge_id)
+            .values(
+                solved_count=func.coalesce(Challenge.solved_count, 0) + 1,
+                first_blood_user_id=case(
+                    (func.coalesce(Challenge.solved_count, 0) == 0, user_id),
+                    else_=Challenge.first_blood_user_id
+                )
+            )
+            .returning(Challenge.solved_count, Challenge.category)
+            .execution_options(synchronize_session=False)
+        ).one()
+
+    def _increment_team_score(self, team_id: int, points: int) -> int:
+        """Очки в строке команды, возвращает новый счет"""
+        return self.db.execute(
+            update(Team)
+            .where(Team.id == team_id)
+            .values(score=func.coalesce(Team.score, 0) + points)
+            .returning(Team.score)
+            .execution_options(synchronize_session=False)
+        ).scalar_one()
+
+    def _claim_first_blood(self, challenge_id: int, user_id: int) -> bool:
+        """
+        Условная запись First Blood
+
+        Строка не совпадает с условием после первого решения, поэтому
+        блокируется только в момент First Blood. Условие страхует и от
+        расхождения счетчика в Redis с БД.
+        """
+        result = self.db.execute(
+            update(Challenge)
+            .where(Challenge.id == challenge_id, Challenge.first_blood_user_id.is_(None))
+            .values(first_blood_user_id=user_id)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
 
     def calculate_dynamic_score(self, challenge: Challenge) -> int:
         """Расчет динамических очков для задания"""
@@ -62,8 +170,4 @@ class ScoringService:
 
     def get_team_rank(self, team_id: int) -> int:
         """Получение позиции команды в рейтинге"""
-        teams = self.db.query(Team).order_by(Team.score.desc()).all()
-        for index, team in enumerate(teams, 1):
-            if team.id == team_id:
-                return index
-        return 0
\ No newline at end of file
+        return LeaderboardService(self.db).get_rank(team_id) or 0
\ No newline at end of file
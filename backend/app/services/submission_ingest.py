@@ -0,0 +1,481 @@
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.audit_log import AuditLog
+from app.models.submission import Submission
+from app.services.flag_throttle import flag_throttle
+from app.services.outbox_service import OutboxService, build_flag_submission_events, outbox_dispatcher
+from app.services.scoring_service import ScoringService
+from app.services.dynamic_scoring import dynamic_scoring
+
+# Ошибки данных: повторная запись отправки их не исправит
+PERMANENT_ERRORS = (DataError, IntegrityError, KeyError, ValueError, TypeError)
+
+
+class LocalSubmissionQueue:
+    """Процессная очередь отправок (замена Redis stream для разработки и тестов)"""
+
+    def __init__(self, maxsize: int = 100000):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dead: List[Dict[str, Any]] = []
+
+    async def append(self, entry: Dict[str, Any]) -> str:
+        self._queue.put_nowait(entry)
+        return entry["ingest_id"]
+
+    async def read_batch(self, count: int, timeout: float) -> List[Tuple[str, Dict[str, Any]]]:
+        try:
+            first = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return []
+
+        batch = [(first["ingest_id"], first)]
+        while len(batch) < count and not self._queue.empty():
+            entry = self._queue.get_nowait()
+            batch.append((entry["ingest_id"], entry))
+        return batch
+
+    async def ack(self, entry_ids: List[str]):
+        pass
+
+    async def attempts(self, entry_id: str, entry: Dict[str, Any]) -> int:
+        return entry.get("attempts", 0) + 1
+
+    async def release(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        """Возврат незаписанных отправок в очередь для повтора"""
+        for _, entry in batch:
+            entry["attempts"] = entry.get("attempts", 0) + 1
+            self._queue.put_nowait(entry)
+
+    async def dead_letter(self, failed: List[Tuple[str, Dict[str, Any], str]]):
+        for _, entry, error in failed:
+            self.dead.append({**entry, "error": error})
+
+    async def close(self):
+        pass
+
+
+class RedisStreamQueue:
+    """Очередь отправок на Redis Stream с группой потребителей"""
+
+    def __init__(self,
+                 url: str,
+                 stream: str,
+                 group: str = "ingest",
+                 maxlen: int = 1000000,
+                 claim_idle_ms: int = 60000,
+                 dead_letter_stream: Optional[str] = None):
+        import redis.asyncio as aioredis
+
+        self.redis = aioredis.Redis.from_url(url)
+        self.stream = stream
+        self.dead_letter_stream = dead_letter_stream or f"{stream}:dead"
+        self.group = group
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self.maxlen = maxlen
+        self.claim_idle_ms = claim_idle_ms
+        self._group_ready = False
+        self._last_claim = 0.0
+
+    async def append(self, entry: Dict[str, Any]) -> str:
+        entry_id = await self.redis.xadd(
+            self.stream,
+            {"data": json.dumps(entry)},
+            maxlen=self.maxlen,
+            approximate=True
+        )
+        return entry_id.decode()
+
+    async def read_batch(self, count: int, timeout: float) -> List[Tuple[str, Dict[str, Any]]]:
+        await self._ensure_group()
+
+        # Забираем записи, зависшие у остановленных потребителей
+        if time.monotonic() - self._last_claim > self.claim_idle_ms / 1000:
+            self._last_claim = time.monotonic()
+            claimed = await self.redis.xautoclaim(
+                self.stream, self.group, self.consumer,
+                min_idle_time=self.claim_idle_ms, start_id="0-0", count=count
+            )
+            if claimed and claimed[1]:
+                return self._decode(claimed[1])
+
+        response = await self.redis.xreadgroup(
+            self.group, self.consumer, {self.stream: ">"},
+            count=count, block=max(1, int(timeout * 1000))
+        )
+        if not response:
+            return []
+        return self._decode(response[0][1])
+
+    async def ack(self, entry_ids: List[str]):
+        if entry_ids:
+            await self.redis.xack(self.stream, self.group, *entry_ids)
+
+    async def attempts(self, entry_id: str, entry: Dict[str, Any]) -> int:
+        """Сколько раз запись выдавалась потребителям (включая текущую выдачу)"""
+        pending = await self.redis.xpending_range(self.stream, self.group, min=entry_id, max=entry_id, count=1)
+        return pending[0]["times_delivered"] if pending else 1
+
+    async def release(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        """Незаписанные отправки остаются в pending - их повторно выдаст xautoclaim"""
+
+    async def dead_letter(self, failed: List[Tuple[str, Dict[str, Any], str]]):
+        """Перенос отправок, которые не удается записать, в отдельный stream"""
+        pipe = self.redis.pipeline(transaction=True)
+        for entry_id, entry, error in failed:
+            pipe.xadd(self.dead_letter_stream, {"entry_id": entry_id, "data": json.dumps(entry), "error": error})
+        pipe.xack(self.stream, self.group, *[entry_id for entry_id, _, _ in failed])
+        await pipe.execute()
+
+    async def close(self):
+        await self.redis.close()
+
+    async def _ensure_group(self):
+        if self._group_ready:
+            return
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    def _decode(self, entries) -> List[Tuple[str, Dict[str, Any]]]:
+        return [
+            (entry_id.decode(), json.loads(fields[b"data"]))
+            for entry_id, fields in entries
+            if fields
+        ]
+
+
+class SubmissionIngestService:
+    """
+    Асинхронный прием отправок флагов.
+
+    Endpoint проверяет флаг по индексу заданий и кладет отправку в очередь,
+    фоновый потребитель записывает отправки, аудит и события outbox пачками
+    и возвращает результат пользователю через WebSocket.
+    """
+
+    def __init__(self):
+        self.queue = None
+        self.batch_size = settings.SUBMISSION_INGEST_BATCH_SIZE
+        self.flush_interval = settings.SUBMISSION_INGEST_FLUSH_INTERVAL
+        self.max_attempts = settings.SUBMISSION_INGEST_MAX_ATTEMPTS
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.SUBMISSION_INGEST_MODE == "queue"
+
+    def _get_queue(self):
+        if self.queue is None:
+            if settings.SUBMISSION_INGEST_BACKEND == "local":
+                self.queue = LocalSubmissionQueue()
+            else:
+                self.queue = RedisStreamQueue(
+                    settings.REDIS_URL,
+                    settings.SUBMISSION_INGEST_STREAM,
+                    dead_letter_stream=settings.SUBMISSION_INGEST_DEAD_LETTER_STREAM
+                )
+        return self.queue
+
+    async def enqueue(self,
+                      team_id: int,
+                      user_id: int,
+                      username: str,
+                      challenge_id: int,
+                      challenge_title: str,
+                      team_name: str,
+                      flag: str,
+                      points: int,
+                      is_correct: bool) -> Optional[Dict[str, Any]]:
+        """
+        Постановка отправки в очередь
+
+        Returns:
+            Запись очереди или None, если очередь недоступна
+            (тогда вызывающий код обрабатывает отправку синхронно)
+        """
+        entry = {
+            "ingest_id": uuid.uuid4().hex,
+            "team_id": team_id,
+            "user_id": user_id,
+            "username": username,
+            "challenge_id": challenge_id,
+            "challenge_title": challenge_title,
+            "team_name": team_name,
+            "flag": flag,
+            "points": points,
+            "is_correct": is_correct,
+            "submitted_at": datetime.utcnow().isoformat()
+        }
+        try:
+            await self._get_queue().append(entry)
+            return entry
+        except Exception as e:
+            print(f"⚠️ Очередь отправок недоступна: {e}")
+            return None
+
+    async def start(self):
+        """Запуск фонового потребителя"""
+        self.running = True
+        self._task = asyncio.create_task(self._run())
+        print("📥 Асинхронный прием отправок запущен")
+
+    async def stop(self):
+        """Остановка потребителя"""
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self.queue:
+            await self.queue.close()
+
+    async def _run(self):
+        queue = self._get_queue()
+        loop = asyncio.get_event_loop()
+
+        while self.running:
+            try:
+                batch = await queue.read_batch(self.batch_size, self.flush_interval)
+                if not batch:
+                    continue
+
+                # Запись в БД синхронная - выполняем в пуле потоков
+                entries = [entry for _, entry in batch]
+                failed = []
+                try:
+                    results = await loop.run_in_executor(None, self.write_batch, entries)
+                except Exception as e:
+                    print(f"⚠️ Ошибка записи пачки отправок, запись по одной: {e}")
+                    results, failed = await loop.run_in_executor(None, self._write_one_by_one, entries)
+
+                # Подтверждаются только записанные отправки: принятый флаг
+                # уже получил ответ "pending" и не должен пропасть
+                entry_ids = {entry["ingest_id"]: entry_id for entry_id, entry in batch}
+                failed_ids = {entry["ingest_id"] for entry, _ in failed}
+                await queue.ack([entry_id for ingest_id, entry_id in entry_ids.items() if ingest_id not in failed_ids])
+                if failed:
+                    await self._handle_failed(queue, [
+                        (entry_ids[entry["ingest_id"]], entry, error) for entry, error in failed
+                    ])
+
+                outbox_dispatcher.notify()
+                if any(result["status"] == "accepted" for result in results):
+                    dynamic_scoring.notify()
+                await self.deliver_results(results)
+                if failed:
+                    # Временный сбой БД - не повторяем запись в цикле без паузы
+                    await asyncio.sleep(1)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Ошибка обработки очереди отправок: {e}")
+                await asyncio.sleep(1)
+
+    def write_batch(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Запись пачки отправок одной транзакцией
+
+        Отклоненные отправки и записи аудита вставляются через executemany,
+        принятые проходят через атомарную запись решения (счетчики и First Blood).
+        """
+        db = SessionLocal()
+        try:
+            scoring_service = ScoringService(db)
+            results = []
+            rejected = []
+
+            for entry in entries:
+                submitted_at = datetime.fromisoformat(entry["submitted_at"])
+                result = {**entry, "submission_id": None, "points_awarded": 0, "is_first_blood": False}
+
+                if entry["is_correct"]:
+                    solve = scoring_service.record_solve(
+                        team_id=entry["team_id"],
+                        user_id=entry["user_id"],
+                        challenge_id=entry["challenge_id"],
+                        flag=entry["flag"],
+                        points=entry["points"],
+                        submitted_at=submitted_at
+                    )
+                    if solve:
+                        result.update(
+                            status="accepted",
+                            submission_id=solve["submission"].id,
+                            points_awarded=solve["submission"].points_awarded,
+                            is_first_blood=solve["is_first_blood"]
+                        )
+                    else:
+                        result["status"] = "duplicate"
+                else:
+                    result["status"] = "rejected"
+                    rejected.append(result)
+
+                results.append(result)
+
+            if rejected:
+                submission_ids = db.scalars(
+                    insert(Submission).returning(Submission.id, sort_by_parameter_order=True),
+                    [
+                        {
+                            "team_id": result["team_id"],
+                            "user_id": result["user_id"],
+                            "challenge_id": result["challenge_id"],
+                            "flag": result["flag"],
+                            "status": "rejected",
+                            "points_awarded": 0,
+                            "is_first_blood": False,
+                            "submitted_at": datetime.fromisoformat(result["submitted_at"])
+                        }
+                        for result in rejected
+                    ]
+                ).all()
+                for result, submission_id in zip(rejected, submission_ids):
+                    result["submission_id"] = submission_id
+                    flag_throttle.remember_wrong(
+                        db, result["team_id"], result["challenge_id"], result["flag"], submission_id
+                    )
+
+            audit_rows = [
+                {
+                    "user_id": result["user_id"],
+                    "action": "flag_submission",
+                    "resource_type": "challenge",
+                    "resource_id": result["challenge_id"],
+                    "details": {
+                        "submission_id": result["submission_id"],
+                        "is_first_blood": result["is_first_blood"]
+                    },
+                    "severity": "info",
+                    "status": "accepted" if result["status"] == "accepted" else "rejected",
+                    "timestamp": datetime.fromisoformat(result["submitted_at"])
+                }
+                for result in results
+                if result["submission_id"] is not None
+            ]
+            if audit_rows:
+                db.execute(insert(AuditLog), audit_rows)
+
+            # Telegram и хуки плагинов доставляются через outbox,
+            # аудит уже записан пачкой, а WebSocket отправляет deliver_results
+            events = []
+            for result in results:
+                if result["submission_id"] is None:
+                    continue
+                events.extend(build_flag_submission_events(
+                    user_id=result["user_id"],
+                    username=result["username"],
+                    team_id=result["team_id"],
+                    team_name=result.get("team_name", ""),
+                    challenge_id=result["challenge_id"],
+                    challenge_title=result["challenge_title"],
+                    submission_id=result["submission_id"],
+                    status=result["status"],
+                    points=result["points_awarded"],
+                    is_first_blood=result["is_first_blood"],
+                    submitted_at=datetime.fromisoformat(result["submitted_at"]),
+                    audit=False,
+                    team_broadcast=False
+                ))
+            OutboxService(db).add_events(events)
+
+            db.commit()
+            return results
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _write_one_by_one(self, entries: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], Exception]]]:
+        """
+        Запись отправок по одной, чтобы одна ошибочная запись не блокировала очередь
+
+        Returns:
+            (результаты записанных отправок, [(отправка, ошибка)] незаписанных)
+        """
+        results = []
+        failed = []
+        for entry in entries:
+            try:
+                results.extend(self.write_batch([entry]))
+            except Exception as e:
+                failed.append((entry, e))
+        return results, failed
+
+    async def _handle_failed(self, queue, failed: List[Tuple[str, Dict[str, Any], Exception]]):
+        """
+        Незаписанные отправки
+
+        Ошибка данных или исчерпанные SUBMISSION_INGEST_MAX_ATTEMPTS переносят
+        отправку в dead-letter stream, временная ошибка (БД недоступна,
+        таймаут блокировки) оставляет ее в очереди для повтора.
+        """
+        dead, retry = [], []
+        for entry_id, entry, error in failed:
+            try:
+                attempts = await queue.attempts(entry_id, entry)
+            except Exception:
+                attempts = 1
+            if isinstance(error, PERMANENT_ERRORS) or attempts >= self.max_attempts:
+                print(f"❌ Отправка {entry['ingest_id']} перенесена в dead-letter после {attempts} попыток: {error}")
+                dead.append((entry_id, entry, f"{type(error).__name__}: {error}"))
+            else:
+                print(f"⚠️ Отправка {entry['ingest_id']} не записана (попытка {attempts}), будет повторена: {error}")
+                retry.append((entry_id, entry))
+
+        if dead:
+            await queue.dead_letter(dead)
+        if retry:
+            await queue.release(retry)
+
+    async def deliver_results(self, results: List[Dict[str, Any]]):
+        """Отправка результатов проверки пользователям через WebSocket"""
+        # ЛЕНИВАЯ ЗАГРУЗКА websocket_manager для избежания circular imports
+        from app.api.websocket import manager as websocket_manager
+
+        for result in results:
+            await websocket_manager.send_personal_message(result["user_id"], {
+                "type": "flag_result",
+                "ingest_id": result["ingest_id"],
+                "challenge_id": result["challenge_id"],
+                "submission_id": result["submission_id"],
+                "status": result["status"],
+                "points": result["points_awarded"],
+                "is_first_blood": result["is_first_blood"],
+                "timestamp": result["submitted_at"]
+            })
+
+            if result["status"] == "accepted":
+                await websocket_manager.broadcast_to_team(result["team_id"], {
+                    "type": "team_flag_submitted",
+                    "user_id": result["user_id"],
+                    "username": result["username"],
+                    "challenge_id": result["challenge_id"],
+                    "challenge_title": result["challenge_title"],
+                    "points": result["points_awarded"],
+                    "is_first_blood": result["is_first_blood"],
+                    "timestamp": result["submitted_at"]
+                })
+
+
+# Глобальный экземпляр сервиса приема отправок
+submission_ingest = SubmissionIngestService()
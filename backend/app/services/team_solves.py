@@ -0,0 +1,132 @@
+# backend/app/services/team_solves.py
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_manager
+from app.models.submission import Submission
+
+TEAM_SOLVED_KEY = "team_solved:{team_id}"
+TEAM_SOLVED_TTL = 3600
+
+# Служебный бит: битовая карта загружена из БД полностью (id заданий начинаются с 1)
+LOADED_BIT = 0
+
+# Ключ в Session.info для решений, которые дописываются после commit
+PENDING_SOLVES_KEY = "team_solved_pending"
+
+
+class SolvedBitmap:
+    """
+    Битовая карта решенных заданий в формате Redis: бит N - задание с id N,
+    нумерация битов от старшего бита первого байта (как у SETBIT/GETBIT).
+    Проверка решения - обращение к одному байту в памяти.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes = b""):
+        self.data = data
+
+    @classmethod
+    def from_ids(cls, challenge_ids: Iterable[int]) -> "SolvedBitmap":
+        ids = list(challenge_ids)
+        data = bytearray((max(ids) >> 3) + 1 if ids else 0)
+        for challenge_id in ids:
+            data[challenge_id >> 3] |= 0x80 >> (challenge_id & 7)
+        return cls(bytes(data))
+
+    def __contains__(self, challenge_id: int) -> bool:
+        index = challenge_id >> 3
+        return 0 < challenge_id and index < len(self.data) and bool(self.data[index] & (0x80 >> (challenge_id & 7)))
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self.data) and bool(self.data[0] & (0x80 >> LOADED_BIT))
+
+
+class TeamSolvesService:
+    """
+    Кэш решенных командой заданий
+
+    Хранится в Redis битовой картой по id заданий со служебным битом
+    LOADED_BIT. Новые решения дописываются через SETBIT после commit,
+    а загрузка из БД тоже только выставляет биты, поэтому параллельные
+    чтение и запись сходятся к полному набору без гонки инвалидации.
+    Карта без служебного бита (например, созданная SETBIT после истечения
+    ключа) считается незагруженной и перестраивается из БД.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.redis = cache_manager.redis_client
+
+    def get_solved(self, team_id: Optional[int]) -> SolvedBitmap:
+        """Решенные командой задания: один GET на весь каталог"""
+        if not team_id:
+            return SolvedBitmap()
+
+        key = TEAM_SOLVED_KEY.format(team_id=team_id)
+        try:
+            bitmap = SolvedBitmap(self.redis.get(key) or b"")
+        except Exception:
+            return SolvedBitmap.from_ids(self._load(team_id))
+
+        if bitmap.loaded:
+            return bitmap
+
+        solved = self._load(team_id)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for challenge_id in (LOADED_BIT, *solved):
+                pipe.setbit(key, challenge_id, 1)
+            pipe.expire(key, TEAM_SOLVED_TTL)
+            pipe.execute()
+        except Exception:
+            pass
+        return SolvedBitmap.from_ids(solved)
+
+    def _load(self, team_id: int) -> Tuple[int, ...]:
+        rows = self.db.query(Submission.challenge_id).filter(
+            Submission.team_id == team_id,
+            Submission.status == "accepted"
+        ).all()
+        return tuple(challenge_id for challenge_id, in rows)
+
+    def record_solve(self, team_id: int, challenge_id: int):
+        """Новое решение - дописывается в кэш после commit текущей транзакции"""
+        self.db.info.setdefault(PENDING_SOLVES_KEY, []).append((team_id, challenge_id))
+
+    @staticmethod
+    def apply_solves(solves: Iterable[Tuple[int, int]]):
+        """Дописывание решений одним pipeline"""
+        try:
+            pipe = cache_manager.redis_client.pipeline(transaction=False)
+            for team_id, challenge_id in solves:
+                key = TEAM_SOLVED_KEY.format(team_id=team_id)
+                pipe.setbit(key, challenge_id, 1)
+                pipe.expire(key, TEAM_SOLVED_TTL)
+            pipe.execute()
+        except Exception as e:
+            print(f"⚠️ Не удалось обновить кэш решений команд: {e}")
+
+    @staticmethod
+    def forget_team(team_id: int):
+        """Удаление кэша решений (например, после удаления отправок команды)"""
+        cache_manager.delete(TEAM_SOLVED_KEY.format(team_id=team_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_solves(session: Session):
+    """Решения попадают в кэш только после фиксации транзакции"""
+    solves = session.info.pop(PENDING_SOLVES_KEY, None)
+    if solves:
+        TeamSolvesService.apply_solves(solves)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending_solves(session: Session, transaction):
+    """Откат внешней транзакции отбрасывает отложенные решения"""
+    if transaction.parent is None and not transaction.nested:
+        session.info.pop(PENDING_SOLVES_KEY, None)
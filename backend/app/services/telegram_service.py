@@ -1,4 +1,6 @@
 # backend/app/services/telegram_service.py
+import asyncio
+from functools import partial
 import requests
 from app.core.config import settings
 
@@ -20,7 +22,11 @@ class TelegramService:
         }
 
         try:
-            response = requests.post(url, json=payload)
+            # requests блокирующий - выполняем в пуле потоков, чтобы не останавливать event loop
+            loop = asyncio.get_event_loop()
+            response = await loop.run_in_executor(
+                None, partial(requests.post, url, json=payload, timeout=10)
+            )
             return response.status_code == 200
         except Exception as e:
             print(f"Ошибка отправки Telegram уведомления: {e}")
@@ -35,7 +41,7 @@ class TelegramService:
 🎯 Задание: {challenge_title}
 📊 Статус: {status}
         """
-        await self.send_notification(message)
+        return await self.send_notification(message)
 
     async def send_first_blood_notification(self, username: str, challenge_title: str, team_name: str):
         """Уведомление о First Blood"""
@@ -48,4 +54,4 @@ class TelegramService:
 
 Поздравляем с первой кровью! 🎉
         """
-        await self.send_notification(message)
\ No newline at end of file
+        return await self.send_notification(message)
\ No newline at end of file
@@ -18,6 +18,7 @@ from app.tasks.cleanup_tasks import (
     cleanup_old_submissions_task,
     cleanup_inactive_users_task,
     rotate_flags_task,
+    reconcile_score_counters_task,
     backup_database_task
 )
 
@@ -34,5 +35,6 @@ __all__ = [
     'cleanup_old_submissions_task',
     'cleanup_inactive_users_task',
     'rotate_flags_task',
+    'reconcile_score_counters_task',
     'backup_database_task'
 ]
\ No newline at end of file
@@ -79,6 +79,26 @@ def rotate_flags_task():
     finally:
         db.close()
 
+@celery_app.task
+def reconcile_score_counters_task():
+    """Сверка счетчиков решений и очков команд с принятыми отправками"""
+    db = SessionLocal()
+    
+    try:
+        from app.services.score_counters import score_counters
+        
+        fixed = score_counters.reconcile(db)
+        
+        print(f"Сверка счетчиков: исправлено {fixed}")
+        return {"fixed": fixed}
+        
+    except Exception as e:
+        db.rollback()
+        print(f"Ошибка при сверке счетчиков: {e}")
+        return {"error": str(e)}
+    finally:
+        db.close()
+
 @celery_app.task
 def backup_database_task():
     """Задача резервного копирования базы данных"""
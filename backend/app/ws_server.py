@@ -1,9 +1,27 @@
 # backend/app/ws_server.py
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from app.api.websocket import manager, websocket_arena
 from app.core.config import settings
+from app.core.message_bus import message_bus
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Сообщения командам и пользователям публикуют API и другие узлы через шину
+    await message_bus.start()
+    
+    # Изменения таблицы лидеров узел считает сам для своих подписчиков
+    from app.services.scoreboard_publisher import scoreboard_publisher
+    await scoreboard_publisher.start()
+    
+    yield
+    
+    await scoreboard_publisher.stop()
+    await manager.disconnect_all()
+    await message_bus.stop()
 
-app = FastAPI(title="CTF WebSocket Server")
+app = FastAPI(title="CTF WebSocket Server", lifespan=lifespan)
 
 # Подключение WebSocket endpoint
 app.websocket("/ws/arena")(websocket_arena)
@@ -13,6 +31,7 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "websocket",
+        "node_id": message_bus.node_id,
         "connections": manager.get_connection_stats()
     }
 
@@ -23,4 +42,4 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8001,
         reload=settings.DEBUG
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,6 @@
+"""
+Нагрузочные сценарии и проверки производительности CyberCTF Arena.
+
+Скрипты запускаются из каталога backend, например:
+    DATABASE_URL=postgresql://... python -m benchmarks.scoring_concurrency
+"""
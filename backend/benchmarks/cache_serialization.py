@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Скорость и размер сериализации значений кэша.
+
+Сравнивает pickle (прежний формат CacheManager) с CacheSerializer
+(JSON на orjson, со сжатием и без) на данных размера таблицы лидеров
+и каталога заданий: время записи и чтения одного значения и его размер
+в Redis. Перед замером каждый формат проверяется на точное
+восстановление значения.
+
+Запуск (Redis и БД не нужны):
+    python -m benchmarks.cache_serialization --teams 1000 --challenges 300
+"""
+
+import argparse
+import json
+import pickle
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from app.core.serialization import (
+    CacheSerializer,
+    JSONCodec,
+    PickleCodec,
+    ZlibCompressor,
+    ZstdCompressor,
+    build_serializer,
+    zstandard,
+)
+
+
+def leaderboard_payload(teams: int, rng: random.Random) -> dict:
+    """Ответ таблицы лидеров в формате LeaderboardService.get_top"""
+    rows = []
+    for position in range(1, teams + 1):
+        rows.append({
+            "position": position,
+            "id": rng.randint(1, 10 * teams),
+            "name": f"team-{rng.getrandbits(40):x}",
+            "score": rng.randint(0, 20000),
+            "country": rng.choice(["RU", "KZ", "BY", "UZ", None]),
+            "member_count": rng.randint(1, 5)
+        })
+    return {"leaderboard": rows, "total": teams}
+
+
+def team_stats_payload(teams: int, rng: random.Random) -> list:
+    """Значения с datetime (история решений команд) - путь с восстановлением типов"""
+    started = datetime(2025, 1, 1, 10, 0)
+    return [
+        {
+            "team_id": team_id,
+            "challenge_id": rng.randint(1, 300),
+            "points": rng.choice([100, 200, 300, 500]),
+            "solved_at": started + timedelta(seconds=rng.randint(0, 172800))
+        }
+        for team_id in range(1, teams + 1)
+    ]
+
+
+def catalog_payload(challenges: int, rng: random.Random) -> list:
+    """Список заданий в том виде, в котором его кэширует ChallengeCatalog (model_dump(mode="json"))"""
+    return [
+        {
+            "id": challenge_id,
+            "title": f"Challenge {challenge_id}",
+            "description": " ".join(f"word{rng.randint(0, 500)}" for _ in range(60)),
+            "category": rng.choice(["web", "crypto", "pwn", "reverse", "forensics"]),
+            "difficulty": rng.choice(["easy", "medium", "hard"]),
+            "points": rng.choice([100, 200, 300, 500]),
+            "solved_count": rng.randint(0, 1000),
+            "first_blood_user_id": rng.choice([None, rng.randint(1, 5000)]),
+            "is_visible": True,
+            "created_at": (datetime(2025, 1, 1) + timedelta(minutes=challenge_id)).isoformat()
+        }
+        for challenge_id in range(1, challenges + 1)
+    ]
+
+
+def measure(dumps, loads, value, rounds: int) -> dict:
+    """Медианное время записи и чтения (мкс) и размер значения"""
+    data = dumps(value)
+    write, read = [], []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        dumps(value)
+        write.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        loads(data)
+        read.append(time.perf_counter() - started)
+    return {
+        "bytes": len(data),
+        "dumps_us": round(statistics.median(write) * 1e6, 1),
+        "loads_us": round(statistics.median(read) * 1e6, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", type=int, default=1000, help="строк в таблице лидеров")
+    parser.add_argument("--challenges", type=int, default=300, help="заданий в каталоге")
+    parser.add_argument("--rounds", type=int, default=200, help="повторов каждого замера")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    payloads = {
+        "leaderboard": leaderboard_payload(args.teams, rng),
+        "catalog": catalog_payload(args.challenges, rng),
+        "solve_history": team_stats_payload(args.teams, rng)
+    }
+    formats = {
+        "pickle": (pickle.dumps, pickle.loads),
+        "json": CacheSerializer(JSONCodec(), compressor=None),
+        "json+zlib": CacheSerializer(JSONCodec(), ZlibCompressor()),
+        "pickle+zlib": CacheSerializer(PickleCodec(), ZlibCompressor()),
+        "json+zstd": CacheSerializer(JSONCodec(), ZstdCompressor()) if zstandard is not None else None,
+        "default": build_serializer()
+    }
+
+    results = {}
+    for name, payload in payloads.items():
+        results[name] = {}
+        for label, serializer in formats.items():
+            if serializer is None:
+                continue
+            dumps, loads = serializer if isinstance(serializer, tuple) else (serializer.dumps, serializer.loads)
+            if loads(dumps(payload)) != payload:
+                raise SystemExit(f"{label}: значение {name} восстановлено с потерями")
+            results[name][label] = measure(dumps, loads, payload, args.rounds)
+
+    default = formats["default"]
+    results["default_format"] = {
+        "codec": type(default.codec).__name__,
+        "compressor": type(default.compressor).__name__ if default.compressor else None,
+        "threshold": default.threshold
+    }
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Проверка числа запросов к БД в списке заданий.
+
+Поднимает приложение на временной SQLite и fakeredis (см. benchmarks.load),
+засеивает каталог маленького и большого размера и считает запросы
+GET /api/challenges/ и GET /api/challenges/{id} при холодном и прогретом
+кэше. Число запросов не должно зависеть от размера каталога: при
+регрессии (например, запросе на каждое задание) скрипт завершается с кодом 1.
+
+Запуск:
+    python -m benchmarks.challenge_list_queries --small 10 --large 300
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+
+from benchmarks.load.environment import boot
+
+# Запросы на холодный кэш: пользователь, каталог, решения команды
+MAX_COLD_QUERIES = 4
+
+
+async def measure(client, world, header: str) -> dict:
+    """Запросы к БД на холодный и прогретый список и на карточку задания"""
+    _, _, token = world.players[0]
+    auth = {"Authorization": f"Bearer {token}"}
+
+    def queries(response) -> int:
+        assert response.status_code == 200, response.text
+        return int(response.headers[header])
+
+    cold = queries(await client.get("/api/challenges/", headers=auth))
+    warm = queries(await client.get("/api/challenges/", headers=auth))
+    detail = queries(await client.get(f"/api/challenges/{world.challenge_ids[-1]}", headers=auth))
+    listed = (await client.get("/api/challenges/", headers=auth)).json()
+
+    return {
+        "challenges_listed": len(listed),
+        "list_cold": cold,
+        "list_warm": warm,
+        "detail": detail
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--small", type=int, default=10, help="заданий в маленьком каталоге")
+    parser.add_argument("--large", type=int, default=300, help="заданий в большом каталоге")
+    args = parser.parse_args()
+
+    app, _ = boot()
+
+    import httpx
+
+    from app.core.database import engine
+    from app.services.challenge_catalog import challenge_catalog
+    from benchmarks.load.metrics import QUERY_COUNT_HEADER, QueryCountingApp
+    from benchmarks.load.seed import seed_world
+
+    header = QUERY_COUNT_HEADER.decode()
+    transport = httpx.ASGITransport(app=QueryCountingApp(app, engine))
+    rng = random.Random(42)
+
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, challenges in (("small", args.small), ("large", args.large - args.small)):
+            world = seed_world(teams=5, users_per_team=2, challenges=challenges,
+                               solve_density=0.3, wrong_per_solve=0, rng=rng)
+            # Засев идет мимо API - каталог сбрасывается так же, как при правке админом
+            challenge_catalog.invalidate()
+            results[label] = await measure(client, world, header)
+
+    small, large = results["small"], results["large"]
+    failures = []
+    for metric in ("list_cold", "list_warm", "detail"):
+        if large[metric] > small[metric]:
+            failures.append(f"{metric}: {small[metric]} -> {large[metric]} запросов при росте каталога")
+    if large["list_cold"] > MAX_COLD_QUERIES:
+        failures.append(f"list_cold: {large['list_cold']} > {MAX_COLD_QUERIES}")
+
+    print(json.dumps({**results, "failures": failures}, indent=2, ensure_ascii=False))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
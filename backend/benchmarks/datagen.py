@@ -0,0 +1,701 @@
+#!/usr/bin/env python3
+"""
+Генератор синтетического соревнования для проверки на больших объемах.
+
+Создает команды, участников, задания, историю отправок, записи аудита
+и уведомления с правдоподобными распределениями:
+- сила команд нормальная, часть команд зарегистрирована, но не играет;
+- вероятность решения зависит от силы команды и сложности задания,
+  сложные задания решают позже;
+- активность падает к концу соревнования, самые активные команды
+  отправляют больше всего неправильных флагов;
+- счет команд, счетчики решений и First Blood согласованы с историей.
+
+Строки генерируются пачками через numpy и загружаются COPY (PostgreSQL)
+или executemany (остальные БД). Идентификаторы назначаются явно, после
+загрузки сдвигаются последовательности и обновляется статистика.
+
+Таблица лидеров и ряды счета в Redis после загрузки не совпадают с БД:
+перестройте их флагом --rebuild-caches или через
+POST /api/admin/leaderboard/rebuild и /api/admin/scoreboard/timeline/rebuild.
+
+Запуск (значения по умолчанию: 20k участников, 5k команд, 600 заданий,
+10M отправок, 2M записей аудита, 500k уведомлений):
+    DATABASE_URL=postgresql://... python -m benchmarks.datagen --skip-fk-checks
+
+На время загрузки вторичные индексы submissions, audit_logs и notifications
+удаляются и строятся заново, --skip-fk-checks отключает триггеры внешних
+ключей (нужен суперпользователь) - вместе это ускоряет COPY в несколько раз.
+"""
+
+import argparse
+import csv
+import io
+import json
+import math
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from app.core.database import SessionLocal, engine, init_db
+from app.core.security import get_password_hash
+from app.models.audit_log import AuditLog
+from app.models.notification import Notification
+from app.models.submission import Submission
+
+CATEGORIES = ["web", "crypto", "pwn", "reverse", "forensics", "misc", "osint"]
+CATEGORY_WEIGHTS = [0.25, 0.15, 0.15, 0.15, 0.12, 0.1, 0.08]
+
+# Сложность: базовая стоимость и положение на шкале силы команд
+DIFFICULTIES = {
+    "easy": (100, -1.2),
+    "medium": (250, 0.0),
+    "hard": (500, 1.2),
+    "insane": (1000, 2.4),
+}
+DIFFICULTY_WEIGHTS = [0.3, 0.35, 0.25, 0.1]
+
+COUNTRIES = ["RU", "BY", "KZ", "UZ", "AM", "US", "DE", "CN", "IN", "BR", None]
+
+AUDIT_ACTIONS = [
+    # action, resource_type, доля
+    ("flag_submission", "challenge", 0.6),
+    ("user_login", "user", 0.22),
+    ("user_logout", "user", 0.08),
+    ("team_update", "team", 0.03),
+    ("team_invitation_sent", "team", 0.03),
+    ("team_invitation_accepted", "team", 0.02),
+    ("rate_limit_exceeded", "security", 0.02),
+]
+
+NOTIFICATIONS = [
+    # type, category, title, message, доля
+    ("success", "challenge", "Задание решено", "Ваша команда решила задание", 0.45),
+    ("info", "team", "Новый участник", "В команду вступил новый участник", 0.2),
+    ("warning", "team", "First Blood", "Другая команда первой решила задание", 0.15),
+    ("info", "competition", "Новости соревнования", "Опубликованы новые задания", 0.15),
+    ("error", "system", "Плановые работы", "Платформа будет недоступна 5 минут", 0.05),
+]
+
+USER_AGENTS = [
+    "Mozilla/5.0 (X11; Linux x86_64; rv:120.0) Gecko/20100101 Firefox/120.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/119.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_1) AppleWebKit/605.1.15 Safari/605.1.15",
+    "python-requests/2.31.0",
+    "curl/8.4.0",
+]
+
+# Форма активности во времени: всплеск в начале и спад к концу
+ACTIVITY_SHAPE = (1.2, 2.5)
+
+
+class TableWriter:
+    """
+    Пакетная загрузка строк в таблицы
+
+    На PostgreSQL строки передаются через COPY ... FROM STDIN в формате CSV,
+    на остальных БД - через executemany. Каждая таблица фиксируется отдельно.
+    """
+
+    def __init__(self, chunk_rows: int, skip_fk_checks: bool = False):
+        self.connection = engine.raw_connection()
+        self.postgres = engine.dialect.name == "postgresql"
+        self.chunk_rows = chunk_rows
+        self.rows = Counter()
+        self.seconds = Counter()
+
+        if skip_fk_checks and self.postgres:
+            # Триггеры внешних ключей - основная стоимость COPY в submissions;
+            # ссылки согласованы генератором. Требует прав суперпользователя
+            cursor = self.connection.cursor()
+            cursor.execute("SET session_replication_role = replica")
+            cursor.close()
+            self.connection.commit()
+
+    def next_id(self, table: str) -> int:
+        cursor = self.connection.cursor()
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+        value = cursor.fetchone()[0]
+        cursor.close()
+        return int(value)
+
+    def write(self, table: str, columns: Sequence[str], rows: Iterable[tuple]):
+        """Загрузка строк пачками по chunk_rows"""
+        started = time.perf_counter()
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_rows:
+                self._flush(table, columns, chunk)
+                chunk = []
+        if chunk:
+            self._flush(table, columns, chunk)
+        self.seconds[table] += time.perf_counter() - started
+
+    def _flush(self, table: str, columns: Sequence[str], chunk: List[tuple]):
+        cursor = self.connection.cursor()
+        try:
+            if self.postgres:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(chunk)
+                buffer.seek(0)
+                cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+            else:
+                placeholders = ", ".join("?" for _ in columns)
+                cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", chunk)
+        finally:
+            cursor.close()
+        self.connection.commit()
+        self.rows[table] += len(chunk)
+
+    def finish(self, tables: Sequence[str]):
+        """Сдвиг последовательностей id и обновление статистики планировщика"""
+        cursor = self.connection.cursor()
+        try:
+            for table in tables:
+                if self.postgres:
+                    cursor.execute(
+                        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                        f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+                    )
+                    cursor.execute(f"ANALYZE {table}")
+            if not self.postgres:
+                cursor.execute("ANALYZE")
+        finally:
+            cursor.close()
+        self.connection.commit()
+
+    def truncate(self, tables: Sequence[str]):
+        cursor = self.connection.cursor()
+        try:
+            if self.postgres:
+                cursor.execute(f"TRUNCATE {', '.join(tables)} RESTART IDENTITY CASCADE")
+            else:
+                for table in tables:
+                    cursor.execute(f"DELETE FROM {table}")
+        finally:
+            cursor.close()
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+def timestamps(start: datetime, seconds: np.ndarray) -> List[str]:
+    """Строки времени для загрузки: секунды от start с точностью до микросекунд"""
+    base = np.datetime64(start.replace(microsecond=0), "us")
+    values = base + (seconds * 1_000_000).astype(np.int64).astype("timedelta64[us]")
+    return [value.replace("T", " ") for value in np.datetime_as_string(values, unit="us").tolist()]
+
+
+def sigmoid(values: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-values))
+
+
+class CompetitionGenerator:
+    """План синтетического соревнования и его загрузка"""
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = np.random.default_rng(args.seed)
+        self.run_id = uuid.uuid4().hex[:6]
+        self.window = args.hours * 3600
+        self.start = args.start or (datetime.utcnow().replace(microsecond=0) - timedelta(seconds=self.window))
+
+    # --- План: команды, участники, задания и решения ---
+
+    def plan(self, writer: TableWriter):
+        args, rng = self.args, self.rng
+
+        self.team_ids = writer.next_id("teams") + np.arange(args.teams)
+        self.user_ids = writer.next_id("users") + np.arange(args.users)
+        self.challenge_ids = writer.next_id("challenges") + np.arange(args.challenges)
+
+        # Участники: первые args.teams - капитаны, остальные распределяются
+        # по командам с учетом ограничения размера, лишние остаются без команды
+        user_team = np.full(args.users, -1, dtype=np.int64)
+        user_team[:args.teams] = np.arange(args.teams)
+        sizes = np.ones(args.teams, dtype=np.int64)
+        preference = rng.lognormal(0, 0.7, args.teams)
+        preference /= preference.sum()
+        candidates = rng.choice(args.teams, size=(args.users - args.teams) * 2, p=preference)
+        position = 0
+        for user in range(args.teams, args.users):
+            while position < len(candidates) and sizes[candidates[position]] >= args.max_team_size:
+                position += 1
+            if position >= len(candidates):
+                break
+            team = candidates[position]
+            user_team[user] = team
+            sizes[team] += 1
+            position += 1
+        self.user_team = user_team
+        self.team_sizes = sizes
+
+        # Участники команды подряд в одном массиве для векторного выбора автора отправки
+        members_order = np.argsort(np.where(user_team < 0, args.teams, user_team), kind="stable")
+        self.members = members_order[:int(sizes.sum())]
+        self.member_offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+        # Сила команд; часть команд не играет
+        self.skill = rng.normal(0, 1, args.teams)
+        self.inactive = rng.random(args.teams) < args.inactive_ratio
+
+        difficulty_names = list(DIFFICULTIES)
+        self.challenge_difficulty = rng.choice(len(difficulty_names), size=args.challenges, p=DIFFICULTY_WEIGHTS)
+        self.challenge_category = rng.choice(len(CATEGORIES), size=args.challenges, p=CATEGORY_WEIGHTS)
+        self.challenge_points = np.array([DIFFICULTIES[difficulty_names[d]][0] for d in self.challenge_difficulty])
+        hardness = np.array([DIFFICULTIES[difficulty_names[d]][1] for d in self.challenge_difficulty])
+        hardness = hardness + rng.normal(0, 0.4, args.challenges)
+
+        self._plan_solves(hardness)
+
+    def _plan_solves(self, hardness: np.ndarray):
+        args, rng = self.args, self.rng
+
+        # Смещение подбирается так, чтобы средняя доля решений была около solve_rate
+        logits = 1.7 * (self.skill[:, None] - hardness[None, :])
+        active = ~self.inactive
+        low, high = -20.0, 20.0
+        for _ in range(40):
+            bias = (low + high) / 2
+            rate = sigmoid(logits[active] + bias).mean() * active.mean() if active.any() else 0.0
+            if rate < args.solve_rate:
+                low = bias
+            else:
+                high = bias
+        probabilities = sigmoid(logits + bias)
+        probabilities[self.inactive] = 0.0
+
+        team_index, challenge_index = np.nonzero(rng.random(probabilities.shape) < probabilities)
+
+        # Сложные задания решают ближе к концу соревнования
+        hardness01 = (hardness - hardness.min()) / max(np.ptp(hardness), 1e-9)
+        fraction = rng.beta(1.0 + 2.0 * hardness01[challenge_index], 2.5)
+        solve_seconds = fraction * self.window
+
+        order = np.argsort(solve_seconds, kind="stable")
+        self.solve_team = team_index[order]
+        self.solve_challenge = challenge_index[order]
+        self.solve_seconds = solve_seconds[order]
+        self.solve_user = self._pick_members(self.solve_team)
+
+        # First Blood - первое по времени решение каждого задания
+        _, first_positions = np.unique(self.solve_challenge, return_index=True)
+        self.solve_first_blood = np.zeros(len(self.solve_team), dtype=bool)
+        self.solve_first_blood[first_positions] = True
+        self.first_blood_user = np.full(args.challenges, -1, dtype=np.int64)
+        self.first_blood_user[self.solve_challenge[first_positions]] = self.solve_user[first_positions]
+
+        self.team_scores = np.bincount(
+            self.solve_team, weights=self.challenge_points[self.solve_challenge], minlength=args.teams
+        ).astype(np.int64)
+        self.solved_counts = np.bincount(self.solve_challenge, minlength=args.challenges)
+        self.last_solve = np.zeros(args.teams)
+        np.maximum.at(self.last_solve, self.solve_team, self.solve_seconds)
+
+    def _pick_members(self, teams: np.ndarray) -> np.ndarray:
+        """Случайный участник каждой из команд"""
+        offsets = self.member_offsets[teams] + (self.rng.random(len(teams)) * self.team_sizes[teams]).astype(np.int64)
+        return self.members[offsets]
+
+    def _slices(self, total: int):
+        """Разбиение окна соревнования на интервалы с числом событий по кривой активности"""
+        count = max(math.ceil(total / self.args.chunk_rows), 1)
+        edges = np.linspace(0, self.window, count + 1)
+        samples = self.rng.beta(*ACTIVITY_SHAPE, 200_000) * self.window
+        weights = np.histogram(samples, bins=edges)[0].astype(float)
+        weights /= weights.sum()
+        return edges, self.rng.multinomial(total, weights)
+
+    # --- Загрузка ---
+
+    def load_core(self, writer: TableWriter):
+        args, rng = self.args, self.rng
+        prefix = f"gen{self.run_id}"
+        registered = timestamps(self.start - timedelta(days=14), rng.random(args.users) * 14 * 86400)
+
+        writer.write("teams", ["id", "name", "description", "score", "country", "created_at", "updated_at"], (
+            (
+                int(self.team_ids[index]),
+                f"{prefix}-team-{index}",
+                None,
+                int(self.team_scores[index]),
+                COUNTRIES[index % len(COUNTRIES)],
+                registered[index],
+                registered[index]
+            )
+            for index in range(args.teams)
+        ))
+
+        password_hash = get_password_hash(args.password)
+        last_login = timestamps(self.start, rng.random(args.users) * self.window)
+        writer.write("users", [
+            "id", "username", "email", "hashed_password", "is_active", "is_admin", "is_captain",
+            "team_id", "created_at", "updated_at", "joined_at", "last_login"
+        ], (
+            (
+                int(self.user_ids[index]),
+                f"{prefix}_user_{index}",
+                f"{prefix}_user_{index}@example.test",
+                password_hash,
+                True,
+                False,
+                bool(index < args.teams),
+                int(self.team_ids[self.user_team[index]]) if self.user_team[index] >= 0 else None,
+                registered[index],
+                registered[index],
+                registered[index],
+                last_login[index]
+            )
+            for index in range(args.users)
+        ))
+
+        difficulty_names = list(DIFFICULTIES)
+        created = timestamps(self.start - timedelta(days=1), np.zeros(args.challenges))
+        writer.write("challenges", [
+            "id", "title", "description", "category", "difficulty", "points", "flag", "is_active",
+            "is_visible", "solved_count", "first_blood_user_id", "created_at", "updated_at"
+        ], (
+            (
+                int(self.challenge_ids[index]),
+                f"{prefix} challenge {index}",
+                f"Synthetic {CATEGORIES[self.challenge_category[index]]} challenge #{index}",
+                CATEGORIES[self.challenge_category[index]],
+                difficulty_names[self.challenge_difficulty[index]],
+                int(self.challenge_points[index]),
+                self.flag(index),
+                True,
+                True,
+                int(self.solved_counts[index]),
+                int(self.user_ids[self.first_blood_user[index]]) if self.first_blood_user[index] >= 0 else None,
+                created[index],
+                created[index]
+            )
+            for index in range(args.challenges)
+        ))
+
+        end = timestamps(self.start, np.array([float(self.window)]))[0]
+        writer.write("competitions", [
+            "id", "name", "description", "start_time", "end_time", "is_active", "is_public",
+            "max_team_size", "scoring_type", "created_at", "updated_at"
+        ], [(
+            writer.next_id("competitions"),
+            f"Synthetic competition {self.run_id}",
+            "Сгенерировано benchmarks.datagen",
+            timestamps(self.start, np.zeros(1))[0],
+            end,
+            args.active_competition,
+            True,
+            args.max_team_size,
+            args.scoring_type,
+            created[0] if created else end,
+            created[0] if created else end
+        )])
+
+    def flag(self, challenge: int) -> str:
+        return f"CTF{{gen_{self.run_id}_{challenge}}}"
+
+    def load_submissions(self, writer: TableWriter):
+        """Отправки в порядке времени: id растут вместе с submitted_at"""
+        args, rng = self.args, self.rng
+        accepted = len(self.solve_team)
+        wrong_total = max(args.submissions - accepted, 0)
+
+        # Самые сильные и активные команды перебирают больше всего флагов
+        team_weights = np.exp(0.6 * self.skill) * rng.lognormal(0, 0.8, args.teams)
+        team_weights[self.inactive] *= 0.02
+        team_weights /= team_weights.sum()
+        challenge_weights = np.exp(0.5 * (self.challenge_points / self.challenge_points.max()))
+        challenge_weights /= challenge_weights.sum()
+
+        edges, counts = self._slices(wrong_total)
+        solve_slices = np.clip(np.searchsorted(edges, self.solve_seconds, side="right") - 1, 0, len(counts) - 1)
+        solve_bounds = np.searchsorted(solve_slices, np.arange(len(counts) + 1))
+        next_id = writer.next_id("submissions")
+        flags = [self.flag(index) for index in range(args.challenges)]
+
+        def rows():
+            nonlocal next_id
+            for slice_index, count in enumerate(counts):
+                low, high = solve_bounds[slice_index], solve_bounds[slice_index + 1]
+                teams = np.concatenate([rng.choice(args.teams, size=count, p=team_weights), self.solve_team[low:high]])
+                challenges = np.concatenate([rng.choice(args.challenges, size=count, p=challenge_weights), self.solve_challenge[low:high]])
+                users = np.concatenate([self._pick_members(teams[:count]), self.solve_user[low:high]])
+                seconds = np.concatenate([rng.uniform(edges[slice_index], edges[slice_index + 1], count), self.solve_seconds[low:high]])
+                is_accepted = np.concatenate([np.zeros(count, dtype=bool), np.ones(high - low, dtype=bool)])
+                first_blood = np.concatenate([np.zeros(count, dtype=bool), self.solve_first_blood[low:high]])
+                wrong_flags = rng.integers(0, 2 ** 48, size=len(teams))
+
+                order = np.argsort(seconds, kind="stable")
+                submitted = timestamps(self.start, seconds[order])
+                for position, index in enumerate(order.tolist()):
+                    ok = bool(is_accepted[index])
+                    challenge = int(challenges[index])
+                    yield (
+                        next_id,
+                        flags[challenge] if ok else f"CTF{{{int(wrong_flags[index]):012x}}}",
+                        "accepted" if ok else "rejected",
+                        int(self.challenge_points[challenge]) if ok else 0,
+                        bool(first_blood[index]),
+                        int(self.team_ids[teams[index]]),
+                        int(self.user_ids[users[index]]),
+                        int(self.challenge_ids[challenge]),
+                        submitted[position]
+                    )
+                    next_id += 1
+
+        writer.write("submissions", [
+            "id", "flag", "status", "points_awarded", "is_first_blood", "team_id", "user_id",
+            "challenge_id", "submitted_at"
+        ], rows())
+
+    def load_audit_logs(self, writer: TableWriter):
+        args, rng = self.args, self.rng
+        if not args.audit_logs:
+            return
+        actions = [(action, resource) for action, resource, _ in AUDIT_ACTIONS]
+        weights = np.array([weight for _, _, weight in AUDIT_ACTIONS])
+        weights /= weights.sum()
+        edges, counts = self._slices(args.audit_logs)
+        next_id = writer.next_id("audit_logs")
+
+        def rows():
+            nonlocal next_id
+            for slice_index, count in enumerate(counts):
+                kinds = rng.choice(len(actions), size=count, p=weights)
+                users = rng.integers(0, args.users, size=count)
+                challenges = rng.integers(0, args.challenges, size=count)
+                failures = rng.random(count)
+                addresses = rng.integers(0, 2 ** 24, size=count)
+                agents = rng.integers(0, len(USER_AGENTS), size=count)
+                logged = timestamps(self.start, np.sort(rng.uniform(edges[slice_index], edges[slice_index + 1], count)))
+
+                for index in range(count):
+                    action, resource = actions[kinds[index]]
+                    user = int(self.user_ids[users[index]])
+                    team = self.user_team[users[index]]
+                    status, severity, details, resource_id = "success", "info", {}, None
+                    if action == "flag_submission":
+                        resource_id = int(self.challenge_ids[challenges[index]])
+                        status = "rejected" if failures[index] > 0.05 else "accepted"
+                        details = {"is_first_blood": False}
+                    elif resource == "user":
+                        resource_id = user
+                        if action == "user_login" and failures[index] < 0.05:
+                            status, severity = "failure", "warning"
+                    elif resource == "team":
+                        resource_id = int(self.team_ids[team]) if team >= 0 else None
+                    else:
+                        status, severity = "failure", "warning"
+                        details = {"identifier": str(user), "action": "flag_submission"}
+                        user = None
+                    address = int(addresses[index])
+                    yield (
+                        next_id,
+                        user,
+                        action,
+                        resource,
+                        resource_id,
+                        f"10.{address >> 16}.{(address >> 8) & 255}.{address & 255}",
+                        USER_AGENTS[agents[index]],
+                        logged[index],
+                        json.dumps(details),
+                        severity,
+                        status
+                    )
+                    next_id += 1
+
+        writer.write("audit_logs", [
+            "id", "user_id", "action", "resource_type", "resource_id", "ip_address", "user_agent",
+            "timestamp", "details", "severity", "status"
+        ], rows())
+
+    def load_notifications(self, writer: TableWriter):
+        args, rng = self.args, self.rng
+        if not args.notifications:
+            return
+        weights = np.array([weight for *_, weight in NOTIFICATIONS])
+        weights /= weights.sum()
+        edges, counts = self._slices(args.notifications)
+        next_id = writer.next_id("notifications")
+
+        def rows():
+            nonlocal next_id
+            for slice_index, count in enumerate(counts):
+                kinds = rng.choice(len(NOTIFICATIONS), size=count, p=weights)
+                users = rng.integers(0, args.users, size=count)
+                seconds = np.sort(rng.uniform(edges[slice_index], edges[slice_index + 1], count))
+                read = rng.random(count) < 0.6
+                created = timestamps(self.start, seconds)
+                read_at = timestamps(self.start, seconds + rng.exponential(1800, count))
+
+                for index in range(count):
+                    kind, category, title, message, _ = NOTIFICATIONS[kinds[index]]
+                    yield (
+                        next_id,
+                        int(self.user_ids[users[index]]),
+                        title,
+                        message,
+                        kind,
+                        category,
+                        bool(read[index]),
+                        json.dumps({"source": "datagen"}),
+                        created[index],
+                        read_at[index] if read[index] else None
+                    )
+                    next_id += 1
+
+        writer.write("notifications", [
+            "id", "user_id", "title", "message", "type", "category", "is_read",
+            "notification_data", "created_at", "read_at"
+        ], rows())
+
+
+def drop_indexes(models) -> list:
+    """
+    Удаление вторичных индексов больших таблиц на время загрузки
+
+    Построить индекс один раз по загруженным данным быстрее, чем обновлять
+    его на каждую строку COPY. Определения берутся из моделей.
+    """
+    indexes = [index for model in models for index in model.__table__.indexes]
+    with engine.begin() as connection:
+        for index in indexes:
+            index.drop(connection, checkfirst=True)
+    return indexes
+
+
+def create_indexes(indexes: list) -> float:
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        for index in indexes:
+            index.create(connection, checkfirst=True)
+    return time.perf_counter() - started
+
+
+def rebuild_caches():
+    """Перестроение таблицы лидеров и рядов счета в Redis по загруженным данным"""
+    from app.services.leaderboard_service import LeaderboardService
+    from app.services.score_timeline import ScoreTimelineService
+
+    db = SessionLocal()
+    try:
+        return {
+            "leaderboard_teams": LeaderboardService(db).rebuild(),
+            "timeline_teams": ScoreTimelineService(db).rebuild()
+        }
+    except Exception as e:
+        print(f"⚠️ Не удалось перестроить кэши Redis: {e}", file=sys.stderr)
+        return None
+    finally:
+        db.close()
+
+
+TABLES = ["teams", "users", "challenges", "competitions", "submissions", "audit_logs", "notifications"]
+
+# Очищаются флагом --truncate вместе с зависимыми таблицами
+TRUNCATE_TABLES = [
+    "competition_scores", "outbox_events", "notifications", "audit_logs", "submissions",
+    "invitations", "competitions", "challenges", "users", "teams"
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20000, help="количество участников")
+    parser.add_argument("--teams", type=int, default=5000, help="количество команд")
+    parser.add_argument("--challenges", type=int, default=600, help="количество заданий")
+    parser.add_argument("--submissions", type=int, default=10_000_000, help="всего отправок, включая решения")
+    parser.add_argument("--audit-logs", type=int, default=2_000_000, help="записей аудита")
+    parser.add_argument("--notifications", type=int, default=500_000, help="уведомлений")
+    parser.add_argument("--max-team-size", type=int, default=5)
+    parser.add_argument("--solve-rate", type=float, default=0.1, help="средняя доля решенных пар команда-задание")
+    parser.add_argument("--inactive-ratio", type=float, default=0.15, help="доля неиграющих команд")
+    parser.add_argument("--hours", type=float, default=48, help="длительность соревнования")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="начало соревнования (по умолчанию сейчас минус --hours)")
+    parser.add_argument("--scoring-type", choices=["static", "dynamic"], default="static")
+    parser.add_argument("--active-competition", action="store_true", help="сделать соревнование активным")
+    parser.add_argument("--password", default="password", help="пароль всех участников")
+    parser.add_argument("--chunk-rows", type=int, default=200_000, help="строк в одной пачке COPY")
+    parser.add_argument("--keep-indexes", action="store_true", help="не удалять индексы больших таблиц на время загрузки")
+    parser.add_argument("--skip-fk-checks", action="store_true",
+                        help="не проверять внешние ключи при COPY (PostgreSQL, суперпользователь)")
+    parser.add_argument("--truncate", action="store_true", help="очистить таблицы соревнования перед загрузкой")
+    parser.add_argument("--rebuild-caches", action="store_true", help="перестроить таблицу лидеров и ряды счета в Redis")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.users < args.teams:
+        parser.error("--users должно быть не меньше --teams: у каждой команды есть капитан")
+
+    init_db()
+    started = time.perf_counter()
+    if args.truncate:
+        truncator = TableWriter(args.chunk_rows)
+        truncator.truncate(TRUNCATE_TABLES)
+        truncator.close()
+
+    # Индексы удаляются до открытия соединения загрузки: DROP INDEX ждет
+    # завершения транзакций, читавших таблицу
+    dropped = [] if args.keep_indexes else drop_indexes([Submission, AuditLog, Notification])
+    index_seconds = 0.0
+
+    writer = TableWriter(args.chunk_rows, skip_fk_checks=args.skip_fk_checks)
+    try:
+
+        generator = CompetitionGenerator(args)
+        plan_started = time.perf_counter()
+        generator.plan(writer)
+        plan_seconds = time.perf_counter() - plan_started
+
+        generator.load_core(writer)
+        generator.load_submissions(writer)
+        generator.load_audit_logs(writer)
+        generator.load_notifications(writer)
+        # Соединение загрузки не должно держать блокировки во время CREATE INDEX
+        writer.connection.commit()
+        index_seconds = create_indexes(dropped)
+
+        finish_started = time.perf_counter()
+        writer.finish(TABLES)
+        finish_seconds = time.perf_counter() - finish_started
+    finally:
+        writer.close()
+        if dropped and not index_seconds:
+            # Загрузка прервана - индексы возвращаются в любом случае
+            create_indexes(dropped)
+
+    report = {
+        "database": engine.dialect.name,
+        "run_id": generator.run_id,
+        "competition": {
+            "start": generator.start.isoformat(),
+            "hours": args.hours,
+            "solves": int(len(generator.solve_team)),
+            "teams_without_solves": int((generator.team_scores == 0).sum()),
+            "top_score": int(generator.team_scores.max()) if args.teams else 0
+        },
+        "rows": dict(writer.rows),
+        "load_seconds": {table: round(seconds, 2) for table, seconds in writer.seconds.items()},
+        "rows_per_second": {
+            table: round(writer.rows[table] / seconds) for table, seconds in writer.seconds.items() if seconds > 0
+        },
+        "plan_seconds": round(plan_seconds, 2),
+        "index_seconds": round(index_seconds, 2),
+        "analyze_seconds": round(finish_seconds, 2),
+        "total_seconds": round(time.perf_counter() - started, 2)
+    }
+    if args.rebuild_caches:
+        report["caches"] = rebuild_caches()
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
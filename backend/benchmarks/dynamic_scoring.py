@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Скорость пересчета динамической оценки на матрице решений.
+
+Строит матрицу команда × задание (по умолчанию 5000 × 500) и сравнивает
+векторный пересчет DynamicScoringEngine с построчным пересчетом через
+ScoringService.calculate_dynamic_score. Затем добавляет решения по одному
+и измеряет полный цикл: пересчет и выбор изменившихся команд. Результаты
+обоих способов сверяются.
+
+Запуск (БД не нужна):
+    python -m benchmarks.dynamic_scoring --teams 5000 --challenges 500
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.core.database import Base  # noqa: F401 - app.core до app.services, иначе цикл импорта моделей
+from app.services.dynamic_scoring import DynamicScoringEngine
+from app.services.scoring_service import ScoringService
+
+
+def build_engine(teams: int, challenges: int, density: float, seed: int):
+    """Движок со случайной матрицей: популярные задания решают чаще"""
+    rng = random.Random(seed)
+    engine = DynamicScoringEngine()
+    base_points = {challenge_id: rng.choice([100, 200, 300, 500, 1000]) for challenge_id in range(1, challenges + 1)}
+    engine.set_challenge_points(base_points.items())
+    engine.set_team_scores((team_id, 0) for team_id in range(1, teams + 1))
+
+    started = datetime(2025, 1, 1)
+    solves = []
+    for challenge_id in range(1, challenges + 1):
+        popularity = density * 2 * (1 - challenge_id / (challenges + 1))
+        for team_id in range(1, teams + 1):
+            if rng.random() < popularity:
+                solves.append((team_id, challenge_id, started + timedelta(seconds=rng.randint(0, 86400))))
+    engine.add_solves(solves)
+    return engine, base_points, len(solves)
+
+
+def scalar_scores(engine: DynamicScoringEngine, base_points):
+    """Построчный пересчет: стоимость каждого задания через calculate_dynamic_score"""
+    scoring_service = ScoringService(db=None)
+    teams, challenges = len(engine.team_ids), len(engine.challenge_ids)
+    matrix = engine.solves[:teams, :challenges]
+
+    values = {}
+    for col, challenge_id in enumerate(engine.challenge_ids):
+        challenge = SimpleNamespace(points=base_points[challenge_id], solved_count=int(matrix[:, col].sum()))
+        values[col] = scoring_service.calculate_dynamic_score(challenge)
+
+    scores = []
+    for row in range(teams):
+        solved = matrix[row].nonzero()[0]
+        scores.append(sum(values[col] for col in solved))
+    return scores
+
+
+def timed(func, repeats: int):
+    samples = []
+    result = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - started)
+    return result, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", type=int, default=5000, help="количество команд")
+    parser.add_argument("--challenges", type=int, default=500, help="количество заданий")
+    parser.add_argument("--density", type=float, default=0.15, help="средняя доля решивших задание команд")
+    parser.add_argument("--repeats", type=int, default=20, help="повторов векторного пересчета")
+    parser.add_argument("--solves", type=int, default=200, help="инкрементальных решений")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    engine, base_points, total_solves = build_engine(args.teams, args.challenges, args.density, args.seed)
+
+    (_, vector), vector_samples = timed(engine.compute, args.repeats)
+    scalar, scalar_samples = timed(lambda: scalar_scores(engine, base_points), 1)
+    mismatches = sum(1 for left, right in zip(vector.tolist(), scalar) if left != right)
+
+    # Инкрементальный цикл: одно новое решение, пересчет, выбор изменившихся команд
+    for team_id, score in zip(engine.team_ids, vector.tolist()):
+        engine.team_scores[engine.team_rows[team_id]] = score
+    rng = random.Random(args.seed + 1)
+    cycle_samples = []
+    changed_counts = []
+    for _ in range(args.solves):
+        team_id = rng.randint(1, args.teams)
+        challenge_id = rng.randint(1, args.challenges)
+        started = time.perf_counter()
+        engine.add_solves([(team_id, challenge_id, datetime.utcnow())])
+        changed = engine.changed_scores()
+        cycle_samples.append(time.perf_counter() - started)
+        for changed_team, score in changed.items():
+            engine.team_scores[engine.team_rows[changed_team]] = score
+        engine._dirty_rows.clear()
+        changed_counts.append(len(changed))
+
+    def ms(samples):
+        return round(statistics.median(samples) * 1000, 3)
+
+    report = {
+        "teams": args.teams,
+        "challenges": args.challenges,
+        "solves": total_solves,
+        "vectorized_recompute_ms": ms(vector_samples),
+        "scalar_recompute_ms": ms(scalar_samples),
+        "speedup": round(statistics.median(scalar_samples) / statistics.median(vector_samples), 1),
+        "incremental_cycle_ms": {
+            "p50": ms(cycle_samples),
+            "max": round(max(cycle_samples) * 1000, 3)
+        },
+        "changed_teams_per_solve": {
+            "median": statistics.median(changed_counts),
+            "max": max(changed_counts)
+        },
+        "mismatches": mismatches
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
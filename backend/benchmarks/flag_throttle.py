@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Объем записи при переборе флагов с ограничением неверных флагов и без него.
+
+Каждая команда-"бот" отправляет --guesses неверных флагов в одно задание,
+выбирая их из словаря --dictionary вариантов (повторы неизбежны), и не
+ждет Retry-After. Режимы:
+  off      - ограничение выключено: каждая отправка - строка submissions и событие outbox
+  repeats  - только учет повторов: повтор не пишется, пауза не наступает
+  full     - учет повторов и экспоненциальная пауза (настройки FLAG_THROTTLE_*)
+
+Для каждого режима - ответы API, записанные строки submissions и outbox_events
+на 1000 отправок. После переноса повторов сумма submissions.attempts должна
+совпасть с числом отправок, которые прошли до проверки флага, иначе скрипт
+завершается с кодом 1.
+
+Запуск (по умолчанию SQLite и fakeredis):
+    python -m benchmarks.flag_throttle --teams 20 --guesses 200 --dictionary 50
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from collections import Counter
+
+
+async def run_mode(app, world, mode: str, args) -> dict:
+    import httpx
+    from sqlalchemy import func, select
+
+    from app.core.config import settings
+    from app.core.database import SessionLocal
+    from app.models.outbox_event import OutboxEvent
+    from app.models.submission import Submission
+    from app.services.flag_throttle import flag_throttle
+
+    settings.FLAG_THROTTLE_ENABLED = mode != "off"
+    flag_throttle.free_attempts = args.guesses if mode == "repeats" else settings.FLAG_THROTTLE_FREE_ATTEMPTS
+
+    challenge_id = world.challenge_ids[0]
+    team_ids = [team_id for _, team_id, _ in world.players]
+    dictionary = [f"CTF{{guess_{index}}}" for index in range(args.dictionary)]
+
+    db = SessionLocal()
+    try:
+        outbox_before = db.scalar(select(func.count(OutboxEvent.id)))
+    finally:
+        db.close()
+
+    statuses = Counter()
+
+    async def bot(client, token: str, seed: int):
+        bot_rng = random.Random(seed)
+        for _ in range(args.guesses):
+            response = await client.post(
+                "/api/submissions/",
+                json={"challenge_id": challenge_id, "flag": bot_rng.choice(dictionary)},
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            statuses[response.status_code] += 1
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await asyncio.gather(*[
+            bot(client, token, args.seed * 1000 + index)
+            for index, (_, _, token) in enumerate(world.players)
+        ])
+
+    flag_throttle.flush_repeats()
+
+    db = SessionLocal()
+    try:
+        rows, attempts = db.execute(
+            select(func.count(Submission.id), func.coalesce(func.sum(Submission.attempts), 0))
+            .where(Submission.team_id.in_(team_ids))
+        ).one()
+        outbox_rows = db.scalar(select(func.count(OutboxEvent.id))) - outbox_before
+    finally:
+        db.close()
+
+    requests = sum(statuses.values())
+    return {
+        "requests": requests,
+        "responses": {str(code): count for code, count in sorted(statuses.items())},
+        "submission_rows": rows,
+        "outbox_rows": outbox_rows,
+        "rows_per_1000_requests": round((rows + outbox_rows) * 1000 / requests, 1),
+        "recorded_attempts": attempts,
+        "checked_attempts": statuses[200]
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="БД для прогона (по умолчанию временная SQLite)")
+    parser.add_argument("--redis-url", help="настоящий Redis вместо fakeredis")
+    parser.add_argument("--teams", type=int, default=20, help="команд-ботов")
+    parser.add_argument("--guesses", type=int, default=200, help="отправок каждой команды")
+    parser.add_argument("--dictionary", type=int, default=50, help="вариантов флага в словаре бота")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from benchmarks.load.environment import boot
+    app, _ = boot(args.database_url, args.redis_url)
+    from benchmarks.load.seed import seed_world
+
+    # Свои команды и задание на каждый режим; засев до первого запроса,
+    # чтобы задания попали в индекс при его загрузке
+    rng = random.Random(args.seed)
+    modes = ("off", "repeats", "full")
+    worlds = {mode: seed_world(args.teams, 1, 1, 0.0, 0, rng) for mode in modes}
+
+    results = {mode: await run_mode(app, worlds[mode], mode, args) for mode in modes}
+
+    failures = [
+        f"{mode}: в attempts {result['recorded_attempts']}, проверено флагов {result['checked_attempts']}"
+        for mode, result in results.items()
+        if result["recorded_attempts"] != result["checked_attempts"]
+    ]
+    print(json.dumps({**results, "failures": failures}, indent=2, ensure_ascii=False))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
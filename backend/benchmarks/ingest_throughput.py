@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Сравнение пропускной способности синхронной записи отправок
+и асинхронного приема через очередь с пакетной записью.
+
+Синхронный путь повторяет работу submit_flag с БД: отдельная транзакция
+на отправку и еще одна на запись аудита. Асинхронный путь кладет отправки
+в локальную очередь и ждет, пока фоновый потребитель запишет их пачками.
+
+Запуск:
+    DATABASE_URL=postgresql://... python -m benchmarks.ingest_throughput --submissions 5000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from app.core.config import settings
+from app.core.database import SessionLocal, init_db
+from app.models.challenge import Challenge
+from app.models.submission import Submission
+from app.models.team import Team
+from app.models.user import User
+from app.services.audit_service import AuditService
+from app.services.scoring_service import ScoringService
+from app.services.submission_ingest import SubmissionIngestService
+
+
+def seed(teams: int, challenges: int):
+    """Создание команд и заданий для прогона"""
+    db = SessionLocal()
+    run_id = uuid.uuid4().hex[:8]
+    try:
+        challenge_rows = []
+        for index in range(challenges):
+            challenge = Challenge(
+                title=f"ingest-{run_id}-{index}",
+                description="ingest benchmark",
+                category="bench",
+                difficulty="easy",
+                points=100,
+                flag=f"CTF{{{run_id}{index}}}"
+            )
+            db.add(challenge)
+            challenge_rows.append(challenge)
+
+        players = []
+        for index in range(teams):
+            team = Team(name=f"ingest-{run_id}-{index}")
+            db.add(team)
+            db.flush()
+            user = User(
+                username=f"ingest_{run_id}_{index}",
+                email=f"ingest_{run_id}_{index}@bench.local",
+                hashed_password="-",
+                team_id=team.id
+            )
+            db.add(user)
+            db.flush()
+            players.append((team.id, user.id, user.username))
+
+        db.commit()
+        return [challenge.id for challenge in challenge_rows], players
+    finally:
+        db.close()
+
+
+def make_workload(count: int, challenge_ids, players, correct_ratio: float):
+    """Генерация отправок: в основном неправильные флаги, как при старте соревнования"""
+    workload = []
+    for _ in range(count):
+        team_id, user_id, username = random.choice(players)
+        workload.append({
+            "team_id": team_id,
+            "user_id": user_id,
+            "username": username,
+            "challenge_id": random.choice(challenge_ids),
+            "challenge_title": "bench",
+            "team_name": "bench",
+            "flag": "CTF{" + uuid.uuid4().hex[:12] + "}",
+            "points": 100,
+            "is_correct": random.random() < correct_ratio
+        })
+    return workload
+
+
+async def run_sync(workload) -> float:
+    """Синхронный путь: транзакция на отправку и отдельная на аудит"""
+    started = time.perf_counter()
+    for item in workload:
+        db = SessionLocal()
+        try:
+            submission_id = None
+            if item["is_correct"]:
+                solve = ScoringService(db).record_solve(
+                    team_id=item["team_id"],
+                    user_id=item["user_id"],
+                    challenge_id=item["challenge_id"],
+                    flag=item["flag"],
+                    points=item["points"]
+                )
+                if solve:
+                    submission_id = solve["submission"].id
+            else:
+                submission = Submission(
+                    team_id=item["team_id"],
+                    user_id=item["user_id"],
+                    challenge_id=item["challenge_id"],
+                    flag=item["flag"],
+                    status="rejected",
+                    points_awarded=0
+                )
+                db.add(submission)
+                db.flush()
+                submission_id = submission.id
+            db.commit()
+
+            await AuditService(db).log_flag_submission(
+                user_id=item["user_id"],
+                challenge_id=item["challenge_id"],
+                status="accepted" if item["is_correct"] else "rejected",
+                details={"submission_id": submission_id}
+            )
+        finally:
+            db.close()
+    return time.perf_counter() - started
+
+
+async def run_queue(workload, batch_size: int) -> float:
+    """Асинхронный путь: локальная очередь и пакетная запись"""
+    settings.SUBMISSION_INGEST_BACKEND = "local"
+    service = SubmissionIngestService()
+    service.batch_size = batch_size
+
+    written = 0
+    done = asyncio.Event()
+    deliver = service.deliver_results
+
+    async def count_results(results):
+        nonlocal written
+        written += len(results)
+        await deliver(results)
+        if written >= len(workload):
+            done.set()
+
+    service.deliver_results = count_results
+
+    started = time.perf_counter()
+    await service.start()
+    for item in workload:
+        await service.enqueue(**item)
+    await done.wait()
+    elapsed = time.perf_counter() - started
+    await service.stop()
+    return elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=5000, help="количество отправок")
+    parser.add_argument("--teams", type=int, default=500, help="количество команд")
+    parser.add_argument("--challenges", type=int, default=50, help="количество заданий")
+    parser.add_argument("--correct-ratio", type=float, default=0.02, help="доля правильных флагов")
+    parser.add_argument("--batch-size", type=int, default=settings.SUBMISSION_INGEST_BATCH_SIZE)
+    args = parser.parse_args()
+
+    init_db()
+    challenge_ids, players = seed(args.teams, args.challenges)
+
+    sync_elapsed = await run_sync(make_workload(args.submissions, challenge_ids, players, args.correct_ratio))
+    queue_elapsed = await run_queue(
+        make_workload(args.submissions, challenge_ids, players, args.correct_ratio),
+        args.batch_size
+    )
+
+    print(json.dumps({
+        "submissions": args.submissions,
+        "sync": {
+            "elapsed_seconds": round(sync_elapsed, 3),
+            "submissions_per_second": round(args.submissions / sync_elapsed, 1)
+        },
+        "queue": {
+            "batch_size": args.batch_size,
+            "elapsed_seconds": round(queue_elapsed, 3),
+            "submissions_per_second": round(args.submissions / queue_elapsed, 1)
+        },
+        "speedup": round(sync_elapsed / queue_elapsed, 2)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
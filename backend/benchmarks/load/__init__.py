@@ -0,0 +1,14 @@
+"""
+Нагрузочный прогон API под старт соревнования.
+
+Поднимает приложение FastAPI в процессе поверх локальной БД (PostgreSQL
+или SQLite) и fakeredis, засеивает синтетические команды, задания и историю
+отправок и гоняет конкурентных httpx-клиентов по сценариям: отправка флагов,
+список заданий, таблица лидеров и их смесь. Для каждого сценария в JSON
+выводятся p50/p95/p99 задержки, пропускная способность и число запросов
+к БД на HTTP-запрос.
+
+Запуск из каталога backend:
+    python -m benchmarks.load --scenario mixed --concurrency 50 --duration 20
+    python -m benchmarks.load --database-url postgresql://... --teams 1000 --challenges 100
+"""
@@ -0,0 +1,136 @@
+"""
+Точка входа: python -m benchmarks.load --help
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+
+from benchmarks.load import __doc__ as package_doc
+from benchmarks.load.environment import boot
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=package_doc, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="БД для прогона (по умолчанию временная SQLite)")
+    parser.add_argument("--redis-url", help="настоящий Redis вместо fakeredis")
+    parser.add_argument("--scenario", default="submit,challenges,leaderboard,mixed",
+                        help="сценарии через запятую: submit, challenges, leaderboard, mixed")
+    parser.add_argument("--teams", type=int, default=300, help="количество команд")
+    parser.add_argument("--users-per-team", type=int, default=4, help="участников в команде")
+    parser.add_argument("--challenges", type=int, default=60, help="количество заданий")
+    parser.add_argument("--solve-density", type=float, default=0.2, help="средняя доля решивших задание команд")
+    parser.add_argument("--wrong-per-solve", type=int, default=3, help="неправильных отправок в истории на решение")
+    parser.add_argument("--concurrency", type=int, default=50, help="одновременных клиентов")
+    parser.add_argument("--duration", type=float, default=10.0, help="длительность сценария, секунд")
+    parser.add_argument("--requests", type=int, default=0, help="ограничение числа запросов сценария (0 - без ограничения)")
+    parser.add_argument("--warmup", type=int, default=50, help="запросов прогрева перед замером")
+    parser.add_argument("--ingest", action="store_true", help="асинхронный прием отправок через очередь")
+    parser.add_argument("--no-lifespan", action="store_true", help="не запускать фоновые сервисы приложения")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="файл для JSON-отчета (по умолчанию stdout)")
+    return parser.parse_args()
+
+
+async def run_scenario(client, world, scenario: str, concurrency: int, duration: float,
+                       max_requests: int, seed: int, recorder=None):
+    """Прогон сценария конкурентными клиентами до истечения времени или лимита запросов"""
+    from benchmarks.load.metrics import QUERY_COUNT_HEADER, Recorder
+    from benchmarks.load.scenarios import pick_operation
+
+    recorder = recorder or Recorder()
+    header = QUERY_COUNT_HEADER.decode()
+    deadline = time.perf_counter() + duration
+    issued = 0
+
+    async def worker(index: int):
+        nonlocal issued
+        rng = random.Random(seed * 1000 + index)
+        while time.perf_counter() < deadline and (not max_requests or issued < max_requests):
+            issued += 1
+            name, operation = pick_operation(scenario, rng)
+            started = time.perf_counter()
+            try:
+                response = await operation(client, world, rng)
+            except Exception as e:
+                recorder.record_error(name, e)
+                continue
+            queries = response.headers.get(header)
+            recorder.record(name, time.perf_counter() - started, response.status_code,
+                            int(queries) if queries is not None else None)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    return recorder, time.perf_counter() - started
+
+
+async def main(args):
+    # boot() меняет текущий каталог
+    output_path = os.path.abspath(args.output) if args.output else None
+    app, workdir = boot(args.database_url, args.redis_url, ingest=args.ingest)
+
+    import httpx
+
+    from app.core.config import settings
+    from app.core.database import engine
+    from benchmarks.load.metrics import QueryCountingApp
+    from benchmarks.load.scenarios import SCENARIOS
+    from benchmarks.load.seed import seed_world
+
+    scenarios = [name.strip() for name in args.scenario.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        print(f"Неизвестные сценарии: {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(2)
+
+    rng = random.Random(args.seed)
+    seed_started = time.perf_counter()
+    world = seed_world(args.teams, args.users_per_team, args.challenges,
+                       args.solve_density, args.wrong_per_solve, rng)
+    seed_elapsed = time.perf_counter() - seed_started
+
+    counted_app = QueryCountingApp(app, engine)
+    lifespan = contextlib.nullcontext() if args.no_lifespan else app.router.lifespan_context(app)
+
+    results = {}
+    async with lifespan:
+        # Необработанные исключения приложения считаются ответами 500, а не ошибками клиента
+        transport = httpx.ASGITransport(app=counted_app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            for index, scenario in enumerate(scenarios):
+                if args.warmup:
+                    await run_scenario(client, world, scenario, min(args.concurrency, args.warmup),
+                                       args.duration, args.warmup, args.seed + index + 100)
+                recorder, elapsed = await run_scenario(client, world, scenario, args.concurrency,
+                                                       args.duration, args.requests, args.seed + index)
+                results[scenario] = recorder.report(elapsed)
+
+    report = {
+        "database": engine.url.get_backend_name(),
+        "redis": "redis" if args.redis_url else "fakeredis",
+        "submission_ingest": settings.SUBMISSION_INGEST_MODE,
+        "concurrency": args.concurrency,
+        "duration_seconds": args.duration,
+        "seed": {**world.describe(), "elapsed_seconds": round(seed_elapsed, 3)},
+        "scenarios": results
+    }
+
+    return report, output_path
+
+
+if __name__ == "__main__":
+    # Логи приложения уходят в stderr, в stdout остается только отчет
+    with contextlib.redirect_stdout(sys.stderr):
+        report, output_path = asyncio.run(main(parse_args()))
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if output_path:
+        with open(output_path, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
@@ -0,0 +1,63 @@
+"""
+Подготовка окружения для прогона: БД, Redis и рабочий каталог.
+
+Настройки приложения читаются при первом импорте app, поэтому boot()
+нужно вызывать до любого импорта из app.
+"""
+
+import os
+import sys
+import tempfile
+from typing import Optional
+
+from sqlalchemy import event
+
+
+def boot(database_url: Optional[str] = None, redis_url: Optional[str] = None, ingest: bool = False):
+    """
+    Импорт приложения с локальными заменами инфраструктуры
+
+    Без database_url создается временная SQLite база, без redis_url
+    клиент Redis подменяется на fakeredis. Возвращает (app, workdir).
+    """
+    workdir = tempfile.mkdtemp(prefix="ctf-load-")
+    # StaticFiles монтируется относительно текущего каталога
+    os.makedirs(os.path.join(workdir, "static"), exist_ok=True)
+
+    os.environ["DATABASE_URL"] = database_url or f"sqlite:///{os.path.join(workdir, 'load.db')}"
+    os.environ["SUBMISSION_INGEST_MODE"] = "queue" if ingest else "sync"
+    os.environ["SUBMISSION_INGEST_BACKEND"] = "local"
+    # Прогон меряет API, а не лимиты запросов и неверных флагов
+    # (для них есть benchmarks.rate_limiter и benchmarks.flag_throttle)
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ.setdefault("FLAG_THROTTLE_ENABLED", "false")
+    if redis_url:
+        os.environ["REDIS_URL"] = redis_url
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if backend_dir not in sys.path:
+        sys.path.insert(0, backend_dir)
+    os.chdir(workdir)
+
+    from app.core.cache import async_cache_manager, cache_manager
+    if not redis_url:
+        import fakeredis
+        server = fakeredis.FakeServer()
+        cache_manager.redis_client = fakeredis.FakeRedis(server=server)
+        async_cache_manager.redis_client = fakeredis.FakeAsyncRedis(server=server)
+
+    from app.core.database import engine, init_db
+    from app.main import app
+
+    if engine.url.get_backend_name() == "sqlite":
+        # Без WAL писатели SQLite блокируют читателей, и прогон меряет только блокировки
+        @event.listens_for(engine, "connect")
+        def _sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA busy_timeout=30000")
+            cursor.close()
+
+    init_db()
+    return app, workdir
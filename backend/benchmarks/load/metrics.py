@@ -0,0 +1,122 @@
+"""
+Сбор метрик прогона: задержки, коды ответов и запросы к БД на HTTP-запрос.
+"""
+
+import contextvars
+import math
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+QUERY_COUNT_HEADER = b"x-bench-db-queries"
+
+# Счетчик запросов к БД текущего HTTP-запроса. Обработчики FastAPI
+# выполняются в пуле потоков с копией контекста, поэтому счетчик - изменяемый
+# список, общий для копий
+_current_counter: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("bench_query_counter", default=None)
+
+
+class QueryCountingApp:
+    """
+    ASGI-обертка, считающая запросы к БД на каждый HTTP-запрос
+
+    Число запросов, выполненных до отправки заголовков ответа, передается
+    клиенту в заголовке x-bench-db-queries.
+    """
+
+    def __init__(self, app, engine):
+        self.app = app
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    @staticmethod
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter = _current_counter.get()
+        if counter is not None:
+            counter[0] += 1
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter = [0]
+        token = _current_counter.set(counter)
+
+        async def send_with_count(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((QUERY_COUNT_HEADER, str(counter[0]).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_count)
+        finally:
+            _current_counter.reset(token)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Перцентиль по методу ближайшего ранга"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class Recorder:
+    """Результаты запросов сценария, сгруппированные по операциям"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.queries: Dict[str, List[int]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.errors: Counter = Counter()
+
+    def record(self, operation: str, latency: float, status_code: int, queries: Optional[int]):
+        self.latencies[operation].append(latency)
+        self.statuses[operation][status_code] += 1
+        if queries is not None:
+            self.queries[operation].append(queries)
+
+    def record_error(self, operation: str, error: Exception):
+        self.errors[f"{operation}: {type(error).__name__}"] += 1
+
+    @staticmethod
+    def _summary(latencies: List[float], queries: List[int], statuses: Counter, elapsed: float) -> dict:
+        ordered = sorted(latencies)
+
+        def ms(value: float) -> float:
+            return round(value * 1000, 2)
+
+        return {
+            "requests": len(ordered),
+            "throughput_rps": round(len(ordered) / elapsed, 1) if elapsed > 0 else 0.0,
+            "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+            "latency_ms": {
+                "p50": ms(percentile(ordered, 0.50)),
+                "p95": ms(percentile(ordered, 0.95)),
+                "p99": ms(percentile(ordered, 0.99)),
+                "max": ms(ordered[-1]) if ordered else 0.0
+            },
+            "db_queries_per_request": {
+                "mean": round(sum(queries) / len(queries), 2) if queries else None,
+                "p95": percentile(sorted(queries), 0.95) if queries else None,
+                "max": max(queries) if queries else None
+            }
+        }
+
+    def report(self, elapsed: float) -> dict:
+        """Итог по всему сценарию и по каждой операции"""
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        all_queries = [value for values in self.queries.values() for value in values]
+        all_statuses = sum(self.statuses.values(), Counter())
+
+        report = self._summary(all_latencies, all_queries, all_statuses, elapsed)
+        report["elapsed_seconds"] = round(elapsed, 3)
+        report["errors"] = dict(self.errors)
+        report["operations"] = {
+            operation: self._summary(self.latencies[operation], self.queries[operation], self.statuses[operation], elapsed)
+            for operation in sorted(self.latencies)
+        }
+        return report
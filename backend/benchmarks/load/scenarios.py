@@ -0,0 +1,81 @@
+"""
+Сценарии нагрузки: набор операций API с весами.
+
+Операция получает httpx-клиент, засеянные данные и генератор случайных
+чисел и возвращает ответ. Участник выбирается случайно на каждый запрос,
+поэтому отправки распределяются по многим пользователям, как при старте
+соревнования.
+"""
+
+import random
+import uuid
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+
+from benchmarks.load.seed import World
+
+Operation = Callable[[httpx.AsyncClient, World, random.Random], Awaitable[httpx.Response]]
+
+# Доля правильных флагов среди отправок (остальные - перебор и опечатки)
+CORRECT_FLAG_RATIO = 0.05
+
+
+def _auth(token: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def submit_flag(client: httpx.AsyncClient, world: World, rng: random.Random) -> httpx.Response:
+    """POST /api/submissions/ - в основном неправильные флаги"""
+    _, _, token = rng.choice(world.players)
+    challenge_id = rng.choice(world.challenge_ids)
+    if rng.random() < CORRECT_FLAG_RATIO:
+        flag = world.flags[challenge_id]
+    else:
+        flag = f"CTF{{{uuid.uuid4().hex[:16]}}}"
+    return await client.post(
+        "/api/submissions/",
+        json={"challenge_id": challenge_id, "flag": flag},
+        headers=_auth(token)
+    )
+
+
+async def list_challenges(client: httpx.AsyncClient, world: World, rng: random.Random) -> httpx.Response:
+    """GET /api/challenges/ от имени участника"""
+    _, _, token = rng.choice(world.players)
+    return await client.get("/api/challenges/", headers=_auth(token))
+
+
+async def leaderboard(client: httpx.AsyncClient, world: World, rng: random.Random) -> httpx.Response:
+    """GET /api/teams/leaderboard - первая страница"""
+    return await client.get("/api/teams/leaderboard", params={"limit": 50})
+
+
+async def my_position(client: httpx.AsyncClient, world: World, rng: random.Random) -> httpx.Response:
+    """GET /api/teams/leaderboard/me - окрестность своей команды"""
+    _, _, token = rng.choice(world.players)
+    return await client.get("/api/teams/leaderboard/me", headers=_auth(token))
+
+
+SCENARIOS: Dict[str, List[Tuple[str, float, Operation]]] = {
+    "submit": [("submit_flag", 1.0, submit_flag)],
+    "challenges": [("list_challenges", 1.0, list_challenges)],
+    "leaderboard": [
+        ("leaderboard", 0.7, leaderboard),
+        ("my_position", 0.3, my_position)
+    ],
+    # Старт соревнования: все открывают задания и сразу начинают сдавать флаги
+    "mixed": [
+        ("submit_flag", 0.5, submit_flag),
+        ("list_challenges", 0.3, list_challenges),
+        ("leaderboard", 0.15, leaderboard),
+        ("my_position", 0.05, my_position)
+    ]
+}
+
+
+def pick_operation(scenario: str, rng: random.Random) -> Tuple[str, Operation]:
+    """Случайная операция сценария с учетом весов"""
+    operations = SCENARIOS[scenario]
+    name, _, operation = rng.choices(operations, weights=[weight for _, weight, _ in operations])[0]
+    return name, operation
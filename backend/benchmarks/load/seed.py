@@ -0,0 +1,170 @@
+"""
+Синтетические данные для прогона: команды, участники, задания и история отправок.
+
+Строки вставляются пакетами через insert() без ORM-объектов, счет команд
+и счетчики решений заданий согласованы с историей принятых отправок.
+"""
+
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import insert, select, update
+
+from app.core.database import SessionLocal
+from app.core.security import create_access_token
+from app.models.challenge import Challenge
+from app.models.submission import Submission
+from app.models.team import Team
+from app.models.user import User
+from app.services.leaderboard_service import LeaderboardService
+
+CATEGORIES = ["web", "crypto", "pwn", "reverse", "forensics", "misc"]
+DIFFICULTIES = [("easy", 100), ("medium", 250), ("hard", 500)]
+
+BATCH_SIZE = 5000
+
+
+class World:
+    """Засеянные данные, которые нужны сценариям"""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        # (user_id, team_id, токен)
+        self.players: List[Tuple[int, int, str]] = []
+        self.challenge_ids: List[int] = []
+        self.flags: Dict[int, str] = {}
+        self.history = 0
+
+    def describe(self) -> dict:
+        return {
+            "run_id": self.run_id,
+            "players": len(self.players),
+            "teams": len({team_id for _, team_id, _ in self.players}),
+            "challenges": len(self.challenge_ids),
+            "history_submissions": self.history
+        }
+
+
+def _insert_batches(db, model, rows: List[dict]):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+def seed_world(teams: int, users_per_team: int, challenges: int, solve_density: float,
+               wrong_per_solve: int, rng: random.Random) -> World:
+    """
+    Засев данных для прогона
+
+    Каждая команда решает задание с вероятностью, убывающей к сложным
+    заданиям (в среднем solve_density), на каждое решение приходится
+    wrong_per_solve неправильных отправок.
+    """
+    world = World(uuid.uuid4().hex[:8])
+    prefix = f"load-{world.run_id}"
+    db = SessionLocal()
+    try:
+        _insert_batches(db, Team, [
+            {"name": f"{prefix}-team-{index}", "score": 0}
+            for index in range(teams)
+        ])
+        team_ids = db.execute(
+            select(Team.id).where(Team.name.like(f"{prefix}-team-%")).order_by(Team.id)
+        ).scalars().all()
+
+        _insert_batches(db, User, [
+            {
+                "username": f"{prefix}-{team_id}-{member}",
+                "email": f"{prefix}-{team_id}-{member}@bench.local",
+                "hashed_password": "-",
+                "team_id": team_id,
+                "is_captain": member == 0
+            }
+            for team_id in team_ids
+            for member in range(users_per_team)
+        ])
+        users = db.execute(
+            select(User.id, User.username, User.team_id).where(User.username.like(f"{prefix}-%"))
+        ).all()
+
+        challenge_rows = []
+        for index in range(challenges):
+            difficulty, points = DIFFICULTIES[index * len(DIFFICULTIES) // max(challenges, 1)]
+            challenge_rows.append({
+                "title": f"{prefix}-challenge-{index}",
+                "description": "Synthetic load benchmark challenge",
+                "category": CATEGORIES[index % len(CATEGORIES)],
+                "difficulty": difficulty,
+                "points": points,
+                "flag": f"CTF{{{world.run_id}_{index}}}",
+                "is_active": True,
+                "is_visible": True,
+                "solved_count": 0
+            })
+        _insert_batches(db, Challenge, challenge_rows)
+        challenge_list = db.execute(
+            select(Challenge.id, Challenge.points, Challenge.flag)
+            .where(Challenge.title.like(f"{prefix}-challenge-%"))
+            .order_by(Challenge.id)
+        ).all()
+
+        # История: популярные (легкие) задания решают чаще
+        members: Dict[int, List[int]] = {}
+        for user_id, _, team_id in users:
+            members.setdefault(team_id, []).append(user_id)
+
+        started = datetime.utcnow() - timedelta(hours=6)
+        submissions = []
+        team_scores: Dict[int, int] = {}
+        solved_counts: Dict[int, int] = {}
+        for position, (challenge_id, points, flag) in enumerate(challenge_list):
+            popularity = solve_density * 2 * (1 - position / (len(challenge_list) + 1))
+            for team_id in team_ids:
+                if rng.random() >= popularity:
+                    continue
+                user_id = rng.choice(members[team_id])
+                solved_at = started + timedelta(seconds=rng.randint(0, 6 * 3600))
+                for attempt in range(wrong_per_solve):
+                    submissions.append({
+                        "team_id": team_id,
+                        "user_id": user_id,
+                        "challenge_id": challenge_id,
+                        "flag": f"CTF{{wrong_{uuid.uuid4().hex[:10]}}}",
+                        "status": "rejected",
+                        "points_awarded": 0,
+                        "is_first_blood": False,
+                        "submitted_at": solved_at - timedelta(seconds=attempt + 1)
+                    })
+                submissions.append({
+                    "team_id": team_id,
+                    "user_id": user_id,
+                    "challenge_id": challenge_id,
+                    "flag": flag,
+                    "status": "accepted",
+                    "points_awarded": points,
+                    "is_first_blood": False,
+                    "submitted_at": solved_at
+                })
+                team_scores[team_id] = team_scores.get(team_id, 0) + points
+                solved_counts[challenge_id] = solved_counts.get(challenge_id, 0) + 1
+
+        _insert_batches(db, Submission, submissions)
+        if team_scores:
+            db.execute(update(Team), [{"id": team_id, "score": score} for team_id, score in team_scores.items()])
+            db.execute(update(Challenge), [{"id": challenge_id, "solved_count": count} for challenge_id, count in solved_counts.items()])
+        db.commit()
+
+        # Таблица лидеров строится заново по засеянной истории
+        LeaderboardService(db).rebuild()
+
+        world.challenge_ids = [challenge_id for challenge_id, _, _ in challenge_list]
+        world.flags = {challenge_id: flag for challenge_id, _, flag in challenge_list}
+        world.players = [
+            (user_id, team_id, create_access_token({"sub": username}, expires_delta=timedelta(hours=12)))
+            for user_id, username, team_id in users
+        ]
+        world.history = len(submissions)
+        return world
+    finally:
+        db.close()
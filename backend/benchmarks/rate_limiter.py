@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Корректность и скорость RateLimiter под конкурентной нагрузкой.
+
+Корректность: несколько "воркеров" (свои RateLimiter и клиент Redis на
+общий сервер) одновременно отправляют burst запросов на один ключ -
+пройти должно ровно limit. Для сравнения тот же прогон выполняет
+прежняя схема (чтение списка отметок, фильтр в Python, запись обратно),
+которая пропускает лишние запросы из-за гонки чтения и записи.
+
+Скорость: проверок в секунду и обращений к Redis на проверку для обеих схем.
+При превышении лимита новой схемой скрипт завершается с кодом 1.
+
+Запуск (по умолчанию fakeredis, --redis-url для настоящего Redis):
+    python -m benchmarks.rate_limiter --workers 8 --burst 200 --limit 30
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+
+from app.core.cache import AsyncCacheManager, CacheManager
+from app.core.rate_limiting import RateLimiter
+
+
+class LegacyRateLimiter(RateLimiter):
+    """Прежняя реализация: список отметок времени в значении кэша"""
+
+    async def is_rate_limited(self, identifier: str, limit: int, window: int, action: str = "request") -> bool:
+        key = f"rate_limit:{action}:{identifier}"
+        current_time = int(time.time())
+        requests = [t for t in (await self.cache.get(key) or []) if t > current_time - window]
+        if len(requests) >= limit:
+            return True
+        requests.append(current_time)
+        await self.cache.set(key, requests, window)
+        return False
+
+
+def make_client(redis_url, server):
+    if redis_url:
+        import redis.asyncio
+        return redis.asyncio.Redis.from_url(redis_url)
+    import fakeredis
+    return fakeredis.FakeAsyncRedis(server=server)
+
+
+def count_round_trips(client) -> list:
+    """Подсчет обращений клиента к Redis: отдельных команд и выполненных pipeline"""
+    counter = [0]
+    execute_command = client.execute_command
+    pipeline = client.pipeline
+
+    async def counted_command(*args, **kwargs):
+        counter[0] += 1
+        return await execute_command(*args, **kwargs)
+
+    def counted_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def counted_execute(*execute_args, **execute_kwargs):
+            counter[0] += 1
+            return await execute(*execute_args, **execute_kwargs)
+
+        pipe.execute = counted_execute
+        return pipe
+
+    client.execute_command = counted_command
+    client.pipeline = counted_pipeline
+    return counter
+
+
+def make_limiters(limiter_class, workers: int, redis_url, server):
+    limiters, counters = [], []
+    for _ in range(workers):
+        cache = AsyncCacheManager(CacheManager())
+        cache.redis_client = make_client(redis_url, server)
+        counters.append(count_round_trips(cache.redis_client))
+        limiters.append(limiter_class(cache))
+    return limiters, counters
+
+
+async def correctness(limiter_class, args, server) -> dict:
+    limiters, _ = make_limiters(limiter_class, args.workers, args.redis_url, server)
+    identifier = uuid.uuid4().hex
+    results = await asyncio.gather(*[
+        limiters[i % len(limiters)].is_rate_limited(identifier, args.limit, 60, "bench")
+        for i in range(args.burst)
+    ])
+    return {"requests": args.burst, "limit": args.limit, "passed": results.count(False)}
+
+
+async def throughput(limiter_class, args, server) -> dict:
+    limiters, counters = make_limiters(limiter_class, args.workers, args.redis_url, server)
+    identifiers = [uuid.uuid4().hex for _ in range(args.keys)]
+
+    async def worker(index: int):
+        limiter = limiters[index]
+        for i in range(args.checks // args.workers):
+            await limiter.is_rate_limited(identifiers[i % len(identifiers)], 1000, 60, "bench")
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker(i) for i in range(args.workers)])
+    elapsed = time.perf_counter() - started
+    checks = args.checks // args.workers * args.workers
+    return {
+        "checks": checks,
+        "checks_per_sec": round(checks / elapsed),
+        "round_trips_per_check": round(sum(counter[0] for counter in counters) / checks, 2)
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", help="настоящий Redis вместо fakeredis")
+    parser.add_argument("--workers", type=int, default=8, help="независимых клиентов Redis")
+    parser.add_argument("--burst", type=int, default=200, help="одновременных запросов в проверке корректности")
+    parser.add_argument("--limit", type=int, default=30, help="лимит в проверке корректности")
+    parser.add_argument("--checks", type=int, default=5000, help="проверок в замере скорости")
+    parser.add_argument("--keys", type=int, default=100, help="разных идентификаторов в замере скорости")
+    args = parser.parse_args()
+
+    server = None
+    if not args.redis_url:
+        import fakeredis
+        server = fakeredis.FakeServer()
+
+    results = {}
+    for name, limiter_class in (("legacy", LegacyRateLimiter), ("gcra", RateLimiter)):
+        results[name] = {
+            "correctness": await correctness(limiter_class, args, server),
+            "throughput": await throughput(limiter_class, args, server)
+        }
+
+    passed = results["gcra"]["correctness"]["passed"]
+    failures = [] if passed == min(args.limit, args.burst) else [f"gcra: прошло {passed} запросов при лимите {args.limit}"]
+    print(json.dumps({**results, "failures": failures}, indent=2, ensure_ascii=False))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
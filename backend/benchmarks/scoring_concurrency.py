@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Проверка атомарности записи решений под конкурентной нагрузкой.
+
+Одновременно отправляет сотни правильных флагов на одно задание
+(каждая команда - несколько раз) и проверяет инварианты:
+ровно один First Blood, одно принятое решение на команду,
+счетчик решений и очки команд совпадают с таблицей submissions.
+
+Запуск (желательно на PostgreSQL):
+    DATABASE_URL=postgresql://... python -m benchmarks.scoring_concurrency --teams 300
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import SessionLocal, init_db
+from app.models.challenge import Challenge
+from app.models.submission import Submission
+from app.models.team import Team
+from app.models.user import User
+from app.services.scoring_service import ScoringService
+
+
+def seed(teams: int, points: int):
+    """Создание задания и команд для прогона"""
+    db = SessionLocal()
+    run_id = uuid.uuid4().hex[:8]
+    try:
+        challenge = Challenge(
+            title=f"concurrency-{run_id}",
+            description="scoring concurrency check",
+            category="bench",
+            difficulty="easy",
+            points=points,
+            flag=f"CTF{{{run_id}}}"
+        )
+        db.add(challenge)
+
+        team_users = []
+        for index in range(teams):
+            team = Team(name=f"bench-{run_id}-{index}")
+            db.add(team)
+            db.flush()
+            user = User(
+                username=f"bench_{run_id}_{index}",
+                email=f"bench_{run_id}_{index}@bench.local",
+                hashed_password="-",
+                team_id=team.id
+            )
+            db.add(user)
+            db.flush()
+            team_users.append((team.id, user.id))
+
+        db.commit()
+        return challenge.id, team_users
+    finally:
+        db.close()
+
+
+def submit(challenge_id: int, team_id: int, user_id: int, points: int, barrier: threading.Barrier):
+    """Одна отправка правильного флага в отдельной сессии"""
+    barrier.wait()
+    for attempt in range(20):
+        db = SessionLocal()
+        try:
+            result = ScoringService(db).record_solve(
+                team_id=team_id,
+                user_id=user_id,
+                challenge_id=challenge_id,
+                flag="CTF{concurrency}",
+                points=points
+            )
+            db.commit()
+            return "accepted" if result else "duplicate"
+        except OperationalError:
+            # SQLite допускает только одного писателя - повторяем
+            db.rollback()
+            time.sleep(0.01 * (attempt + 1))
+        finally:
+            db.close()
+    return "error"
+
+
+def verify(challenge_id: int, team_users, points: int):
+    """Проверка инвариантов после прогона"""
+    db = SessionLocal()
+    try:
+        team_ids = [team_id for team_id, _ in team_users]
+        challenge = db.query(Challenge).filter(Challenge.id == challenge_id).first()
+
+        accepted = db.query(Submission).filter(
+            Submission.challenge_id == challenge_id,
+            Submission.status == "accepted"
+        ).all()
+        first_bloods = [s for s in accepted if s.is_first_blood]
+        per_team = db.query(Submission.team_id, func.count(Submission.id)).filter(
+            Submission.challenge_id == challenge_id,
+            Submission.status == "accepted"
+        ).group_by(Submission.team_id).all()
+        wrong_scores = db.query(Team).filter(
+            Team.id.in_(team_ids),
+            Team.score != points
+        ).count()
+
+        errors = []
+        if len(accepted) != len(team_ids):
+            errors.append(f"accepted={len(accepted)}, expected {len(team_ids)}")
+        if any(count != 1 for _, count in per_team):
+            errors.append("team with more than one accepted solve")
+        if len(first_bloods) != 1:
+            errors.append(f"first_bloods={len(first_bloods)}")
+        elif challenge.first_blood_user_id != first_bloods[0].user_id:
+            errors.append("first_blood_user_id does not match first blood submission")
+        if challenge.solved_count != len(team_ids):
+            errors.append(f"solved_count={challenge.solved_count}, expected {len(team_ids)}")
+        if wrong_scores:
+            errors.append(f"{wrong_scores} teams with wrong score")
+        return errors
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", type=int, default=200, help="количество команд")
+    parser.add_argument("--repeats", type=int, default=3, help="одновременных отправок на команду")
+    parser.add_argument("--points", type=int, default=100, help="стоимость задания")
+    args = parser.parse_args()
+
+    init_db()
+    challenge_id, team_users = seed(args.teams, args.points)
+
+    jobs = [(team_id, user_id) for team_id, user_id in team_users for _ in range(args.repeats)]
+    barrier = threading.Barrier(len(jobs))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+        futures = [
+            executor.submit(submit, challenge_id, team_id, user_id, args.points, barrier)
+            for team_id, user_id in jobs
+        ]
+        outcomes = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    errors = verify(challenge_id, team_users, args.points)
+    report = {
+        "submissions": len(jobs),
+        "accepted": outcomes.count("accepted"),
+        "duplicates": outcomes.count("duplicate"),
+        "errors": outcomes.count("error"),
+        "elapsed_seconds": round(elapsed, 3),
+        "submissions_per_second": round(len(jobs) / elapsed, 1),
+        "invariant_violations": errors
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    sys.exit(1 if errors or report["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Задержка трансляции WebSocket на большом числе соединений.
+
+Имитирует --sockets соединений одного процесса: обычные клиенты
+принимают сообщение сразу, --slow клиентов тратят --slow-delay секунд
+на каждое, --stalled клиентов не читают вовсе. Для каждой из --broadcasts
+трансляций broadcast_to_all замеряются:
+  call_ms      - сколько вызывающий ждет возврата broadcast_to_all
+  delivery_ms  - p50/p99/max времени до получения обычными клиентами
+
+Режимы:
+  sequential - прежняя рассылка: send_text каждому сокету по очереди
+               (без зависших клиентов - с ними рассылка не завершается)
+  queued     - очереди отправки ConnectionSender и задачи записи
+
+Зависшие клиенты в режиме queued должны быть отключены по переполнению
+очереди или таймауту записи, а обычные - получить все сообщения, иначе
+скрипт завершается с кодом 1.
+
+Запуск (Redis и БД не нужны):
+    python -m benchmarks.websocket_broadcast --sockets 10000 --slow 100 --stalled 20
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+BENCH_MESSAGE_PREFIX = '{"type": "bench"'
+
+
+class Arrivals:
+    """Время получения текущей трансляции обычными клиентами"""
+
+    def __init__(self):
+        self.times = []
+        self.total = 0
+
+    def record(self):
+        self.times.append(time.perf_counter())
+        self.total += 1
+
+
+class SimulatedSocket:
+    """Соединение с заданной скоростью чтения; delay=None - клиент не читает"""
+
+    def __init__(self, delay, arrivals=None):
+        self.delay = delay
+        self.arrivals = arrivals
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        if self.delay is None:
+            await asyncio.Event().wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        # Учитываются только сообщения замера (не user_connected и т.п.)
+        if self.arrivals is not None and text.startswith(BENCH_MESSAGE_PREFIX):
+            self.arrivals.record()
+
+    async def close(self, code: int = 1000):
+        self.closed = True
+
+
+class SequentialConnectionManager:
+    """Прежняя рассылка: сериализация и запись в каждый сокет по очереди в вызове трансляции"""
+
+    def __init__(self):
+        self.active_connections = {}
+
+    async def connect(self, websocket, user_id: int, team_id: int, username: str):
+        self.active_connections[username] = websocket
+        return username
+
+    async def broadcast_to_all(self, message: dict):
+        for websocket in list(self.active_connections.values()):
+            try:
+                await websocket.send_text(json.dumps(message))
+            except Exception:
+                pass
+
+
+async def run(manager, args, stalled: int) -> dict:
+    arrivals = Arrivals()
+    stalled_sockets = []
+    fast = 0
+    for index in range(args.sockets):
+        if index < stalled:
+            websocket = SimulatedSocket(None)
+            stalled_sockets.append(websocket)
+        elif index < stalled + args.slow:
+            websocket = SimulatedSocket(args.slow_delay)
+        else:
+            websocket = SimulatedSocket(0, arrivals)
+            fast += 1
+        await manager.connect(websocket, index, index % args.teams, f"bench-{index}")
+    # Сообщения о подключении (если менеджер их рассылает) не участвуют в замере
+    await asyncio.sleep(0.5)
+
+    call_ms, delivery_ms = [], []
+    for number in range(args.broadcasts):
+        message = {"type": "bench", "n": number, "payload": "x" * args.payload}
+        arrivals.times.clear()
+        started = time.perf_counter()
+        await manager.broadcast_to_all(message)
+        call_ms.append((time.perf_counter() - started) * 1000)
+
+        deadline = time.perf_counter() + args.timeout
+        while len(arrivals.times) < fast and time.perf_counter() < deadline:
+            await asyncio.sleep(0.001)
+        delivery_ms.extend((at - started) * 1000 for at in arrivals.times)
+        await asyncio.sleep(args.interval)
+
+    # Зависшие клиенты отключаются не позже таймаута записи
+    deadline = time.perf_counter() + args.send_timeout + 1.0
+    while stalled_sockets and not all(websocket.closed for websocket in stalled_sockets) and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+
+    delivery_ms.sort()
+    return {
+        "sockets": args.sockets,
+        "call_ms": {"median": round(statistics.median(call_ms), 1), "max": round(max(call_ms), 1)},
+        "delivery_ms": {
+            "p50": round(delivery_ms[len(delivery_ms) // 2], 1) if delivery_ms else None,
+            "p99": round(delivery_ms[int(len(delivery_ms) * 0.99)], 1) if delivery_ms else None,
+            "max": round(delivery_ms[-1], 1) if delivery_ms else None
+        },
+        "fast_delivered": arrivals.total,
+        "fast_expected": fast * args.broadcasts,
+        "stalled_closed": sum(websocket.closed for websocket in stalled_sockets),
+        "stalled": stalled
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sockets", type=int, default=10000, help="соединений")
+    parser.add_argument("--slow", type=int, default=100, help="медленных клиентов")
+    parser.add_argument("--slow-delay", type=float, default=0.02, help="время чтения сообщения медленным клиентом, секунд")
+    parser.add_argument("--stalled", type=int, default=20, help="клиентов, которые не читают (только queued)")
+    parser.add_argument("--teams", type=int, default=2000, help="команд, по которым распределены соединения")
+    parser.add_argument("--broadcasts", type=int, default=5, help="трансляций в замере")
+    parser.add_argument("--interval", type=float, default=0.2, help="пауза между трансляциями, секунд")
+    parser.add_argument("--payload", type=int, default=512, help="размер сообщения, байт")
+    parser.add_argument("--timeout", type=float, default=30.0, help="ожидание доставки одной трансляции, секунд")
+    parser.add_argument("--queue-size", type=int, default=64, help="размер очереди отправки соединения")
+    parser.add_argument("--send-timeout", type=float, default=1.0, help="таймаут записи в сокет, секунд")
+    parser.add_argument("--skip-sequential", action="store_true", help="не замерять прежнюю рассылку")
+    args = parser.parse_args()
+
+    from app.api.websocket import ConnectionManager
+    from app.core.message_bus import LocalMessageBus
+
+    results = {}
+    if not args.skip_sequential:
+        results["sequential"] = await run(SequentialConnectionManager(), args, stalled=0)
+
+    manager = ConnectionManager(LocalMessageBus())
+    manager.send_queue_size = args.queue_size
+    manager.send_timeout = args.send_timeout
+    results["queued"] = await run(manager, args, stalled=args.stalled)
+    results["queued"]["send_queues"] = manager.get_send_queue_stats(top=3)
+    await manager.disconnect_all()
+
+    queued = results["queued"]
+    failures = []
+    if queued["fast_delivered"] != queued["fast_expected"]:
+        failures.append(f"queued: доставлено {queued['fast_delivered']} из {queued['fast_expected']}")
+    if queued["stalled_closed"] != queued["stalled"]:
+        failures.append(f"queued: отключено {queued['stalled_closed']} зависших клиентов из {queued['stalled']}")
+    print(json.dumps({**results, "failures": failures}, indent=2, ensure_ascii=False))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -48,6 +48,10 @@ beat_schedule = {
         'task': 'app.tasks.cleanup_tasks.backup_database_task',
         'schedule': 86400.0,  # 24 часа
     },
+    'reconcile-score-counters-hourly': {
+        'task': 'app.tasks.cleanup_tasks.reconcile_score_counters_task',
+        'schedule': 3600.0,  # 1 час
+    },
     'cleanup-inactive-users-monthly': {
         'task': 'app.tasks.cleanup_tasks.cleanup_inactive_users_task',
         'schedule': 2592000.0,  # 30 дней
@@ -0,0 +1,55 @@
+"""unique accepted submission per team and challenge
+
+Revision ID: 002_unique_accepted_submission
+Revises: 001_initial_migration
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002_unique_accepted_submission'
+down_revision = '001_initial_migration'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Повторные принятые решения (следствие гонки в старом коде) помечаем
+    # как дубликаты, оставляя самое раннее решение команды
+    op.execute("""
+        UPDATE submissions SET status = 'duplicate'
+        WHERE status = 'accepted' AND id NOT IN (
+            SELECT MIN(id) FROM submissions
+            WHERE status = 'accepted'
+            GROUP BY team_id, challenge_id
+        )
+    """)
+
+    # Счетчики старый код увеличивал и для дубликатов: пересчитываем их
+    # по оставшимся принятым решениям (First Blood определяется по solved_count == 1)
+    op.execute("""
+        UPDATE challenges SET solved_count = (
+            SELECT COUNT(*) FROM submissions
+            WHERE submissions.challenge_id = challenges.id
+            AND submissions.status = 'accepted'
+        )
+    """)
+    op.execute("""
+        UPDATE teams SET score = (
+            SELECT COALESCE(SUM(submissions.points_awarded), 0) FROM submissions
+            WHERE submissions.team_id = teams.id
+            AND submissions.status = 'accepted'
+        )
+    """)
+
+    op.create_index(
+        'uq_submissions_team_challenge_accepted',
+        'submissions',
+        ['team_id', 'challenge_id'],
+        unique=True,
+        postgresql_where=sa.text("status = 'accepted'")
+    )
+
+def downgrade() -> None:
+    op.drop_index('uq_submissions_team_challenge_accepted', table_name='submissions')
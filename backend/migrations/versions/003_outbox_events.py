@@ -0,0 +1,35 @@
+"""outbox events
+
+Revision ID: 003_outbox_events
+Revises: 002_unique_accepted_submission
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '003_outbox_events'
+down_revision = '002_unique_accepted_submission'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table('outbox_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event_type', sa.String(length=50), nullable=False),
+        sa.Column('payload', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('delivered_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_events_status_next_attempt', 'outbox_events', ['status', 'next_attempt_at'], unique=False)
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_events_status_next_attempt', table_name='outbox_events')
+    op.drop_table('outbox_events')
@@ -0,0 +1,50 @@
+"""competition scores
+
+Revision ID: 004_competition_scores
+Revises: 003_outbox_events
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004_competition_scores'
+down_revision = '003_outbox_events'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('competitions', sa.Column('standings_built_at', sa.DateTime(), nullable=True))
+    op.create_table('competition_scores',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('competition_id', sa.Integer(), nullable=False),
+        sa.Column('team_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Integer(), nullable=False),
+        sa.Column('solves', sa.Integer(), nullable=False),
+        sa.Column('last_solve_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['competition_id'], ['competitions.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('competition_id', 'team_id', name='uq_competition_scores_competition_team')
+    )
+    op.create_index(
+        'ix_competition_scores_standings',
+        'competition_scores',
+        ['competition_id', sa.text('score DESC'), sa.text('last_solve_at ASC'), 'team_id'],
+        unique=False
+    )
+    op.create_index(
+        'ix_submissions_accepted_submitted_at',
+        'submissions',
+        ['submitted_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'accepted'")
+    )
+
+def downgrade() -> None:
+    op.drop_index('ix_submissions_accepted_submitted_at', table_name='submissions')
+    op.drop_index('ix_competition_scores_standings', table_name='competition_scores')
+    op.drop_table('competition_scores')
+    op.drop_column('competitions', 'standings_built_at')
@@ -0,0 +1,21 @@
+"""submission attempts
+
+Revision ID: 005_submission_attempts
+Revises: 004_competition_scores
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005_submission_attempts'
+down_revision = '004_competition_scores'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('submissions', sa.Column('attempts', sa.Integer(), server_default='1', nullable=False))
+
+def downgrade() -> None:
+    op.drop_column('submissions', 'attempts')
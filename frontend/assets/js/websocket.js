@@ -7,6 +7,9 @@ class CTFWebSocket {
         this.reconnectDelay = 1000;
         this.eventHandlers = new Map();
         this.isConnected = false;
+        this.subscriptions = new Set();
+        this.scoreboardEpoch = null;
+        this.scoreboardSeq = null;
     }
 
     connect(token) {
@@ -25,6 +28,11 @@ class CTFWebSocket {
                 this.isConnected = true;
                 this.reconnectAttempts = 0;
                 this.triggerEvent('connected', {});
+                
+                // Restore channel subscriptions (server answers with a fresh snapshot)
+                this.subscriptions.forEach(channel => {
+                    this.send({ type: 'subscribe', channel: channel });
+                });
             };
 
             this.ws.onmessage = (event) => {
@@ -110,6 +118,26 @@ class CTFWebSocket {
 
     handleMessage(data) {
         const type = data.type;
+        
+        if (type === 'scoreboard_snapshot') {
+            this.scoreboardEpoch = data.epoch;
+            this.scoreboardSeq = data.seq;
+        } else if (type === 'scoreboard_delta') {
+            // Missed or out-of-order delta: ask the server to replay from the last applied one
+            if (data.epoch !== this.scoreboardEpoch || data.seq !== this.scoreboardSeq + 1) {
+                if (this.scoreboardSeq !== null && data.seq <= this.scoreboardSeq && data.epoch === this.scoreboardEpoch) {
+                    return;
+                }
+                this.send({
+                    type: 'scoreboard_resync',
+                    epoch: this.scoreboardEpoch,
+                    seq: this.scoreboardSeq
+                });
+                return;
+            }
+            this.scoreboardSeq = data.seq;
+        }
+        
         this.triggerEvent(type, data);
         
         // Special handling for specific message types
@@ -207,6 +235,22 @@ class CTFWebSocket {
         });
     }
 
+    subscribe(channel) {
+        this.subscriptions.add(channel);
+        this.send({
+            type: 'subscribe',
+            channel: channel
+        });
+    }
+
+    unsubscribe(channel) {
+        this.subscriptions.delete(channel);
+        this.send({
+            type: 'unsubscribe',
+            channel: channel
+        });
+    }
+
     requestTeamStatus() {
         this.send({
             type: 'get_team_status'